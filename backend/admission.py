@@ -0,0 +1,158 @@
+# backend/admission.py
+#
+# Admission control in front of generation: a token bucket per client, and a
+# cap on concurrent generations with a bounded FIFO of waiters. Requests that
+# cannot be served soon are refused up front (429 / 503 with Retry-After)
+# instead of timing out or failing half-way through a stream; once admitted a
+# stream is never preempted.
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+
+REJECTION_REASONS = ("rate_limited", "queue_full", "queue_timeout")
+
+class Rejected(Exception):
+    """Refused admission; `reason` is one of REJECTION_REASONS."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class RateLimiter:
+    """Token bucket per client: `rate` requests per second on average, bursts of up to `burst`.
+
+    The least recently seen buckets are dropped beyond `max_clients`; a dropped
+    client starts again with a full bucket. rate <= 0 disables the limit.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets = OrderedDict()
+
+    def check(self, client):
+        """Take a token for `client`, or raise Rejected with the seconds until one is available."""
+        if self.rate <= 0:
+            return
+        now = self._clock()
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            raise Rejected("rate_limited", (1 - tokens) / self.rate)
+        self._buckets[client] = (tokens - 1, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+    def stats(self):
+        return {"clients": len(self._buckets)}
+
+class ConcurrencyLimiter:
+    """At most `limit` holders at once; up to `max_queue` more wait in arrival order.
+
+    A waiter gives up after `queue_timeout` seconds. Retry-After hints are the
+    average hold time times the number of rounds ahead. limit <= 0 disables
+    the cap. Must be used from a single event loop.
+    """
+
+    def __init__(self, limit, max_queue, queue_timeout):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+        self._held_seconds = 0.0
+        self._released = 0
+
+    def _retry_after(self):
+        average = self._held_seconds / self._released if self._released else 1.0
+        return average * (len(self._waiters) // max(1, self.limit) + 1)
+
+    async def acquire(self):
+        """Wait for a slot; returns the seconds spent waiting."""
+        if self.limit <= 0:
+            return 0.0
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return 0.0
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected("queue_full", self._retry_after())
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()  # Handed a slot just as we gave up: pass it on
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise Rejected("queue_timeout", self._retry_after()) from None
+        return time.perf_counter() - started
+
+    def _release_slot(self):
+        # The slot goes straight to the longest waiter, so new arrivals cannot jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def release(self, held_seconds):
+        if self.limit <= 0:
+            return
+        self._held_seconds += held_seconds
+        self._released += 1
+        self._release_slot()
+
+    def stats(self):
+        return {"active": self.active, "queued": len(self._waiters), "limit": self.limit,
+                "max_queue": self.max_queue, "queue_timeout": self.queue_timeout}
+
+class Admission:
+    """One admitted request; release() (idempotent) frees its generation slot, if it took one."""
+
+    def __init__(self, limiter, holds_slot, waited=0.0):
+        self._limiter = limiter
+        self._holds_slot = holds_slot
+        self.waited = waited
+        self._started = time.perf_counter()
+
+    def release(self):
+        if self._holds_slot:
+            self._holds_slot = False
+            self._limiter.release(time.perf_counter() - self._started)
+
+class AdmissionController:
+    """Rate limit per client, then a generation slot.
+
+    Questions already being generated for someone else join that stream (see
+    coalescing.py) without opening another completion upstream, so they only
+    pass the rate limit: a busy server keeps serving what it is already
+    producing and sheds new work first.
+    """
+
+    def __init__(self, rate_limiter, concurrency):
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+
+    async def admit(self, client, joins_existing=False):
+        """Return an Admission, or raise Rejected."""
+        self.rate_limiter.check(client)
+        if joins_existing:
+            return Admission(self.concurrency, False)
+        waited = await self.concurrency.acquire()
+        return Admission(self.concurrency, self.concurrency.limit > 0, waited)
+
+    def stats(self):
+        return {**self.concurrency.stats(), **self.rate_limiter.stats(),
+                "rate_per_second": self.rate_limiter.rate, "burst": self.rate_limiter.burst}
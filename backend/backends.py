@@ -0,0 +1,85 @@
+# backend/backends.py
+#
+# The embedding model and the LLM client, built from config. Both speak the
+# OpenAI API, so any compatible server (a local model server, or
+# benchmarks/stub_llm_server.py) can stand in through *_BASE_URL; the "local"
+# embedding backend needs no server at all.
+
+import hashlib
+import re
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import (
+    EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_BASE_URL, EMBEDDING_API_KEY, EMBEDDING_DIMENSIONS,
+    LLM_BASE_URL, LLM_API_KEY, LLM_TIMEOUT, LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE,
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+class LocalEmbeddings(Embeddings):
+    """Deterministic embeddings from hashed word unigrams and bigrams, L2-normalised.
+
+    Texts sharing words get similar vectors, so retrieval behaves plausibly,
+    but there is no semantics: this is for offline benchmarks and tests.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self.model = f"local-hash-{size}"
+
+    def _embed(self, text):
+        vector = np.zeros(self.size, dtype=np.float32)
+        words = _WORD.findall(text.lower())
+        for gram in words + [a + " " + b for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+            vector[int.from_bytes(digest[:4], "big") % self.size] += 1 if digest[4] & 1 else -1
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+def make_embeddings():
+    """The EMBEDDING_BACKEND model."""
+    if EMBEDDING_BACKEND == "local":
+        return LocalEmbeddings(EMBEDDING_DIMENSIONS or 256)
+    if EMBEDDING_BACKEND == "openai":
+        from langchain_openai import OpenAIEmbeddings  # Slow import, paid on first use
+        options = {}
+        if EMBEDDING_MODEL:
+            options["model"] = EMBEDDING_MODEL
+        if EMBEDDING_DIMENSIONS:
+            options["dimensions"] = EMBEDDING_DIMENSIONS
+        if EMBEDDING_API_KEY:
+            options["api_key"] = EMBEDDING_API_KEY
+        if EMBEDDING_BASE_URL:
+            # Other servers take text, not tiktoken token ids (tiktoken would also download its vocabulary)
+            options.update(base_url=EMBEDDING_BASE_URL, check_embedding_ctx_length=False)
+        return OpenAIEmbeddings(**options)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {EMBEDDING_BACKEND!r}; expected 'openai' or 'local'")
+
+def embedding_fingerprint():
+    """Identifies the vectors the configured backend produces; indexes and caches are keyed on it."""
+    return (f"{EMBEDDING_BACKEND}:{EMBEDDING_MODEL or 'default'}:{EMBEDDING_DIMENSIONS or 'default'}"
+            f"@{EMBEDDING_BASE_URL or 'default'}")
+
+def make_llm_client():
+    """Async OpenAI-compatible client sharing one pooled HTTP connection set across all chats."""
+    import httpx
+    import openai
+    return openai.AsyncOpenAI(
+        base_url=LLM_BASE_URL or None,
+        api_key=LLM_API_KEY or None,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            ),
+            timeout=LLM_TIMEOUT,
+        ),
+    )
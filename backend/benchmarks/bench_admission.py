@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_admission.py
+#
+# A burst of distinct questions against /chat with and without a cap on
+# concurrent generations. Reports how many were served, queued or refused,
+# TTFT of the served ones, and how fast refusals come back. Starts the stub
+# LLM server and the app (one per setting) as subprocesses.
+#
+#   python backend/benchmarks/bench_admission.py --burst 300 --limits 0 32
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from load_test_chat import percentile, wait_until_up
+
+async def one_request(client, url, i):
+    started = time.perf_counter()
+    # Distinct questions, so none of them is coalesced into another's generation
+    async with client.stream("POST", f"{url}/chat", json={"query": f"What does service number {i} cost?"}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return response.status_code, time.perf_counter() - started
+        async for line in response.aiter_lines():
+            if line.startswith('data: {"type": "token"'):
+                return 200, time.perf_counter() - started
+    return 200, None
+
+async def burst(url, count):
+    limits = httpx.Limits(max_connections=count, max_keepalive_connections=count)
+    async with httpx.AsyncClient(limits=limits, timeout=300) as client:
+        await one_request(client, url, -1)  # Warm-up
+        return await asyncio.gather(*(one_request(client, url, i) for i in range(count)), return_exceptions=True)
+
+def run_setting(args, limit):
+    env = dict(os.environ)
+    stub_url = f"http://127.0.0.1:{args.stub_port}/v1"
+    env.update(
+        LLM_BASE_URL=stub_url, EMBEDDING_BASE_URL=stub_url, OPENAI_API_KEY=env.get("OPENAI_API_KEY") or "stub",
+        RATE_LIMIT_PER_MINUTE="0", MAX_CONCURRENT_GENERATIONS=str(limit),
+        ADMISSION_QUEUE_SIZE=str(args.queue), ADMISSION_QUEUE_TIMEOUT=str(args.queue_timeout),
+        SEMANTIC_CACHE_ENABLED="false",
+    )
+    processes = [
+        subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "stub_llm_server.py"), "--port", str(args.stub_port),
+                          "--ttft-ms", str(args.ttft_ms), "--tokens-per-sec", str(args.tokens_per_sec)], env=env),
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+                          "--port", str(args.app_port), "--log-level", "warning"], env=env),
+    ]
+    url = f"http://127.0.0.1:{args.app_port}"
+    try:
+        async def go():
+            await wait_until_up(f"http://127.0.0.1:{args.stub_port}/docs")
+            await wait_until_up(f"{url}/")
+            return await burst(url, args.burst)
+        return asyncio.run(go())
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat under a burst, with and without admission control")
+    parser.add_argument("--burst", type=int, default=300)
+    parser.add_argument("--limits", type=int, nargs="+", default=[0, 32], help="MAX_CONCURRENT_GENERATIONS values (0 = no cap)")
+    parser.add_argument("--queue", type=int, default=32)
+    parser.add_argument("--queue-timeout", type=float, default=5)
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-sec", type=float, default=50)
+    parser.add_argument("--app-port", type=int, default=8767)
+    parser.add_argument("--stub-port", type=int, default=9102)
+    args = parser.parse_args()
+
+    print(f"{args.burst} simultaneous questions; queue {args.queue}, timeout {args.queue_timeout:.0f}s")
+    print(f"{'limit':>6} {'served':>7} {'503':>5} {'other':>6} {'ttft p50':>9} {'ttft p99':>9} {'refusal p50':>12} {'refusal p99':>12}")
+    for limit in args.limits:
+        results = run_setting(args, limit)
+        served = [r[1] * 1000 for r in results if not isinstance(r, BaseException) and r[0] == 200 and r[1]]
+        refused = [r[1] * 1000 for r in results if not isinstance(r, BaseException) and r[0] == 503]
+        other = len(results) - len(served) - len(refused)
+        print(f"{limit or 'none':>6} {len(served):>7} {len(refused):>5} {other:>6} "
+              f"{percentile(served, 50):>7.0f}ms {percentile(served, 99):>7.0f}ms "
+              f"{percentile(refused, 50):>10.0f}ms {percentile(refused, 99):>10.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# backend/benchmarks/bench_context.py
+#
+# Prompt size and time-to-first-token with the old prompt (one user message,
+# instructions plus every retrieved chunk joined as-is) against the packed one
+# (static system message, overlapping chunks merged, CONTEXT_TOKEN_BUDGET).
+#
+# Retrieval runs over a generated site of long pages, one topic each, so a
+# question about a topic pulls several neighbouring chunks of its page (the
+# case packing helps); retrieval uses a local hashing embedding. TTFT is
+# measured against the stub LLM server started with --prefill-tokens-per-sec,
+# so it grows with prompt length the way a real model's does; pass --base-url
+# to measure a real endpoint instead.
+#
+#   python backend/benchmarks/bench_context.py --pages 100 --queries 100
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+_TMP = tempfile.mkdtemp(prefix="bench_context_")
+os.environ["FAISS_INDEX_DIR"] = os.path.join(_TMP, "faiss_index")
+os.environ["SPLIT_WORKERS"] = "1"
+os.environ["EMBEDDING_BACKEND"] = "local"
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np
+
+import rag_pipeline
+import query_engine
+from bench_retrieval import WORDS
+from run_scraper import extract_page
+from config import FAISS_INDEX_DIR, HYBRID_CANDIDATES, LLM_MODEL, RETRIEVAL_K, RRF_K
+from index_registry import IndexRegistry
+from load_test_chat import wait_until_up
+from retrieval import hybrid_search
+from tokenizer import count_tokens
+
+def generate_site(pages, seed=0):
+    """Scraped pages of ~3000 chars on one product each, and a question per page."""
+    rng = random.Random(seed)
+    scraped, queries = [], []
+    for i in range(pages):
+        url = f"https://example.com/product/{i}"
+        product = f"Nova{rng.choice(['Desk', 'Cart', 'Pulse', 'Forge'])}{i}"
+        paragraphs = "".join(
+            f"<p>{product} {' '.join(rng.choice(WORDS) for _ in range(60))}. "
+            f"{product} {' '.join(rng.choice(WORDS) for _ in range(20))}.</p>"
+            for _ in range(4)
+        )
+        html = f"<html><body><main><h1>{product}</h1>{paragraphs}</main></body></html>"
+        scraped.append({"url": url, "content": extract_page(html, url)[0]})
+        queries.append(f"What is {product} and what does it include?")
+    return scraped, queries
+
+def legacy_messages(query, docs):
+    """The prompt as it was built before packing: everything in one user message."""
+    context = "\n\n".join(doc.page_content for doc in docs)
+    prompt = (query_engine.system_prompt_str + "\n"
+              + query_engine.user_prompt_template_str.format(context=context, question=query))
+    return [{"role": "user", "content": prompt}]
+
+def message_tokens(messages):
+    return sum(count_tokens(message["content"]) for message in messages)
+
+async def first_token_seconds(client, messages):
+    started = time.perf_counter()
+    stream = await client.chat.completions.create(model=LLM_MODEL, messages=messages, stream=True, temperature=0)
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                return time.perf_counter() - started
+    finally:
+        await stream.close()
+    return time.perf_counter() - started
+
+async def measure_ttft(base_url, prompts):
+    import openai
+    client = openai.AsyncOpenAI(base_url=base_url)
+    try:
+        results = {}
+        for name, messages_list in prompts.items():
+            results[name] = [await first_token_seconds(client, messages) * 1000 for messages in messages_list]
+        return results
+    finally:
+        await client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Context packing: prompt tokens and TTFT")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint; default spawns the stub server")
+    parser.add_argument("--stub-port", type=int, default=9101)
+    parser.add_argument("--ttft-ms", type=float, default=100)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=5000)
+    args = parser.parse_args()
+
+    embedder = rag_pipeline.get_embedding_model()
+    scraped, queries = generate_site(args.pages)
+    rag_pipeline.create_vector_store(scraped)
+    registry = IndexRegistry(FAISS_INDEX_DIR)
+    registry.load()
+
+    queries = queries[:args.queries]
+    prompts = {"legacy": [], "packed": []}
+    with registry.acquire() as handle:
+        for query in queries:
+            docs = hybrid_search(handle.vector_store, handle.lexical_index, query, embedder.embed_query(query),
+                                 RETRIEVAL_K, candidates=HYBRID_CANDIDATES, rrf_k=RRF_K)
+            prompts["legacy"].append(legacy_messages(query, docs))
+            prompts["packed"].append(query_engine._build_messages(query, docs))
+    packed_stats = query_engine.packing_stats.stats()
+
+    legacy_tokens = np.mean([message_tokens(m) for m in prompts["legacy"]])
+    packed_tokens = np.mean([message_tokens(m) for m in prompts["packed"]])
+    system_tokens = count_tokens(query_engine.system_prompt_str)
+    print(f"{len(queries)} queries, k={RETRIEVAL_K}, context budget {query_engine.CONTEXT_TOKEN_BUDGET} tokens")
+    print(f"context tokens/request: {packed_stats['raw_context_tokens'] / len(queries):.0f} raw -> "
+          f"{packed_stats['packed_context_tokens'] / len(queries):.0f} packed "
+          f"(saved {packed_stats['saved_tokens_per_request']:.0f})")
+    print(f"input tokens/request:   {legacy_tokens:.0f} legacy -> {packed_tokens:.0f} packed, "
+          f"of which {system_tokens} are the cacheable system message")
+
+    stub = None
+    base_url = args.base_url
+    try:
+        if base_url is None:
+            stub = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "stub_llm_server.py"),
+                                     "--port", str(args.stub_port), "--ttft-ms", str(args.ttft_ms),
+                                     "--prefill-tokens-per-sec", str(args.prefill_tokens_per_sec),
+                                     "--tokens", "5"])
+            base_url = f"http://127.0.0.1:{args.stub_port}/v1"
+            asyncio.run(wait_until_up(f"http://127.0.0.1:{args.stub_port}/docs"))
+        ttft = asyncio.run(measure_ttft(base_url, prompts))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    for name, values in ttft.items():
+        print(f"TTFT {name:>6}: p50 {np.percentile(values, 50):.0f} ms, p99 {np.percentile(values, 99):.0f} ms")
+    change = np.percentile(ttft["packed"], 50) - np.percentile(ttft["legacy"], 50)
+    print(f"TTFT p50 change: {change:+.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# backend/benchmarks/bench_crawler.py
+#
+# Crawl a generated site served locally and report pages/sec at several
+# concurrency levels. Per-request latency on the fixture server stands in
+# for network round-trips.
+#
+#   python backend/benchmarks/bench_crawler.py --pages 500 --latency-ms 50 --concurrency 1 4 16 32
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_site import SiteGraph, serve
+from run_scraper import crawl_website
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawler throughput benchmark")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--links-per-page", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--max-depth", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    graph = SiteGraph(args.pages, args.links_per_page)
+    server, base_url = serve(graph, latency_ms=args.latency_ms)
+
+    print(f"{'workers':>8} {'pages':>6} {'seconds':>8} {'pages/s':>8}")
+    try:
+        for concurrency in args.concurrency:
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                pages, _ = asyncio.run(crawl_website(f"{base_url}/page/0", args.max_depth, concurrency=concurrency))
+            elapsed = time.perf_counter() - started
+            print(f"{concurrency:>8} {len(pages):>6} {elapsed:>8.2f} {len(pages) / elapsed:>8.1f}")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
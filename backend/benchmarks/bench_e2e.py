@@ -0,0 +1,182 @@
+# backend/benchmarks/bench_e2e.py
+#
+# The whole pipeline, offline and reproducible: crawl the fixture site with
+# run_scraper.py, index it with run_embedd.py, start the app under uvicorn and
+# load /chat at a few concurrency levels. Embeddings and completions come from
+# stub_llm_server.py (or, with --local-embeddings, embeddings are computed
+# in-process), through the same LLM_BASE_URL / EMBEDDING_BASE_URL settings a
+# self-hosted model server would use. Everything runs in a temporary DATA_DIR.
+#
+# Writes a JSON report (commit, phase timings, TTFT and total latency
+# percentiles, requests/s, tokens/s, /metrics stage sums) and, with --compare,
+# prints the change against an earlier report:
+#
+#   python backend/benchmarks/bench_e2e.py --output e2e.json
+#   python backend/benchmarks/bench_e2e.py --compare e2e.json
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fixture_site import SiteGraph, serve
+from load_test_chat import run_level, wait_until_up
+from utils import find_pages, iter_pages
+
+def git_commit():
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+def timed_run(command, env):
+    started = time.perf_counter()
+    subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+def wait_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"{url} did not answer 200 within {timeout}s")
+
+def stage_sums(metrics_text):
+    """Mean seconds per request for each stage in rag_stage_seconds."""
+    sums, counts = {}, {}
+    for name, stage, value in re.findall(r'^rag_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$', metrics_text, re.M):
+        (sums if name == "sum" else counts)[stage] = float(value)
+    return {stage: round(sums[stage] / counts[stage] * 1000, 3) for stage in sums if counts.get(stage)}
+
+def run(args):
+    data_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    env = dict(os.environ)
+    env.update(
+        DATA_DIR=data_dir,
+        FAISS_INDEX_DIR=os.path.join(data_dir, "faiss_index"),
+        LLM_BASE_URL=f"http://127.0.0.1:{args.stub_port}/v1",
+        LLM_API_KEY="stub",
+        OPENAI_API_KEY="stub",
+        SEMANTIC_CACHE_ENABLED="false",  # Repeated queries would otherwise measure the cache, not the pipeline
+        INDEX_WATCH_INTERVAL="0",
+    )
+    # Every session comes from one address; admission control is measured on its own (bench_admission.py)
+    env.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+    env.setdefault("MAX_CONCURRENT_GENERATIONS", "0")
+    if args.local_embeddings:
+        env.update(EMBEDDING_BACKEND="local", EMBEDDING_DIMENSIONS=str(args.dimensions))
+    else:
+        env.update(EMBEDDING_BACKEND="openai", EMBEDDING_BASE_URL=env["LLM_BASE_URL"], EMBEDDING_API_KEY="stub",
+                   EMBEDDING_MODEL="stub-embedding", EMBEDDING_DIMENSIONS=str(args.dimensions))
+
+    server, site_url = serve(SiteGraph(pages=args.pages), latency_ms=args.site_latency_ms)
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "stub_llm_server.py"), "--port", str(args.stub_port),
+         "--ttft-ms", str(args.ttft_ms), "--tokens-per-sec", str(args.tokens_per_sec),
+         "--tokens", str(args.tokens), "--dimensions", str(args.dimensions)],
+        env=env,
+    )
+    processes = [stub]
+    report = {"commit": git_commit(), "settings": vars(args).copy(), "phases": {}, "levels": []}
+    report["settings"].pop("compare", None)
+    try:
+        wait_ready(f"http://127.0.0.1:{args.stub_port}/docs", 30)
+        report["phases"]["scrape_s"] = timed_run(
+            [sys.executable, "run_scraper.py", f"{site_url}/page/0", "--max-depth", str(args.max_depth),
+             "--concurrency", "16", "--min-interval", "0"], env)
+        report["phases"]["pages"] = sum(1 for _ in iter_pages(find_pages(data_dir)))
+        report["phases"]["index_s"] = timed_run([sys.executable, "run_embedd.py", "--full"], env)
+
+        started = time.perf_counter()
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+             "--port", str(args.app_port), "--log-level", "warning"],
+            env=env,
+        )
+        processes.append(app)
+        url = f"http://127.0.0.1:{args.app_port}"
+        wait_ready(f"{url}/readyz", 120)
+        report["phases"]["ready_s"] = time.perf_counter() - started
+
+        async def load():
+            await wait_until_up(f"{url}/")
+            await run_level(url, 1)  # Warm the connection pools and the retrieval path once
+            for concurrency in args.concurrency:
+                level = await run_level(url, concurrency)
+                level["requests_per_s"] = level["ok"] / level["wall_s"]
+                level["tokens_per_s"] = level["ok"] * args.tokens / level["wall_s"]
+                report["levels"].append(level)
+
+        asyncio.run(load())
+        report["stage_ms"] = stage_sums(httpx.get(f"{url}/metrics").text)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        server.shutdown()
+    return report
+
+def print_report(report, baseline=None):
+    def delta(new, old):
+        if old is None or not old:
+            return ""
+        return f" ({(new - old) / old * 100:+.1f}%)"
+
+    old_phases = (baseline or {}).get("phases", {})
+    print(f"commit {report['commit']}" + (f" vs {baseline.get('commit')}" if baseline else ""))
+    for name, value in report["phases"].items():
+        print(f"  {name:<10} {value:>9.2f}{delta(value, old_phases.get(name))}")
+    old_levels = {level["concurrency"]: level for level in (baseline or {}).get("levels", [])}
+    for level in report["levels"]:
+        old = old_levels.get(level["concurrency"], {})
+        print(f"  c={level['concurrency']:<4} ok {level['ok']} err {level['errors']}")
+        for key in ("ttft_p50_ms", "ttft_p99_ms", "total_p50_ms", "total_p99_ms", "requests_per_s", "tokens_per_s"):
+            print(f"    {key:<15} {level[key]:>9.1f}{delta(level[key], old.get(key))}")
+    old_stages = (baseline or {}).get("stage_ms", {})
+    print("  mean ms per stage: " + ", ".join(
+        f"{stage} {value:.2f}{delta(value, old_stages.get(stage))}" for stage, value in sorted(report["stage_ms"].items())))
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark: scrape, index, serve, load")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=4)
+    parser.add_argument("--site-latency-ms", type=float, default=0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--ttft-ms", type=float, default=100)
+    parser.add_argument("--tokens-per-sec", type=float, default=200)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--local-embeddings", action="store_true", help="Embed in-process instead of through the stub")
+    parser.add_argument("--app-port", type=int, default=8766)
+    parser.add_argument("--stub-port", type=int, default=9101)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Earlier JSON report to print deltas against")
+    args = parser.parse_args()
+
+    report = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_extract.py
+#
+# Micro-benchmark for run_scraper.extract_page against the original two-parse
+# pipeline (tests/golden_extract.py), plus a golden check on a corpus of
+# saved pages. backend/tests/test_extract.py covers the built-in cases.
+#
+# Every parser backend must match the reference on the corpus; the script
+# exits non-zero on any mismatch. On MALFORMED_CASES only html.parser has to:
+# lxml (opt-in via SCRAPER_HTML_PARSER) repairs broken markup differently, so
+# those divergences are reported but not fatal.
+#
+#   python backend/benchmarks/bench_extract.py --corpus path/to/saved/pages
+#
+# Without --corpus it uses the generated fixture pages plus built-in edge cases.
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "tests"))
+
+from fixture_site import SiteGraph
+from golden_extract import EDGE_CASES, MALFORMED_CASES, legacy_clean_text_with_links, legacy_links
+from run_scraper import extract_page
+
+def load_corpus(path):
+    if path:
+        pages = []
+        for filename in sorted(glob.glob(os.path.join(path, "**", "*.htm*"), recursive=True)):
+            with open(filename, "r", encoding="utf-8", errors="replace") as f:
+                pages.append((filename, f.read()))
+        return pages
+    graph = SiteGraph(200)
+    return [(f"fixture/{i}", graph.render(i)) for i in range(graph.pages)] + \
+           [(f"edge/{i}", html) for i, html in enumerate(EDGE_CASES)]
+
+def check(pages, backend, page_url):
+    return [name for name, html in pages
+            if extract_page(html, page_url, parser=backend) != (legacy_clean_text_with_links(html), legacy_links(html, page_url))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden check and benchmark for extract_page")
+    parser.add_argument("--corpus", help="Directory of saved .html pages")
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if args.limit:
+        pages = pages[:args.limit]
+    page_url = "https://example.com/dir/page.html"
+    total_bytes = sum(len(html) for _, html in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1e6:.1f} MB")
+
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        print("lxml not installed; only checking html.parser")
+
+    malformed = [(f"malformed/{i}", html) for i, html in enumerate(MALFORMED_CASES)]
+    failed = False
+    for backend in parsers:
+        mismatches = check(pages, backend, page_url)
+        status = "identical" if not mismatches else f"{len(mismatches)} MISMATCHES, e.g. {mismatches[:3]}"
+        print(f"{backend:>12}: {status}")
+        failed = failed or bool(mismatches)
+
+        divergent = check(malformed, backend, page_url)
+        if backend == "html.parser":
+            failed = failed or bool(divergent)
+        if divergent:
+            print(f"{'':>12}  malformed markup differs from html.parser in {len(divergent)}/{len(malformed)} cases")
+
+    def timed(fn):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for _, html in pages:
+                fn(html)
+            best = min(best, time.perf_counter() - started)
+        return best * 1000 / len(pages)
+
+    baseline = timed(lambda html: (legacy_clean_text_with_links(html), legacy_links(html, page_url)))
+    print(f"\n{'pipeline':>24} {'ms/page':>8} {'speedup':>8}")
+    print(f"{'legacy (2 parses)':>24} {baseline:>8.2f} {1.0:>7.2f}x")
+    for backend in parsers:
+        per_page = timed(lambda html: extract_page(html, page_url, parser=backend))
+        print(f"{'extract_page ' + backend:>24} {per_page:>8.2f} {baseline / per_page:>7.2f}x")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_index.py
+#
+# recall@k vs query latency vs memory for the serving index variants, on a
+# synthetic corpus of locally generated (clustered) embeddings. Each variant
+# is loaded in a fresh subprocess so its private memory (RssAnon) and shared,
+# page-cached memory (RssFile) are measured in isolation, with and without mmap.
+#
+#   python backend/benchmarks/bench_index.py --vectors 50000 --dimensions 1536
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss
+import numpy as np
+
+from index_variants import INDEX_TYPES, build_serving_index, factory_string, read_index, tune
+
+def rss_mb():
+    status = open("/proc/self/status").read()
+    field = lambda name: int(status.split(name + ":")[1].split()[0]) / 1024
+    return field("RssAnon"), field("RssFile")
+
+def synthetic_corpus(vectors, dimensions, queries, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(vectors // 100, 1), dimensions)).astype("float32")
+    corpus = centers[rng.integers(len(centers), size=vectors)] + 0.5 * rng.normal(size=(vectors, dimensions)).astype("float32")
+    picks = rng.integers(vectors, size=queries)
+    query_vectors = corpus[picks] + 0.3 * rng.normal(size=(queries, dimensions)).astype("float32")
+    normalize = lambda m: (m / np.linalg.norm(m, axis=1, keepdims=True)).astype("float32")
+    return normalize(corpus), normalize(query_vectors)
+
+def measure(path, queries_path, truth_path, k, mmap):
+    """Child process: load one index and report memory, latency and recall as JSON."""
+    queries, truth = np.load(queries_path), np.load(truth_path)
+    before_anon, before_file = rss_mb()
+    started = time.perf_counter()
+    index = tune(read_index(path, mmap=mmap))
+    load_seconds = time.perf_counter() - started
+
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append(ids[0])
+    after_anon, after_file = rss_mb()
+
+    recall = float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+    print(json.dumps({
+        "load_s": load_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "recall": recall,
+        "anon_mb": after_anon - before_anon,
+        "file_mb": after_file - before_file,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Index variant benchmark")
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES))
+    parser.add_argument("--child", nargs=4, metavar=("INDEX", "QUERIES", "TRUTH", "MMAP"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        path, queries_path, truth_path, mmap = args.child
+        measure(path, queries_path, truth_path, args.k, mmap == "1")
+        return
+
+    corpus, queries = synthetic_corpus(args.vectors, args.dimensions, args.queries)
+    flat = faiss.IndexFlatL2(args.dimensions)
+    flat.add(corpus)
+    _, truth = flat.search(queries, args.k)
+    del corpus
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queries_path, truth_path = os.path.join(tmp, "queries.npy"), os.path.join(tmp, "truth.npy")
+        np.save(queries_path, queries)
+        np.save(truth_path, truth)
+
+        print(f"{args.vectors} vectors x {args.dimensions} dims, k={args.k}, {args.queries} queries\n")
+        print(f"{'type':>6} {'factory':>14} {'build s':>8} {'file MB':>8} {'mmap':>5} {'recall':>7} "
+              f"{'p50 ms':>7} {'p99 ms':>7} {'anon MB':>8} {'shared MB':>9}")
+        for index_type in args.types:
+            factory = factory_string(index_type, flat.ntotal, flat.d)
+            started = time.perf_counter()
+            index = flat if index_type == "flat" else build_serving_index(flat, factory)
+            build_seconds = time.perf_counter() - started
+            path = os.path.join(tmp, f"{index_type}.faiss")
+            faiss.write_index(index, path)
+            if index is not flat:
+                del index
+
+            for mmap in ("0", "1"):
+                output = subprocess.run(
+                    [sys.executable, __file__, "-k", str(args.k), "--child", path, queries_path, truth_path, mmap],
+                    capture_output=True, text=True, check=True,
+                ).stdout
+                r = json.loads(output.strip().splitlines()[-1])
+                print(f"{index_type:>6} {factory:>14} {build_seconds:>8.1f} {os.path.getsize(path) / 2**20:>8.1f} "
+                      f"{'yes' if mmap == '1' else 'no':>5} {r['recall']:>7.3f} {r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} "
+                      f"{r['anon_mb']:>8.1f} {r['file_mb']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_reload.py
+#
+# Search latency and memory while the index is hot-swapped. Query threads
+# search the registry's active index in a loop; meanwhile new index versions
+# are written with save_index_atomically (in a child process, like
+# run_embedd.py) and swapped in with reload(). Reports
+# p50/p99 search latency outside and during reloads, and peak RSS against the
+# single-index baseline (it should stay under two indexes' worth).
+#
+#   python backend/benchmarks/bench_reload.py --vectors 200000 --dimensions 384 --reloads 3
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+if "--write" not in sys.argv:
+    os.environ["FAISS_INDEX_DIR"] = os.path.join(tempfile.mkdtemp(prefix="bench_reload_"), "faiss_index")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+
+from config import FAISS_INDEX_DIR
+from index_registry import IndexRegistry
+from rag_pipeline import save_index_atomically
+
+def rss_mb():
+    status = open("/proc/self/status").read()
+    field = lambda name: int(status.split(name + ":")[1].split()[0]) / 1024
+    return field("VmRSS"), field("VmHWM")
+
+def reset_peak_rss():
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+def write_version(vectors, dimensions, seed):
+    # In a child process, like run_embedd.py, so building the index does not count towards our memory
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--write", str(seed),
+                    "--vectors", str(vectors), "--dimensions", str(dimensions)], check=True)
+
+def _write_version(vectors, dimensions, seed):
+    rng = np.random.default_rng(seed)
+    matrix = rng.random((vectors, dimensions), dtype=np.float32)
+    store = FAISS.from_embeddings(
+        [(f"chunk {i}", vector) for i, vector in enumerate(matrix)],
+        FakeEmbeddings(size=dimensions),
+        ids=[f"{seed}-{i}" for i in range(vectors)],
+    )
+    save_index_atomically(store, {"chunks": {}}, FAISS_INDEX_DIR)
+
+def percentile(values, pct):
+    return float(np.percentile(values, pct)) if values else float("nan")
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and memory during hot index reloads")
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--reloads", type=int, default=3)
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds of plain querying between reloads")
+    parser.add_argument("--write", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.write is not None:
+        _write_version(args.vectors, args.dimensions, args.write)
+        return
+
+    write_version(args.vectors, args.dimensions, seed=0)
+    registry = IndexRegistry(FAISS_INDEX_DIR)
+    registry.load()
+    time.sleep(args.settle)
+    baseline_rss, _ = rss_mb()
+
+    samples = []  # (finished_at, latency_ms)
+    reload_windows = []
+    stop = threading.Event()
+    queries = np.random.default_rng(1).random((256, args.dimensions), dtype=np.float32)
+
+    def query_loop(offset):
+        i = offset
+        while not stop.is_set():
+            started = time.perf_counter()
+            with registry.acquire() as handle:
+                handle.vector_store.index.search(queries[i % len(queries)][None, :], 4)
+            finished = time.perf_counter()
+            samples.append((finished, (finished - started) * 1000))
+            i += 1
+
+    threads = [threading.Thread(target=query_loop, args=(n,), daemon=True) for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+
+    peak_rss = baseline_rss
+    for version in range(1, args.reloads + 1):
+        time.sleep(args.settle)
+        write_version(args.vectors, args.dimensions, seed=version)
+        reset_peak_rss()
+        started = time.perf_counter()
+        registry.reload()
+        reload_windows.append((started, time.perf_counter()))
+        peak_rss = max(peak_rss, rss_mb()[1])
+    time.sleep(args.settle)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    during = [ms for at, ms in samples if any(start <= at <= end for start, end in reload_windows)]
+    outside = [ms for at, ms in samples if not any(start <= at <= end for start, end in reload_windows)]
+    index_mb = args.vectors * args.dimensions * 4 / 1e6
+    print(f"{args.vectors} x {args.dimensions} vectors ({index_mb:.0f} MB per index), {args.threads} query threads")
+    print(f"reloads: {registry.reloads - 1}, mean load+swap {np.mean([end - start for start, end in reload_windows]):.2f}s")
+    print(f"{'window':>14} {'queries':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, values in (("steady", outside), ("during reload", during)):
+        print(f"{name:>14} {len(values):>8} {percentile(values, 50):>8.3f} {percentile(values, 99):>8.3f}")
+    print(f"RSS after first load {baseline_rss:.0f} MB, peak {peak_rss:.0f} MB "
+          f"(+{peak_rss - baseline_rss:.0f} MB; one extra index is {index_mb:.0f} MB of vectors plus its docstore)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# backend/benchmarks/bench_retrieval.py
+#
+# recall@k and per-stage latency of dense, BM25, hybrid (RRF) and hybrid +
+# reranker retrieval on a labelled query set.
+#
+# By default the corpus is a generated site whose pages go through
+# extract_page (so contact links are injected exactly as in production) and
+# are indexed by create_vector_store with the local hashing embedding; queries
+# ask for phone numbers, emails, WhatsApp links, product names and services,
+# each labelled with the page that answers it.
+#
+#   python backend/benchmarks/bench_retrieval.py --pages 300 --k 1 3 4
+#
+# --labels queries.json evaluates [{"query": ..., "urls": [...]}, ...] against
+# the real index in FAISS_INDEX_DIR with the configured embedding model.
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+if "--labels" not in sys.argv:
+    _TMP = tempfile.mkdtemp(prefix="bench_retrieval_")
+    os.environ["FAISS_INDEX_DIR"] = os.path.join(_TMP, "faiss_index")
+    os.environ["SPLIT_WORKERS"] = "1"
+    os.environ["EMBEDDING_BACKEND"] = "local"
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import rag_pipeline
+from config import FAISS_INDEX_DIR, HYBRID_CANDIDATES, HYBRID_LEXICAL_MIN_RATIO, RERANKER_MODEL, RRF_K
+from retrieval import hybrid_search, load_reranker
+from run_scraper import extract_page
+
+SERVICES = ["web development", "search engine optimisation", "social media marketing", "logo design",
+            "video editing", "mobile app development", "content writing", "cloud hosting",
+            "email marketing", "ecommerce stores", "UI UX design", "IT support"]
+WORDS = ["growth", "brand", "team", "clients", "quality", "delivery", "support", "strategy", "results", "custom"]
+
+def generate_site(pages, seed=0):
+    """Scraped pages (via extract_page) and labelled queries."""
+    rng = random.Random(seed)
+    scraped, queries = [], []
+    for i in range(pages):
+        url = f"https://example.com/page/{i}"
+        service = SERVICES[i % len(SERVICES)]
+        product = f"Nova{rng.choice(['Desk', 'Cart', 'Pulse', 'Forge'])}{i}"
+        phone = f"+92 3{rng.randrange(10, 50)} {rng.randrange(10**6, 10**7)}"
+        email = f"team{i}@example.com"
+        filler = " ".join(rng.choice(WORDS) for _ in range(150))
+        html = (
+            f"<html><body><nav><a href='/'>Home</a></nav><main><h1>{service.title()} by office {i}</h1>"
+            f"<p>Our {service} team delivers {filler}.</p>"
+            f"<p>{product} is our {service} package for small businesses.</p>"
+            f"<p>Call <a href='tel:{phone.replace(' ', '')}'>{phone}</a>, "
+            f"mail <a href='mailto:{email}'>us</a> or "
+            f"<a href='https://wa.me/{phone.replace(' ', '').lstrip('+')}'>WhatsApp</a>.</p></main></body></html>"
+        )
+        scraped.append({"url": url, "content": extract_page(html, url)[0]})
+        queries += [
+            (f"Whose phone number is {phone}?", [url], "phone"),
+            (f"Who uses the email {email}?", [url], "email"),
+            (f"Which office has WhatsApp {phone.replace(' ', '').lstrip('+')}?", [url], "whatsapp"),
+            (f"Tell me about {product}", [url], "product"),
+        ]
+    for service in SERVICES:
+        pages_with_service = [item["url"] for i, item in enumerate(scraped) if SERVICES[i % len(SERVICES)] == service]
+        queries.append((f"Can you help my business with {service}?", pages_with_service, "service"))
+    return scraped, queries
+
+def evaluate(handle, embedder, queries, ks, reranker):
+    modes = {"dense": dict(vector_store=handle.vector_store, lexical_index=None, reranker=None)}
+    if handle.lexical_index is not None:
+        modes["bm25"] = dict(vector_store=None, lexical_index=handle.lexical_index, reranker=None)
+        modes["bm25+dense rrf"] = dict(vector_store=handle.vector_store, lexical_index=handle.lexical_index,
+                                       reranker=None)
+        if reranker is not None:
+            modes["rrf+rerank"] = dict(vector_store=handle.vector_store, lexical_index=handle.lexical_index,
+                                       reranker=reranker)
+
+    top = max(ks)
+    embeddings = {}
+    started = time.perf_counter()
+    for query, _, _ in queries:
+        embeddings[query] = embedder.embed_query(query)
+    embed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    print(f"query embedding: {embed_ms:.3f} ms/query")
+    kinds = sorted({kind for _, _, kind in queries})
+    header = " ".join(f"{'R@' + str(k):>6}" for k in ks) + "  " + " ".join(f"{kind:>9}" for kind in kinds)
+    print(f"{'mode':>16} {header}   stage ms (mean)")
+    for name, options in modes.items():
+        hits = {k: [] for k in ks}
+        by_kind = {kind: [] for kind in kinds}
+        stages = {}
+        for query, urls, kind in queries:
+            timings = {}
+            if options["vector_store"] is None:
+                started = time.perf_counter()
+                positions = [position for position, _ in options["lexical_index"].search(query, top)]
+                timings["lexical"] = time.perf_counter() - started
+                vector_store = handle.vector_store
+                docs = [vector_store.docstore.search(vector_store.index_to_docstore_id[p]) for p in positions]
+            else:
+                docs = hybrid_search(options["vector_store"], options["lexical_index"], query, embeddings[query], top,
+                                     candidates=HYBRID_CANDIDATES, rrf_k=RRF_K,
+                                     lexical_min_ratio=HYBRID_LEXICAL_MIN_RATIO, reranker=options["reranker"],
+                                     timings=timings)
+            found = [doc.metadata.get("url") for doc in docs]
+            for k in ks:
+                hits[k].append(any(url in found[:k] for url in urls))
+            by_kind[kind].append(any(url in found[:min(ks)] for url in urls))
+            for stage, seconds in timings.items():
+                stages.setdefault(stage, []).append(seconds * 1000)
+        recall = " ".join(f"{np.mean(hits[k]):>6.3f}" for k in ks)
+        kind_recall = " ".join(f"{np.mean(by_kind[kind]):>9.3f}" for kind in kinds)
+        stage_text = ", ".join(f"{stage} {np.mean(values):.3f}" for stage, values in stages.items())
+        print(f"{name:>16} {recall}  {kind_recall}   {stage_text}")
+    print(f"(per-kind columns are recall@{min(ks)})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval recall and latency benchmark")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 4])
+    parser.add_argument("--labels", help="JSON list of {query, urls}; evaluates the real index instead")
+    args = parser.parse_args()
+
+    from index_registry import IndexRegistry
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            queries = [(item["query"], item["urls"], item.get("kind", "labelled")) for item in json.load(f)]
+        embedder = rag_pipeline.get_embedding_model()
+    else:
+        embedder = rag_pipeline.get_embedding_model()
+        scraped, queries = generate_site(args.pages)
+        _, stats = rag_pipeline.create_vector_store(scraped)
+        print(f"{args.pages} pages, {stats['chunks']} chunks, {len(queries)} labelled queries")
+
+    registry = IndexRegistry(FAISS_INDEX_DIR)
+    registry.load()
+    with registry.acquire() as handle:
+        evaluate(handle, embedder, queries, sorted(args.k), load_reranker(RERANKER_MODEL))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_scrape_storage.py
+#
+# Peak memory of storing a large crawl and streaming it back for indexing: the
+# original scraped_data.json (pages collected in a list, dumped in one go,
+# loaded whole by run_embedd.py) against pages appended record by record
+# through CrawlState and read with utils.iter_pages, in each format. The
+# crawl is synthetic (no HTTP, no parsing) so only storage is measured. Every
+# format runs in its own process so peak RSS is not shared between them.
+#
+#   python backend/benchmarks/bench_scrape_storage.py --pages 20000 --page-kb 6
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_reload import reset_peak_rss, rss_mb
+from run_scraper import CrawlState, publish_pages
+from utils import PAGE_FORMATS, find_pages, iter_pages, load_json
+
+WORDS = ("service website design marketing search engine optimisation content strategy social media "
+         "campaign analytics conversion brand identity hosting support pricing contact team project").split()
+
+def synthetic_crawl(pages, page_kb):
+    # Pages are windows on one random text, so generating them costs next to nothing
+    rng = random.Random(0)
+    size = int(page_kb * 1024)
+    text = " ".join(rng.choice(WORDS) for _ in range(size // 4 + 100_000))
+    for i in range(pages):
+        start = (i * 7919) % (len(text) - size)
+        yield {"url": f"https://example.test/page/{i}", "content": text[start:start + size]}
+
+def consume(pages):
+    # What run_embedd.py does with them, minus the splitting and embedding
+    return sum(len(page["content"]) for page in pages)
+
+def measure(mode, pages, page_kb, data_dir):
+    baseline = rss_mb()[0]
+    reset_peak_rss()
+    started = time.perf_counter()
+    if mode == "legacy":
+        scraped = []
+        for page in synthetic_crawl(pages, page_kb):
+            scraped.append(page)
+        path = os.path.join(data_dir, "scraped_data.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(scraped, f, indent=2, ensure_ascii=False)
+        del scraped
+    else:
+        state = CrawlState.load(None, "https://example.test/", 0, os.path.join(data_dir, "scraped_data.partial.jsonl"))
+        for page in synthetic_crawl(pages, page_kb):
+            state.add_page(page)
+        state.finish()
+        path = publish_pages(state.pages_path, data_dir, mode)
+    write_s = time.perf_counter() - started
+    write_peak = rss_mb()[1] - baseline
+
+    reset_peak_rss()
+    started = time.perf_counter()
+    characters = consume(load_json(path) if mode == "legacy" else iter_pages(find_pages(data_dir)))
+    read_s = time.perf_counter() - started
+    return {
+        "mode": mode, "file_mb": os.path.getsize(path) / 2**20, "characters": characters,
+        "write_s": write_s, "write_peak_mb": write_peak, "read_s": read_s, "read_peak_mb": rss_mb()[1] - baseline,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of scraped page storage formats on a large synthetic crawl")
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--page-kb", type=float, default=6, help="Text per page")
+    parser.add_argument("--modes", nargs="+", default=["legacy", *PAGE_FORMATS], choices=["legacy", *PAGE_FORMATS])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        data_dir = tempfile.mkdtemp(prefix="bench_scrape_storage_")
+        try:
+            print(json.dumps(measure(args.child, args.pages, args.page_kb, data_dir)))
+        finally:
+            shutil.rmtree(data_dir)
+        return
+
+    print(f"{args.pages} pages x {args.page_kb:g} KB ({args.pages * args.page_kb / 1024:.0f} MB of text); "
+          "peak RSS above the process baseline")
+    print(f"{'format':>9} {'file MB':>8} {'write':>8} {'write peak':>11} {'read':>8} {'read peak':>10}")
+    for mode in args.modes:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode,
+                                 "--pages", str(args.pages), "--page-kb", str(args.page_kb)],
+                                check=True, capture_output=True, text=True)
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{mode:>9} {r['file_mb']:>8.0f} {r['write_s']:>7.1f}s {r['write_peak_mb']:>9.0f}MB "
+              f"{r['read_s']:>7.1f}s {r['read_peak_mb']:>8.0f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_startup.py
+#
+# Where worker startup time goes. First, `python -X importtime -c "import main"`
+# grouped by top-level package (self time, so nothing is counted twice). Then
+# the app is started under uvicorn, pointed at the stub LLM server, and the
+# time until /healthz and /readyz first answer 200 is measured, together with
+# the per-step timings /readyz reports.
+#
+#   python backend/benchmarks/bench_startup.py --runs 3
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+def import_profile(top):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=BACKEND_DIR, capture_output=True, text=True)
+    by_package = defaultdict(int)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        by_package[name.strip().split(".")[0]] += int(self_us)
+        if name.strip() == "main":
+            total = int(cumulative_us)
+    print(f"import main: {total / 1e6:.2f}s")
+    for package, micros in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<28} {micros / 1e6:>6.2f}s")
+
+def wait_for(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = httpx.get(url, timeout=1)
+            if response.status_code == 200:
+                return response
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    return None
+
+def boot_once(app_port, stub_port, timeout):
+    env = dict(os.environ)
+    env["LLM_BASE_URL"] = env["EMBEDDING_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+    env["OPENAI_API_KEY"] = env.get("OPENAI_API_KEY") or "stub"
+    env.setdefault("RATE_LIMIT_PER_MINUTE", "0")  # Every session comes from this one address
+    started = time.perf_counter()
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+         "--port", str(app_port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        healthy = wait_for(f"http://127.0.0.1:{app_port}/healthz", timeout)
+        healthz_s = time.perf_counter() - started if healthy else None
+        ready = wait_for(f"http://127.0.0.1:{app_port}/readyz", timeout)
+        readyz_s = time.perf_counter() - started if ready else None
+        if ready is None:
+            body = httpx.get(f"http://127.0.0.1:{app_port}/readyz").json()
+        else:
+            body = ready.json()
+        return healthz_s, readyz_s, body
+    finally:
+        app.terminate()
+        app.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time breakdown")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--app-port", type=int, default=8766)
+    parser.add_argument("--stub-port", type=int, default=9101)
+    args = parser.parse_args()
+
+    import_profile(args.top)
+
+    stub = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "stub_llm_server.py"),
+                             "--port", str(args.stub_port), "--ttft-ms", "0"])
+    try:
+        wait_for(f"http://127.0.0.1:{args.stub_port}/docs", args.timeout)
+        print(f"\n{'run':>4} {'healthz':>9} {'readyz':>9}  steps")
+        for run in range(args.runs):
+            healthz_s, readyz_s, body = boot_once(args.app_port, args.stub_port, args.timeout)
+            fmt = lambda s: f"{s:>8.2f}s" if s is not None else f"{'-':>9}"
+            print(f"{run:>4} {fmt(healthz_s)} {fmt(readyz_s)}  {json.dumps(body.get('timings', {}))}")
+            if readyz_s is None:
+                print(f"     not ready: {body.get('error')}")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    main()
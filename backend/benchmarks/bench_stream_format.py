@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_stream_format.py
+#
+# CPU time per 1k completion tokens spent turning tokens into SSE bytes: the
+# previous loop (buffer += token, html.unescape and replace per piece, then
+# json.dumps and an f-string per piece in main.py, per subscriber) against
+# StreamFormatter plus one pre-serialized frame per piece.
+#
+#   python backend/benchmarks/bench_stream_format.py --tokens 1000 --subscribers 1 10
+
+import argparse
+import html
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream_formatter import StreamFormatter, token_frame
+
+WORDS = ["MA", "Digital", "offers", "web", "development", "and", "SEO", "services", "for", "your", "business"]
+
+def answer_tokens(count, seed=0):
+    """Completion-like tokens: words with leading spaces, bold list titles, entities and newlines."""
+    rng = random.Random(seed)
+    tokens = []
+    while len(tokens) < count:
+        roll = rng.random()
+        if roll < 0.05:
+            tokens += ["\n", f"{rng.randint(1, 9)}.", " **", rng.choice(WORDS), "**", "\n"]
+        elif roll < 0.08:
+            tokens += [" &", "amp;"]
+        else:
+            tokens.append(" " + rng.choice(WORDS))
+    return tokens[:count]
+
+def legacy(tokens, subscribers):
+    def should_flush(token, buffer):
+        return token.endswith((' ', '\n', '.', ',', '!', '?', ':', ';', ')', ']', '}', '*')) or len(buffer) > 50
+
+    pieces, buffer = [], ""
+    for token in tokens:
+        buffer += token
+        if should_flush(token, buffer):
+            pieces.append(html.unescape(buffer).replace('**\n', '**\n\n'))
+            buffer = ""
+    if buffer:
+        pieces.append(html.unescape(buffer).replace('**\n', '**\n\n'))
+    for _ in range(subscribers):
+        for piece in pieces:
+            data = json.dumps({"type": "token", "content": piece})
+            f"data: {data}\n\n".encode("utf-8")  # What StreamingResponse does with a str chunk
+    return pieces
+
+def incremental(tokens, subscribers):
+    formatter = StreamFormatter(flush_chars=32, flush_interval=0.05)
+    frames = []
+    for token in tokens:
+        piece = formatter.push(token)
+        if piece is not None:
+            frames.append(token_frame(piece))
+    piece = formatter.finish()
+    if piece is not None:
+        frames.append(token_frame(piece))
+    for _ in range(subscribers):
+        for frame in frames:
+            pass  # Subscribers write the shared bytes as they are
+    return frames
+
+def cpu_per_run(function, tokens, subscribers, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        function(tokens, subscribers)
+    return (time.process_time() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream formatting CPU time per 1k tokens")
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    tokens = answer_tokens(args.tokens)
+    scale = 1000 / len(tokens)
+    print(f"{len(tokens)} tokens, {args.repeat} runs each; CPU microseconds per 1k tokens")
+    print(f"{'subscribers':>11} {'legacy':>10} {'incremental':>12} {'pieces (legacy/new)':>20}")
+    for subscribers in args.subscribers:
+        old = cpu_per_run(legacy, tokens, subscribers, args.repeat) * scale * 1e6
+        new = cpu_per_run(incremental, tokens, subscribers, args.repeat) * scale * 1e6
+        counts = f"{len(legacy(tokens, 1))}/{len(incremental(tokens, 1))}"
+        print(f"{subscribers:>11} {old:>10.0f} {new:>12.0f} {counts:>20}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# backend/benchmarks/bench_tenants.py
+#
+# Many tenants, one process: searches spread over --tenants indexes (a few
+# popular tenants, a long tail; Zipf-distributed) through TenantIndexes, with
+# and without a memory budget. Reports resident memory, index loads and
+# evictions, and search latency including the occasional cold load.
+#
+#   python backend/benchmarks/bench_tenants.py --tenants 20 --vectors 5000 --budget-mb 0 40
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+_TMP = tempfile.mkdtemp(prefix="bench_tenants_")
+os.environ["TENANTS_DIR"] = _TMP
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+
+from bench_reload import rss_mb
+from index_registry import TenantIndexes, index_bytes
+from load_test_chat import percentile
+from rag_pipeline import save_index_atomically
+from tenants import tenant_dirs
+
+def build_tenants(count, vectors, dimensions):
+    for t in range(count):
+        rng = np.random.default_rng(t)
+        matrix = rng.random((vectors, dimensions), dtype=np.float32)
+        texts = [f"tenant {t} page {i}" for i in range(vectors)]
+        store = FAISS.from_embeddings(list(zip(texts, matrix.tolist())), FakeEmbeddings(size=dimensions),
+                                      metadatas=[{"url": f"/{i}"} for i in range(vectors)])
+        save_index_atomically(store, {"chunks": {}}, tenant_dirs(f"t{t}")[1])
+
+def run(args, budget_mb):
+    indexes = TenantIndexes(lambda tenant: tenant_dirs(tenant)[1], memory_budget=int(budget_mb * 2**20))
+    rng = np.random.default_rng(0)
+    weights = 1 / np.arange(1, args.tenants + 1) ** args.zipf
+    picks = rng.choice(args.tenants, size=args.queries, p=weights / weights.sum())
+    query = rng.random((1, args.dimensions), dtype=np.float32)
+    latencies = []
+    peak = 0.0
+    for t in picks:
+        started = time.perf_counter()
+        with indexes.get(f"t{t}").acquire() as handle:
+            handle.vector_store.index.search(query, 4)
+        latencies.append((time.perf_counter() - started) * 1000)
+        peak = max(peak, rss_mb()[0])
+    stats = indexes.stats()
+    return {
+        "rss_mb": rss_mb()[0], "peak_rss_mb": peak, "loaded": stats["loaded"], "index_mb": stats["bytes"] / 2**20,
+        "loads": stats["loads"], "evictions": stats["evictions"],
+        "p50_ms": percentile(latencies, 50), "p99_ms": percentile(latencies, 99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and latency of lazily loaded tenant indexes")
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--zipf", type=float, default=1.2, help="Skew of traffic across tenants")
+    parser.add_argument("--budget-mb", type=float, nargs="+", default=[0, 40], help="0 = keep every index loaded")
+    args = parser.parse_args()
+
+    build_tenants(args.tenants, args.vectors, args.dimensions)
+    each = index_bytes(tenant_dirs("t0")[1]) / 2**20
+    print(f"{args.tenants} tenants x {args.vectors} vectors ({each:.1f} MB each), {args.queries} Zipf({args.zipf}) "
+          f"searches; baseline RSS {rss_mb()[0]:.0f} MB")
+    print(f"{'budget':>8} {'loaded':>7} {'index MB':>9} {'peak RSS':>9} {'loads':>6} {'evict':>6} "
+          f"{'p50':>8} {'p99':>8}")
+    # Separate processes would give cleaner RSS numbers; the budgets run in increasing order of memory instead
+    for budget in sorted(args.budget_mb, key=lambda b: b or float("inf")):
+        r = run(args, budget)
+        print(f"{budget or 'none':>8} {r['loaded']:>7} {r['index_mb']:>9.0f} {r['peak_rss_mb']:>7.0f}MB "
+              f"{r['loads']:>6} {r['evictions']:>6} {r['p50_ms']:>6.2f}ms {r['p99_ms']:>6.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# backend/benchmarks/calibrate_cache_threshold.py
+#
+# Picks SEMANTIC_CACHE_THRESHOLD for the configured embedding model. Embeds
+# labelled query pairs (same intent = the cached answer may be replayed,
+# different intent = it must not be) and prints the cosine similarity of each
+# pair plus the lowest threshold that keeps every different-intent pair a miss.
+#
+#   python backend/benchmarks/calibrate_cache_threshold.py [--pairs pairs.json]
+#
+# pairs.json is a list of [query_a, query_b, same_intent] triples; the default
+# set covers the contact questions that are easiest to confuse.
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SEMANTIC_CACHE_THRESHOLD
+
+PAIRS = [
+    ("What is your phone number?", "what's your phone number", True),
+    ("What is your phone number?", "Phone number?", True),
+    ("How can I contact you on WhatsApp?", "What is your WhatsApp number?", True),
+    ("What is your email address?", "Email address?", True),
+    ("What services do you offer?", "Which services does MA Digital provide?", True),
+    ("Do you do SEO?", "Do you offer SEO services?", True),
+    ("What is your phone number?", "What is your email address?", False),
+    ("Phone number?", "Email address?", False),
+    ("What is your phone number?", "What is your WhatsApp number?", False),
+    ("How can I contact you on WhatsApp?", "How can I contact you on Skype?", False),
+    ("What is your email address?", "What is your Skype id?", False),
+    ("Do you do SEO?", "Do you do web development?", False),
+    ("What are your prices for SEO?", "What are your prices for web design?", False),
+]
+
+def cosine(a, b):
+    a, b = np.asarray(a), np.asarray(b)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate the semantic cache threshold")
+    parser.add_argument("--pairs", help="JSON file of [query_a, query_b, same_intent] triples")
+    args = parser.parse_args()
+
+    pairs = PAIRS
+    if args.pairs:
+        with open(args.pairs, "r", encoding="utf-8") as f:
+            pairs = [tuple(pair) for pair in json.load(f)]
+
+    from rag_pipeline import get_embedding_model
+    texts = list(dict.fromkeys(text for a, b, _ in pairs for text in (a, b)))
+    vectors = dict(zip(texts, get_embedding_model().embed_documents(texts)))
+
+    scored = sorted(((cosine(vectors[a], vectors[b]), a, b, same) for a, b, same in pairs), reverse=True)
+    for score, a, b, same in scored:
+        print(f"{score:.4f}  {'same' if same else 'DIFF'}  {a!r} ~ {b!r}")
+
+    different = [score for score, _, _, same in scored if not same]
+    same = [score for score, _, _, same_intent in scored if same_intent]
+    floor = max(different) if different else 0.0
+    recall = sum(score > floor for score in same) / len(same) if same else 0.0
+    print(f"\nHighest different-intent similarity: {floor:.4f}")
+    print(f"A threshold just above it replays {recall:.0%} of same-intent pairs")
+    print(f"Configured SEMANTIC_CACHE_THRESHOLD: {SEMANTIC_CACHE_THRESHOLD}"
+          + ("  <-- too low, different questions would share answers" if SEMANTIC_CACHE_THRESHOLD <= floor else ""))
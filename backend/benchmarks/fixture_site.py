@@ -0,0 +1,80 @@
+# backend/benchmarks/fixture_site.py
+#
+# Local HTTP server that serves a generated site graph for crawler benchmarks.
+# Page i links to `links_per_page` pseudo-random other pages (seeded, so the
+# graph is identical between runs) plus the next page, so every page is
+# reachable from /page/0. Pages carry an ETag and answer If-None-Match with
+# 304; bump graph.revisions[i] to change page i between crawls.
+
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOREM = (
+    "MA Digital builds websites and runs social media campaigns for growing brands. "
+    "Our team covers design, development, SEO and content. "
+)
+
+class SiteGraph:
+    def __init__(self, pages=1000, links_per_page=8, seed=42):
+        rng = random.Random(seed)
+        self.pages = pages
+        self.links = [
+            sorted({(i + 1) % pages, *(rng.randrange(pages) for _ in range(links_per_page))})
+            for i in range(pages)
+        ]
+        self.revisions = {}
+
+    def render(self, i):
+        links = "".join(f'<li><a href="/page/{j}">Page {j}</a></li>' for j in self.links[i])
+        return (
+            f"<html><head><title>Page {i}</title><script>var x = {i};</script></head><body>"
+            f"<header><nav><a href=\"/page/0\">Home</a></nav></header>"
+            f"<main><h1>Page {i} (revision {self.revisions.get(i, 0)})</h1><p>{LOREM * 20}</p>"
+            f"<p>Call us: <a href=\"tel:+92310{i:07d}\">+92 310 {i:07d}</a></p>"
+            f"<ul>{links}</ul></main><footer>Footer</footer></body></html>"
+        )
+
+def serve(graph, latency_ms=0.0, port=0):
+    """Start the fixture server in a background thread; returns (server, base_url)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            if self.path.startswith("/page/"):
+                try:
+                    i = int(self.path.split("/")[2])
+                except ValueError:
+                    i = -1
+                if 0 <= i < graph.pages:
+                    body = graph.render(i).encode("utf-8")
+                    etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,141 @@
+# backend/benchmarks/load_test_chat.py
+#
+# Load test for the streaming /chat endpoint. Starts the stub LLM server and
+# the FastAPI app (pointed at the stub through LLM_BASE_URL and EMBEDDING_BASE_URL) as subprocesses,
+# then opens N concurrent chat sessions and reports time-to-first-token.
+#
+#   python backend/benchmarks/load_test_chat.py --concurrency 1 50 200
+#
+# Pass --no-spawn --url http://host:port to test an already running server.
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+QUERIES = [
+    "What services does MA Digital offer?",
+    "What is your phone number?",
+    "Do you do SEO?",
+    "How can I contact you on WhatsApp?",
+]
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+async def wait_until_up(url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+async def one_session(client, url, query):
+    started = time.perf_counter()
+    ttft = None
+    tokens = 0
+    async with client.stream("POST", f"{url}/chat", json={"query": query}) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[6:])
+            if event["type"] == "token":
+                tokens += 1
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+            elif event["type"] == "error":
+                raise RuntimeError(event.get("message"))
+    return ttft, time.perf_counter() - started, tokens
+
+async def run_level(url, concurrency):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=300) as client:
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(one_session(client, url, QUERIES[i % len(QUERIES)]) for i in range(concurrency)),
+            return_exceptions=True,
+        )
+        wall = time.perf_counter() - started
+
+    ok = [r for r in results if not isinstance(r, BaseException) and r[0] is not None]
+    ttfts = [r[0] * 1000 for r in ok]
+    totals = [r[1] * 1000 for r in ok]
+    return {
+        "concurrency": concurrency,
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "ttft_p50_ms": percentile(ttfts, 50),
+        "ttft_p99_ms": percentile(ttfts, 99),
+        "total_p50_ms": percentile(totals, 50),
+        "total_p99_ms": percentile(totals, 99),
+        "wall_s": wall,
+    }
+
+def spawn_servers(app_port, stub_port, stub_args):
+    env = dict(os.environ)
+    env["LLM_BASE_URL"] = env["EMBEDDING_BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+    env["OPENAI_API_KEY"] = env.get("OPENAI_API_KEY") or "stub"
+    env.setdefault("RATE_LIMIT_PER_MINUTE", "0")  # Every session comes from this one address
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "stub_llm_server.py"), "--port", str(stub_port), *stub_args],
+        env=env,
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+         "--port", str(app_port), "--log-level", "warning"],
+        env=env,
+    )
+    return [stub, app]
+
+async def main(args):
+    processes = []
+    url = args.url
+    try:
+        if not args.no_spawn:
+            stub_args = ["--ttft-ms", str(args.ttft_ms), "--tokens-per-sec", str(args.tokens_per_sec)]
+            processes = spawn_servers(args.app_port, args.stub_port, stub_args)
+            url = f"http://127.0.0.1:{args.app_port}"
+            await wait_until_up(f"http://127.0.0.1:{args.stub_port}/docs")
+        await wait_until_up(f"{url}/")
+
+        # Warm the connection pools and the retrieval path once
+        await run_level(url, 1)
+
+        print(f"{'sessions':>8} {'ok':>5} {'err':>5} {'ttft p50':>10} {'ttft p99':>10} {'total p50':>10} {'total p99':>10}")
+        for concurrency in args.concurrency:
+            r = await run_level(url, concurrency)
+            print(f"{r['concurrency']:>8} {r['ok']:>5} {r['errors']:>5} "
+                  f"{r['ttft_p50_ms']:>8.0f}ms {r['ttft_p99_ms']:>8.0f}ms "
+                  f"{r['total_p50_ms']:>8.0f}ms {r['total_p99_ms']:>8.0f}ms")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time-to-first-token load test for /chat")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 200])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--no-spawn", action="store_true", help="Use an already running server at --url")
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-sec", type=float, default=50)
+    asyncio.run(main(parser.parse_args()))
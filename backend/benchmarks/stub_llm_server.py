@@ -0,0 +1,143 @@
+# backend/benchmarks/stub_llm_server.py
+#
+# Minimal OpenAI-compatible server for offline load testing. Serves
+# /v1/chat/completions (streaming and non-streaming) with a configurable
+# time-to-first-token and token rate (plus, with --prefill-tokens-per-sec, a
+# delay proportional to the prompt's length), and /v1/embeddings with the local
+# hashed-word vectors (backends.LocalEmbeddings), so texts sharing words land near
+# each other and an index built through the stub retrieves plausibly.
+#
+#   python backend/benchmarks/stub_llm_server.py --port 9100 --ttft-ms 200 --tokens-per-sec 50
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import LocalEmbeddings
+
+app = FastAPI()
+
+settings = {
+    "ttft_ms": 200.0,
+    "prefill_tokens_per_sec": 0.0,
+    "tokens_per_sec": 50.0,
+    "tokens": 60,
+    "dimensions": 1536,
+    "embed_latency_ms": 0.0,
+}
+
+WORDS = ["MA", "Digital", "offers", "web", "development,", "social", "media", "marketing", "and", "SEO", "services.", "\n"]
+
+_embedders = {}
+
+def fake_embedding(value, dimensions):
+    if dimensions not in _embedders:
+        _embedders[dimensions] = LocalEmbeddings(dimensions)
+    if not isinstance(value, str):
+        value = " ".join(f"t{token}" for token in value)  # tiktoken ids from clients that pre-tokenize
+    return _embedders[dimensions].embed_query(value)
+
+def first_token_delay(body):
+    """Seconds before the first token: fixed TTFT plus prompt processing at the configured rate."""
+    delay = settings["ttft_ms"] / 1000
+    if settings["prefill_tokens_per_sec"]:
+        prompt_chars = sum(len(message.get("content") or "") for message in body.get("messages", []))
+        delay += prompt_chars / 4 / settings["prefill_tokens_per_sec"]
+    return delay
+
+def completion_tokens(count):
+    return [WORDS[i % len(WORDS)] + ("" if WORDS[i % len(WORDS)] == "\n" else " ") for i in range(count)]
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body["input"]
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    dimensions = body.get("dimensions") or settings["dimensions"]
+    if settings["embed_latency_ms"]:
+        await asyncio.sleep(settings["embed_latency_ms"] / 1000)
+    data = [
+        {"object": "embedding", "index": i, "embedding": fake_embedding(value, dimensions)}
+        for i, value in enumerate(inputs)
+    ]
+    return JSONResponse({
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "stub-embedding"),
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    })
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub")
+    tokens = completion_tokens(settings["tokens"])
+    created = int(time.time())
+
+    if not body.get("stream"):
+        await asyncio.sleep(first_token_delay(body) + len(tokens) / settings["tokens_per_sec"])
+        return JSONResponse({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(tokens)}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        })
+
+    async def stream():
+        def frame(delta, finish_reason=None):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        await asyncio.sleep(first_token_delay(body))
+        yield frame({"role": "assistant", "content": ""})
+        interval = 1.0 / settings["tokens_per_sec"]
+        for token in tokens:
+            yield frame({"content": token})
+            await asyncio.sleep(interval)
+        yield frame({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=settings["ttft_ms"])
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=settings["prefill_tokens_per_sec"],
+                        help="Prompt tokens processed per second before the first token (0 = fixed TTFT)")
+    parser.add_argument("--tokens-per-sec", type=float, default=settings["tokens_per_sec"])
+    parser.add_argument("--tokens", type=int, default=settings["tokens"])
+    parser.add_argument("--dimensions", type=int, default=settings["dimensions"])
+    parser.add_argument("--embed-latency-ms", type=float, default=settings["embed_latency_ms"],
+                        help="Delay added to every /v1/embeddings request")
+    args = parser.parse_args()
+
+    settings.update(
+        ttft_ms=args.ttft_ms,
+        prefill_tokens_per_sec=args.prefill_tokens_per_sec,
+        tokens_per_sec=args.tokens_per_sec,
+        tokens=args.tokens,
+        dimensions=args.dimensions,
+        embed_latency_ms=args.embed_latency_ms,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,23 @@
+# backend/chunking.py
+#
+# Split workers are spawned and import this module plus the entry script
+# (run_embedd.py -> rag_pipeline). Keep module-level state here and there
+# cheap: no clients or threads at import time.
+
+import hashlib
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+text_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=1000,
+    chunk_overlap=200,
+    separators=["\n\n", "\n", ".", "!", "?", " ", ""]
+)
+
+def chunk_id(url: str, text: str) -> str:
+    """Content hash of a chunk; also used as its docstore id in the FAISS store."""
+    return hashlib.sha256(f"{url}\0{text}".encode("utf-8")).hexdigest()
+
+def split_item(item):
+    """Split one scraped page into (chunk_id, text, url) tuples."""
+    url = item["url"]
+    return [(chunk_id(url, text), text, url) for text in text_splitter.split_text(item["content"])]
@@ -0,0 +1,85 @@
+# backend/coalescing.py
+#
+# Fan-out for identical in-flight requests: the first subscriber for a key
+# starts the producer, later ones attach to it, and every subscriber receives
+# every piece from the start, whenever it joined.
+
+import asyncio
+
+class _Flight:
+    """One running producer: the pieces so far, whether it finished, and who is listening."""
+
+    def __init__(self):
+        self.pieces = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task = None
+
+class StreamCoalescer:
+    """Shares one async generator per key between all concurrent subscribers.
+
+    The producer runs as its own task, so a slow subscriber never holds the
+    others back; pieces are kept until the producer finishes so late joiners
+    can replay them. When the last subscriber leaves before the end, the
+    producer is cancelled (which closes its upstream stream). Must be used
+    from a single event loop.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.started = 0
+        self.joined = 0
+
+    async def _run(self, key, flight, produce):
+        try:
+            async for piece in produce():
+                flight.pieces.append(piece)
+                flight.changed.set()
+        except asyncio.CancelledError:
+            flight.error = RuntimeError("generation cancelled")
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            flight.changed.set()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def subscribe(self, key, produce):
+        """Yield the pieces of produce() for `key`, starting it unless one is already in flight."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._run(key, flight, produce))
+            self.started += 1
+        else:
+            self.joined += 1
+        flight.subscribers += 1
+        sent = 0
+        try:
+            while True:
+                while sent < len(flight.pieces):
+                    sent += 1
+                    yield flight.pieces[sent - 1]
+                if flight.done:
+                    break
+                flight.changed.clear()
+                if sent == len(flight.pieces) and not flight.done:
+                    await flight.changed.wait()
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                flight.task.cancel()
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def in_flight(self, key):
+        return key in self._flights
+
+    def stats(self):
+        return {"in_flight": len(self._flights), "started": self.started, "joined": self.joined}
@@ -0,0 +1,139 @@
+# backend/config.py
+
+import os
+from utils import load_env
+
+load_env()
+
+# Paths (resolved relative to the backend package so the app and the CLI
+# scripts agree no matter which directory they are started from)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
+FAISS_INDEX_DIR = os.getenv("FAISS_INDEX_DIR", os.path.join(DATA_DIR, "faiss_index"))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+# Multi-tenant hosting: every other site gets TENANTS_DIR/<tenant id>/ (tenant.json, scraped
+# pages, index); the default tenant keeps DATA_DIR and FAISS_INDEX_DIR. Tenant indexes load
+# on first use and the least recently used are unloaded once their combined size on disk
+# passes TENANT_INDEX_MEMORY_MB (0 = keep them all); the default index is always loaded.
+TENANTS_DIR = os.getenv("TENANTS_DIR", os.path.join(DATA_DIR, "tenants"))
+TENANT_INDEX_MEMORY_MB = float(os.getenv("TENANT_INDEX_MEMORY_MB", "1024"))
+
+# LLM: any OpenAI-compatible chat completions server. LLM_BASE_URL points it
+# elsewhere (a local model server, or benchmarks/stub_llm_server.py); empty
+# means api.openai.com. LLM_API_KEY falls back to OPENAI_API_KEY.
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+# Embeddings: "openai" (OpenAI, or any compatible server at EMBEDDING_BASE_URL) or
+# "local" (deterministic hashed-word vectors computed in-process, for offline runs and
+# tests; not for production answers). Empty model/dimensions use the backend default.
+# Indexes remember the backend they were built with and are rebuilt when it changes.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")
+EMBEDDING_BASE_URL = os.getenv("EMBEDDING_BASE_URL", "")
+EMBEDDING_API_KEY = os.getenv("EMBEDDING_API_KEY", "")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))
+
+# Shared HTTP connection pool for the async OpenAI client
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "200"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "50"))
+
+# Admission control for /chat and /chat-sync. Each client (its IP, or the first
+# X-Forwarded-For address when TRUST_FORWARDED_FOR is set behind a proxy) may start
+# RATE_LIMIT_PER_MINUTE questions on average, RATE_LIMIT_BURST at once; beyond that 429.
+# At most MAX_CONCURRENT_GENERATIONS completions run at a time, ADMISSION_QUEUE_SIZE more
+# wait up to ADMISSION_QUEUE_TIMEOUT seconds; the rest get 503. Retry-After is set on both.
+# 0 disables a limit.
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "64"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+
+# Seconds between background warm-up attempts while the app is not ready (e.g. no index yet)
+WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", "10"))
+
+# Share of requests whose per-stage timings are kept as a trace (GET /admin/traces), and how many to keep
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_KEEP = int(os.getenv("TRACE_KEEP", "100"))
+
+# Streamed answers are sent in pieces of at least STREAM_FLUSH_CHARS characters, or
+# whatever has arrived once STREAM_FLUSH_INTERVAL seconds passed since the last piece
+STREAM_FLUSH_CHARS = int(os.getenv("STREAM_FLUSH_CHARS", "32"))
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", "0.05"))
+
+# Chunks retrieved per query. The original as_retriever(k=3) never passed k on,
+# so FAISS's default of 4 is what has always been used.
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "4"))
+
+# Hybrid retrieval: FAISS and BM25 candidates (HYBRID_CANDIDATES from each) merged by
+# reciprocal-rank fusion; BM25 hits under HYBRID_LEXICAL_MIN_RATIO of the best BM25 score
+# (matches on common words only) are left out of the fusion. RERANKER_MODEL names a sentence-transformers cross-encoder
+# (e.g. cross-encoder/ms-marco-MiniLM-L-6-v2) that picks the final RETRIEVAL_K on the CPU.
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+HYBRID_LEXICAL_MIN_RATIO = float(os.getenv("HYBRID_LEXICAL_MIN_RATIO", "0.5"))
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "")
+
+# Token budget for the retrieved context in each prompt (counted with the local tokenizer);
+# passages that do not fit are left out, least relevant first
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# Hot index reload: poll the index directory every N seconds (0 = only on POST /admin/reload),
+# and wait up to INDEX_DRAIN_TIMEOUT for the previous index to drain before loading another
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "30"))
+INDEX_DRAIN_TIMEOUT = float(os.getenv("INDEX_DRAIN_TIMEOUT", "30"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # Required in X-Admin-Token for /admin/* when set
+
+# Retrieval runs FAISS + the query embedding off the event loop on this many threads
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+
+# Semantic answer cache in front of retrieval + generation. The threshold is a
+# cosine similarity and depends on the embedding model: ada-002 puts unrelated
+# short questions above 0.9, so "phone number?" vs "email address?" must stay
+# below it. Re-check with benchmarks/calibrate_cache_threshold.py when the
+# embedding model changes.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+# Query embedding layer: exact-match LRU (optionally persisted) + micro-batching
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "10000"))
+QUERY_EMBED_CACHE_PATH = os.getenv("QUERY_EMBED_CACHE_PATH", "")  # e.g. backend/data/query_embeddings.sqlite
+QUERY_EMBED_BATCH_WINDOW_MS = float(os.getenv("QUERY_EMBED_BATCH_WINDOW_MS", "5"))
+QUERY_EMBED_MAX_BATCH = int(os.getenv("QUERY_EMBED_MAX_BATCH", "64"))
+QUERY_EMBED_BATCH_WORKERS = int(os.getenv("QUERY_EMBED_BATCH_WORKERS", "4"))
+QUERY_EMBED_TIMEOUT = float(os.getenv("QUERY_EMBED_TIMEOUT", "30"))
+
+# Scraper HTML parser backend: html.parser (default, identical output to the
+# original scraper) or lxml (opt-in, faster, differs on malformed markup)
+SCRAPER_HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "")
+
+# How run_scraper.py stores scraped pages: appended record by record as JSON Lines
+# (jsonl, optionally gzipped: jsonl.gz) or SQLite (sqlite), or the original single
+# scraped_data.json document (json). run_embedd.py reads whichever file is newest.
+SCRAPED_DATA_FORMAT = os.getenv("SCRAPED_DATA_FORMAT", "jsonl")
+
+# Indexing pipeline: process-pool splitting, batched embedding with bounded concurrency
+SPLIT_WORKERS = int(os.getenv("SPLIT_WORKERS", str(os.cpu_count() or 1)))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+EMBED_RETRY_BASE_DELAY = float(os.getenv("EMBED_RETRY_BASE_DELAY", "1.0"))
+
+# Serving index: flat (exact) or an approximate / compressed variant rebuilt from it
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")  # flat | hnsw | ivf | ivfpq | pq
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", "32"))
+INDEX_PQ_M = int(os.getenv("INDEX_PQ_M", "64"))
+INDEX_NLIST = int(os.getenv("INDEX_NLIST", "0"))  # 0 = 4 * sqrt(number of vectors)
+INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", "16"))
+INDEX_EF_SEARCH = int(os.getenv("INDEX_EF_SEARCH", "64"))
+# Memory-map the index read-only so uvicorn workers share one page-cached copy
+INDEX_MMAP = os.getenv("INDEX_MMAP", "false").lower() == "true"
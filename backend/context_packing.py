@@ -0,0 +1,107 @@
+# backend/context_packing.py
+#
+# Turns the retrieved chunks into the context block of the prompt. Chunks of
+# the same page that overlap (the splitter repeats up to 200 chars between
+# neighbours) are merged back into one passage, passages are ordered by the
+# best rank among their chunks, and they are added until the token budget is
+# spent.
+
+import threading
+
+from tokenizer import count_tokens
+
+SEPARATOR = "\n\n"
+# Shortest suffix/prefix match treated as splitter overlap rather than coincidence
+MIN_OVERLAP = 20
+
+def _merge(a, b):
+    """a and b joined over their shared text, or None if neither overlaps nor contains the other."""
+    if b in a:
+        return a
+    if a in b:
+        return b
+    for first, second in ((a, b), (b, a)):
+        head = second[:MIN_OVERLAP]
+        start = first.find(head, max(0, len(first) - len(second)))
+        while start != -1:
+            if second.startswith(first[start:]):
+                return first[:start] + second
+            start = first.find(head, start + 1)
+    return None
+
+def _passages(docs):
+    """[(best rank, url, text)] with overlapping chunks of each page merged."""
+    passages = []
+    for rank, doc in enumerate(docs):
+        url = doc.metadata.get("url")
+        text = doc.page_content.strip()
+        merged = True
+        while merged:
+            merged = False
+            for i, (other_rank, other_url, other_text) in enumerate(passages):
+                if other_url != url:
+                    continue
+                joined = _merge(other_text, text)
+                if joined is not None:
+                    # The merged passage may now overlap another one of the page: go round again
+                    del passages[i]
+                    rank, text, merged = min(rank, other_rank), joined, True
+                    break
+        passages.append((rank, url, text))
+    passages.sort(key=lambda passage: passage[0])
+    return passages
+
+def _truncate(text, budget):
+    """The longest prefix of text (cut at a word) that fits in budget tokens."""
+    tokens = count_tokens(text)
+    while tokens > budget and text:
+        text = text[:max(0, int(len(text) * budget / tokens) - 1)]
+        text = text[:text.rfind(" ")] if " " in text else text
+        tokens = count_tokens(text)
+    return text
+
+def pack_context(docs, budget):
+    """Context string for the prompt and its stats (tokens before and after packing).
+
+    Passages that would overflow `budget` tokens are left out; if even the
+    most relevant one does not fit, it is cut to the budget.
+    """
+    raw_tokens = count_tokens(SEPARATOR.join(doc.page_content for doc in docs))
+    parts, used = [], 0
+    for _, _, text in _passages(docs):
+        tokens = count_tokens(text) + (count_tokens(SEPARATOR) if parts else 0)
+        if used + tokens > budget:
+            if not parts and budget > 0:
+                parts.append(_truncate(text, budget))
+                used = budget
+            continue
+        parts.append(text)
+        used += tokens
+    context = SEPARATOR.join(parts)
+    return context, {"chunks": len(docs), "passages": len(parts), "raw_tokens": raw_tokens,
+                     "packed_tokens": count_tokens(context)}
+
+class PackingStats:
+    """Running totals of context tokens before and after packing."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.raw_tokens = 0
+        self.packed_tokens = 0
+
+    def record(self, stats):
+        with self._lock:
+            self.requests += 1
+            self.raw_tokens += stats["raw_tokens"]
+            self.packed_tokens += stats["packed_tokens"]
+
+    def stats(self):
+        with self._lock:
+            saved = self.raw_tokens - self.packed_tokens
+            return {
+                "requests": self.requests,
+                "raw_context_tokens": self.raw_tokens,
+                "packed_context_tokens": self.packed_tokens,
+                "saved_tokens_per_request": round(saved / self.requests, 1) if self.requests else 0.0,
+            }
@@ -0,0 +1,253 @@
+# backend/index_registry.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+from rag_pipeline import load_lexical_index, load_vector_store, index_version
+
+class IndexHandle:
+    """One loaded version of the index, with the number of requests currently using it."""
+
+    def __init__(self, vector_store, version, lexical_index=None):
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self.version = version
+        self.loaded_at = time.time()
+        self.in_flight = 0
+
+class IndexRegistry:
+    """The index requests search, swappable while requests are in flight.
+
+    A request takes the current handle with acquire() and keeps it until it
+    is done, so a reload never changes the index under a running search. When
+    a new version is loaded (in the caller's thread, typically a background
+    one), the swap is a single reference assignment; the old handle is
+    retired and released as soon as its last request finishes.
+
+    At most one retired index is kept alive: a reload waits for the previous
+    one to drain before loading another, so memory never holds more than the
+    active index plus one.
+    """
+
+    def __init__(self, index_dir, drain_timeout=30.0, loader=load_vector_store, version_fn=index_version,
+                 lexical_loader=load_lexical_index):
+        self.index_dir = index_dir
+        self.drain_timeout = drain_timeout
+        self._loader = loader
+        self._lexical_loader = lexical_loader
+        self._version_fn = version_fn
+        self._current = None
+        self._retired = []
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_error = None
+        self.last_reload_seconds = 0.0
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current is not None else None
+
+    def is_loaded(self):
+        return self._current is not None
+
+    def in_flight(self):
+        """Requests using any version of this index right now."""
+        with self._lock:
+            current = self._current.in_flight if self._current else 0
+            return current + sum(handle.in_flight for handle in self._retired)
+
+    def install(self, vector_store, version, lexical_index=None):
+        """Make `vector_store` the active index; the previous one is retired."""
+        handle = IndexHandle(vector_store, version, lexical_index)
+        with self._lock:
+            previous, self._current = self._current, handle
+            if previous is not None:
+                if previous.in_flight:
+                    self._retired.append(previous)
+                else:
+                    previous.vector_store = previous.lexical_index = None
+        return handle
+
+    @contextmanager
+    def acquire(self):
+        """Yield the active handle and keep its index alive until the block exits."""
+        with self._lock:
+            handle = self._current
+            if handle is None:
+                raise RuntimeError(f"No index loaded from {self.index_dir}")
+            handle.in_flight += 1
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                handle.in_flight -= 1
+                if handle.in_flight == 0 and handle in self._retired:
+                    self._retired.remove(handle)
+                    handle.vector_store = handle.lexical_index = None  # Last reference: the old index is freed here
+                    self._drained.notify_all()
+
+    def load(self):
+        """Load the index on disk if none is active yet."""
+        if self._current is None:
+            self.reload()
+        return self._current
+
+    def reload(self, force=False):
+        """Load the index on disk and swap it in if its version differs from the active one.
+
+        Returns True when a new version was installed. Blocking; call it off the event loop.
+        """
+        with self._reload_lock:
+            version = self._version_fn(self.index_dir)
+            if not force and self._current is not None and version == self._current.version:
+                return False
+
+            with self._lock:
+                if not self._drained.wait_for(lambda: not self._retired, timeout=self.drain_timeout):
+                    self.reload_failures += 1
+                    self.last_error = "previous index still has requests in flight"
+                    return False
+
+            started = time.perf_counter()
+            try:
+                # Read every file from one resolved version directory, even if the symlink moves meanwhile
+                path = os.path.realpath(self.index_dir)
+                version = self._version_fn(path)
+                vector_store = self._loader(path)
+                lexical_index = self._lexical_loader(path) if self._lexical_loader else None
+                # Search the new index once so its first real query pays no page-in cost
+                vector_store.index.search(np.zeros((1, vector_store.index.d), dtype=np.float32), 1)
+            except Exception as e:
+                self.reload_failures += 1
+                self.last_error = str(e)
+                raise
+            self.install(vector_store, version, lexical_index)
+            self.last_reload_seconds = time.perf_counter() - started
+            self.last_error = None
+            self.reloads += 1
+            print(f"Loaded index version {version} from {self.index_dir} in {self.last_reload_seconds:.2f}s")
+            return True
+
+    def stats(self):
+        with self._lock:
+            current = self._current
+            return {
+                "index_dir": os.path.realpath(self.index_dir),
+                "version": current.version if current else None,
+                "vectors": current.vector_store.index.ntotal if current else 0,
+                "lexical_index": bool(current and current.lexical_index is not None),
+                "loaded_at": current.loaded_at if current else None,
+                "in_flight": current.in_flight if current else 0,
+                "retired_in_flight": sum(handle.in_flight for handle in self._retired),
+                "reloads": self.reloads,
+                "reload_failures": self.reload_failures,
+                "last_reload_seconds": self.last_reload_seconds,
+                "last_error": self.last_error,
+            }
+
+def index_bytes(index_dir):
+    """Size on disk of the index version `index_dir` points at; roughly what it takes in memory."""
+    path = os.path.realpath(index_dir)
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file()) if os.path.isdir(path) else 0
+
+class TenantIndexes:
+    """One IndexRegistry per tenant, loaded on first use.
+
+    Once the loaded indexes add up to more than `memory_budget` bytes (0 = no
+    limit) the least recently used ones are dropped, except the one just
+    loaded and any with requests in flight. A dropped index is freed when its
+    last user lets go and is loaded again the next time it is asked for.
+    Blocking; call get() off the event loop.
+    """
+
+    def __init__(self, index_dir_fn, memory_budget=0, drain_timeout=30.0, registry_factory=None,
+                 size_fn=index_bytes):
+        self._index_dir_fn = index_dir_fn
+        self.memory_budget = memory_budget
+        self._factory = registry_factory or (lambda index_dir: IndexRegistry(index_dir, drain_timeout=drain_timeout))
+        self._size_fn = size_fn
+        self._registries = OrderedDict()  # tenant -> [registry, bytes], least recently used first
+        self._loading = {}  # tenant -> lock held while its index loads, so concurrent requests load it once
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, tenant):
+        """The tenant's registry with its index loaded."""
+        with self._lock:
+            entry = self._registries.get(tenant)
+            if entry is not None:
+                self._registries.move_to_end(tenant)
+                return entry[0]
+            load_lock = self._loading.setdefault(tenant, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._registries.get(tenant)
+                if entry is not None:
+                    return entry[0]
+            try:
+                index_dir = self._index_dir_fn(tenant)
+                registry = self._factory(index_dir)
+                registry.load()
+                size = self._size_fn(index_dir)
+            finally:
+                with self._lock:
+                    self._loading.pop(tenant, None)
+            with self._lock:
+                self._registries[tenant] = [registry, size]
+                self.loads += 1
+                self._evict(keep=tenant)
+        return registry
+
+    def version(self, tenant):
+        entry = self._registries.get(tenant)
+        return entry[0].version if entry is not None else None
+
+    def _evict(self, keep):
+        if self.memory_budget <= 0:
+            return
+        total = sum(size for _, size in self._registries.values())
+        for tenant, (registry, size) in list(self._registries.items()):
+            if total <= self.memory_budget:
+                break
+            if tenant == keep or registry.in_flight():
+                continue
+            del self._registries[tenant]
+            total -= size
+            self.evictions += 1
+            print(f"Unloaded index of tenant {tenant} ({size / 2**20:.1f} MB) to stay within the memory budget")
+
+    def reload_all(self):
+        """Reload every loaded index whose version on disk changed."""
+        with self._lock:
+            entries = list(self._registries.items())
+        for tenant, entry in entries:
+            try:
+                if entry[0].reload():
+                    entry[1] = self._size_fn(entry[0].index_dir)
+            except Exception as e:
+                print(f"Index reload for tenant {tenant} failed ({e}); keeping version {entry[0].version}")
+        with self._lock:
+            self._evict(keep=None)
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._registries.items())
+            return {
+                "loaded": len(entries),
+                "bytes": sum(size for _, (_, size) in entries),
+                "memory_budget": self.memory_budget,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "tenants": {tenant: {"version": registry.version, "bytes": size}
+                            for tenant, (registry, size) in entries},
+            }
@@ -0,0 +1,77 @@
+# backend/index_variants.py
+#
+# Compressed / approximate serving variants of the flat FAISS index. The flat
+# index written by create_vector_store stays the source of truth (incremental
+# updates need exact deletes); a serving variant is rebuilt from its vectors
+# in the same order, so FAISS positions and docstore ids line up.
+
+import math
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq", "pq")
+
+def _pq_subquantizers(dimensions, wanted):
+    # PQ needs the dimension to split evenly into sub-vectors
+    return max(m for m in range(1, min(wanted, dimensions) + 1) if dimensions % m == 0)
+
+def ivf_lists(ntotal, nlist=0):
+    """Number of IVF lists: the configured value, else 4 * sqrt(number of vectors)."""
+    return nlist or max(1, min(65536, int(4 * math.sqrt(max(ntotal, 1)))))
+
+def factory_string(index_type, ntotal, dimensions, hnsw_m=32, pq_m=64, nlist=0):
+    """faiss.index_factory description for an INDEX_TYPE and corpus size."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}")
+    nlist = ivf_lists(ntotal, nlist)
+    m = _pq_subquantizers(dimensions, pq_m)
+    return {
+        "flat": "Flat",
+        "hnsw": f"HNSW{hnsw_m}",
+        "ivf": f"IVF{nlist},Flat",
+        "ivfpq": f"IVF{nlist},PQ{m}",
+        "pq": f"PQ{m}",
+    }[index_type]
+
+def min_training_points(index_type, ntotal, nlist=0):
+    """Vectors needed to train the variant well (faiss wants ~39 per centroid); below this we keep serving the flat index."""
+    nlist = ivf_lists(ntotal, nlist)
+    return {
+        "flat": 0,
+        "hnsw": 0,
+        "ivf": 39 * nlist,
+        "ivfpq": 39 * max(nlist, 256),
+        "pq": 39 * 256,
+    }[index_type]
+
+def build_serving_index(flat_index, factory, train_sample=100_000, add_batch=65_536, seed=0):
+    """Build `factory` from the vectors of `flat_index`, keeping their order."""
+    ntotal, dimensions = flat_index.ntotal, flat_index.d
+    index = faiss.index_factory(dimensions, factory, flat_index.metric_type)
+
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample_ids = np.sort(rng.choice(ntotal, size=min(train_sample, ntotal), replace=False))
+        index.train(np.vstack([flat_index.reconstruct(int(i)) for i in sample_ids]))
+
+    for start in range(0, ntotal, add_batch):
+        count = min(add_batch, ntotal - start)
+        index.add(flat_index.reconstruct_n(start, count))
+    return index
+
+def tune(index, nprobe=16, ef_search=64):
+    """Apply search-time knobs (IVF nprobe, HNSW efSearch) where they exist."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+    return index
+
+def read_index(path, mmap=False):
+    """Load an index; with mmap the vectors stay in the page cache shared by every worker process."""
+    if not mmap:
+        return faiss.read_index(path)
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    return faiss.read_index(path, flag | faiss.IO_FLAG_READ_ONLY)
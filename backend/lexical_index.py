@@ -0,0 +1,85 @@
+# backend/lexical_index.py
+#
+# In-process BM25 index over the same chunks as the FAISS index, for the
+# exact-token queries embeddings are bad at: phone numbers, emails, WhatsApp
+# links and product names (the contact links clean_text_with_links injects).
+
+import math
+import pickle
+import re
+from collections import Counter
+
+import numpy as np
+
+LEXICAL_INDEX_FILE = "lexical.pkl"
+
+_WORD = re.compile(r"[a-z0-9]+")
+_EMAIL = re.compile(r"[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}")
+# Digit groups split by spaces, dashes, dots or brackets: "+92 310 848-1550" is also "923108481550"
+_NUMBER = re.compile(r"\+?\d[\d\s().-]{4,}\d")
+
+def tokenize(text):
+    """Lowercased word tokens, plus whole emails and phone numbers with their separators removed."""
+    text = text.lower()
+    tokens = _WORD.findall(text)
+    tokens.extend(_EMAIL.findall(text))
+    for number in _NUMBER.findall(text):
+        digits = re.sub(r"\D", "", number)
+        if digits not in tokens:
+            tokens.append(digits)
+    return tokens
+
+class LexicalIndex:
+    """BM25 over a fixed list of documents; search returns (position, score) pairs.
+
+    Positions are the documents' positions in the FAISS index, so results map
+    to docstore ids through the store's index_to_docstore_id, like a vector hit.
+    Per-posting BM25 weights are precomputed at build time, so a search is a
+    scatter-add over the postings of the query's terms.
+    """
+
+    def __init__(self, postings, size):
+        self.postings = postings  # term -> (positions int32 array, weights float32 array)
+        self.size = size
+
+    @classmethod
+    def build(cls, texts, k1=1.5, b=0.75):
+        term_docs = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[position] = sum(counts.values())
+            for term, count in counts.items():
+                term_docs.setdefault(term, []).append((position, count))
+
+        average_length = float(lengths.mean()) if len(texts) else 0.0
+        postings = {}
+        for term, docs in term_docs.items():
+            positions = np.fromiter((position for position, _ in docs), dtype=np.int32, count=len(docs))
+            counts = np.fromiter((count for _, count in docs), dtype=np.float32, count=len(docs))
+            idf = math.log(1 + (len(texts) - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * lengths[positions] / (average_length or 1.0))
+            postings[term] = (positions, (idf * counts * (k1 + 1) / (counts + norm)).astype(np.float32))
+        return cls(postings, len(texts))
+
+    def search(self, query, k):
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]  # Positions are unique within a posting list
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(position), float(scores[position])) for position in hits]
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump({"size": self.size, "postings": self.postings}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+        return cls(saved["postings"], saved["size"])
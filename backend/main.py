@@ -1,18 +1,78 @@
 
-from fastapi import FastAPI, Request
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
-import json
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 import asyncio
+import os
 
 from pydantic import BaseModel
-from query_engine import get_bot_response_stream
+from config import (
+    STATIC_DIR, WARMUP_RETRY_INTERVAL, INDEX_WATCH_INTERVAL, ADMIN_TOKEN,
+    RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS, TRUST_FORWARDED_FOR,
+    MAX_CONCURRENT_GENERATIONS, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT,
+)
+import query_engine
+from query_engine import aget_bot_response, aget_bot_response_frames
+from stream_formatter import sse_frame
+from tenants import DEFAULT_TENANT, tenant_exists
+from admission import REJECTION_REASONS, AdmissionController, ConcurrencyLimiter, RateLimiter, Rejected
+from metrics import Gauge
+import metrics
+
+query_engine.startup_timings["import_app"] = round(time.perf_counter() - _import_started, 4)
+
+# Set by the background warm-up; /readyz reports it
+readiness = {"ready": False, "error": None, "attempts": 0}
+
+async def _warm_up():
+    # Load the index and make one embedding round-trip off the event loop, retrying
+    # until it works (e.g. the index volume is mounted after the container starts)
+    started = time.perf_counter()
+    while True:
+        readiness["attempts"] += 1
+        try:
+            await asyncio.to_thread(query_engine.warm_up)
+        except Exception as e:
+            readiness["error"] = str(e)
+            print(f"Warm-up failed ({e}); retrying in {WARMUP_RETRY_INTERVAL:.0f}s")
+            await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+            continue
+        query_engine.startup_timings["warm_up_total"] = round(time.perf_counter() - started, 4)
+        readiness.update(ready=True, error=None)
+        return
+
+async def _watch_index():
+    # Pick up a new index from run_embedd.py: loaded off the loop, then swapped in atomically
+    while True:
+        await asyncio.sleep(INDEX_WATCH_INTERVAL)
+        if not readiness["ready"]:
+            continue
+        try:
+            await asyncio.to_thread(query_engine.index_registry.reload)
+        except Exception as e:
+            print(f"Index reload failed ({e}); keeping version {query_engine.index_registry.version}")
+        await asyncio.to_thread(query_engine.tenant_indexes.reload_all)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Start serving (and answering /healthz) straight away; /readyz flips once warm
+    tasks = [asyncio.create_task(_warm_up())]
+    if INDEX_WATCH_INTERVAL > 0:
+        tasks.append(asyncio.create_task(_watch_index()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await query_engine.shutdown()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files directory
-app.mount("/backend/static", StaticFiles(directory="static"), name="static")
+app.mount("/backend/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # Enable CORS
 app.add_middleware(
@@ -25,36 +85,83 @@ app.add_middleware(
 
 class QueryRequest(BaseModel):
     query: str
+    tenant: str = DEFAULT_TENANT
+
+def _check_tenant(tenant):
+    try:
+        exists = tenant_exists(tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    if not exists:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant {tenant!r}")
 
 class QueryResponse(BaseModel):
     response: str
 
 @app.get("/widget")
-async def get_widget():
-    return FileResponse("static/widget.html")
+async def get_widget(tenant: str = DEFAULT_TENANT):
+    # The page reads ?tenant= itself and sends it with every question
+    _check_tenant(tenant)
+    return FileResponse(os.path.join(STATIC_DIR, "widget.html"))
+
+START_FRAME = sse_frame({"type": "start"})
+END_FRAME = sse_frame({"type": "end"})
+
+admission = AdmissionController(
+    RateLimiter(RATE_LIMIT_PER_MINUTE / 60, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS),
+    ConcurrencyLimiter(MAX_CONCURRENT_GENERATIONS, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT),
+)
+
+def _client_id(http_request):
+    if TRUST_FORWARDED_FOR:
+        forwarded = http_request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return http_request.client.host if http_request.client else "unknown"
+
+async def _admit(request, http_request):
+    # Refused before any response is started, so clients see a status code and Retry-After
+    _check_tenant(request.tenant)
+    try:
+        admitted = await admission.admit(_client_id(http_request),
+                                         query_engine.generation_in_flight(request.query, request.tenant))
+    except Rejected as e:
+        metrics.rejected.inc(e.reason)
+        status_code = 429 if e.reason == "rate_limited" else 503
+        detail = "Too many requests" if status_code == 429 else "Server busy"
+        raise HTTPException(status_code=status_code, detail=detail,
+                            headers={"Retry-After": str(e.retry_after)}) from None
+    metrics.stage_seconds.observe(admitted.waited, "admission_wait")
+    return admitted
 
 @app.post("/chat")
-async def chat(request: QueryRequest):
+async def chat(request: QueryRequest, http_request: Request):
+    admitted = await _admit(request, http_request)
+
     async def stream_response():
+        metrics.active_streams.inc("chat")
+        writing = 0.0
         try:
-            # Add CORS headers for SSE
-            yield "data: " + json.dumps({"type": "start"}) + "\n\n"
-            
-            for token in get_bot_response_stream(request.query):
-                # Send each token as JSON to handle special characters properly
-                data = json.dumps({"type": "token", "content": token})
-                yield f"data: {data}\n\n"
-                
-                # Small delay to prevent overwhelming the client
-                await asyncio.sleep(0.01)
-            
-            # Send end signal
-            yield "data: " + json.dumps({"type": "end"}) + "\n\n"
-            
+            yield START_FRAME
+
+            # The completion is read by its own task (shared with identical questions);
+            # a slow client only falls behind on its own copy of the pieces. Token
+            # frames arrive already serialized, once for all subscribers
+            async for frame in aget_bot_response_frames(request.query, request.tenant):
+                started = time.perf_counter()
+                yield frame  # Resumes once the frame has been handed to the connection
+                writing += time.perf_counter() - started
+
+            yield END_FRAME
+
         except Exception as e:
             # Send error message
-            error_data = json.dumps({"type": "error", "message": str(e)})
-            yield f"data: {error_data}\n\n"
+            metrics.errors.inc("sse")
+            yield sse_frame({"type": "error", "message": str(e)})
+        finally:
+            admitted.release()
+            metrics.active_streams.dec("chat")
+            metrics.stage_seconds.observe(writing, "sse_write")
     
     return StreamingResponse(
         stream_response(), 
@@ -67,13 +174,121 @@ async def chat(request: QueryRequest):
         }
     )
 
-# Keep the non-streaming endpoint as fallback
+# Non-streaming endpoint: the same generation as /chat (shared with identical
+# in-flight questions), collected into one response
 @app.post("/chat-sync", response_model=QueryResponse)
-async def chat_sync(request: QueryRequest):
-    from query_engine import get_bot_response
-    response = get_bot_response(request.query)
+async def chat_sync(request: QueryRequest, http_request: Request):
+    admitted = await _admit(request, http_request)
+    metrics.active_streams.inc("chat_sync")
+    try:
+        response = await aget_bot_response(request.query, request.tenant)
+    finally:
+        admitted.release()
+        metrics.active_streams.dec("chat_sync")
     return QueryResponse(response=response)
 
+@app.get("/cache/stats")
+async def cache_stats():
+    from query_engine import answer_cache
+    from rag_pipeline import get_query_embedder
+    answers = {"enabled": False} if answer_cache is None else {"enabled": True, **answer_cache.stats()}
+    return {"answers": answers, "query_embeddings": get_query_embedder().stats(),
+            "coalesced_generations": query_engine.coalescer.stats()}
+
+@app.get("/context/stats")
+async def context_stats():
+    # Prompt context tokens before and after packing, summed over all answered requests
+    from query_engine import packing_stats
+    return packing_stats.stats()
+
+@app.get("/admission/stats")
+async def admission_stats():
+    # Generations running and queued, the configured limits, and refusals so far by reason
+    return {**admission.stats(), "rejected": {reason: metrics.rejected.value(reason) for reason in REJECTION_REASONS}}
+
+def _numeric(stats, *labels):
+    # {labels + (stat,): value} for the numeric entries of a stats() dict
+    return {labels + (key,): int(value) if isinstance(value, bool) else value
+            for key, value in stats.items() if isinstance(value, (int, float))}
+
+def _cache_stats():
+    from rag_pipeline import get_query_embedder
+    values = _numeric(get_query_embedder().stats(), "query_embeddings")
+    if query_engine.answer_cache is not None:
+        values.update(_numeric(query_engine.answer_cache.stats(), "answers"))
+    return values
+
+# The JSON stats endpoints, also exported on /metrics (read when scraped)
+metrics.registry.register(Gauge(
+    "rag_cache", "Answer and query-embedding cache statistics", labels=("cache", "stat"), fn=_cache_stats))
+metrics.registry.register(Gauge(
+    "rag_coalescing", "Generations started and joined by identical in-flight questions", labels=("stat",),
+    fn=lambda: _numeric(query_engine.coalescer.stats())))
+metrics.registry.register(Gauge(
+    "rag_context_packing", "Prompt context tokens before and after packing", labels=("stat",),
+    fn=lambda: _numeric(query_engine.packing_stats.stats())))
+metrics.registry.register(Gauge(
+    "rag_index", "Active index and reload statistics", labels=("stat",),
+    fn=lambda: _numeric(query_engine.index_registry.stats())))
+metrics.registry.register(Gauge(
+    "rag_admission", "Generations running and queued, and the admission limits", labels=("stat",),
+    fn=lambda: _numeric(admission.stats())))
+metrics.registry.register(Gauge(
+    "rag_tenant_indexes", "Tenant indexes loaded, their size in bytes and the memory budget", labels=("stat",),
+    fn=lambda: _numeric(query_engine.tenant_indexes.stats())))
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/healthz")
+async def healthz():
+    # Liveness only: the process is up and the event loop is responsive
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    # Readiness: the index is loaded and the embeddings API answered
+    body = {"status": "ready" if readiness["ready"] else "starting", **readiness,
+            "timings": query_engine.startup_timings}
+    return JSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
+def _check_admin(token):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/reload")
+async def admin_reload(force: bool = False, tenant: str = DEFAULT_TENANT, x_admin_token: str = Header(default="")):
+    # Load the index on disk now instead of waiting for the watcher; requests keep being served meanwhile
+    _check_admin(x_admin_token)
+    _check_tenant(tenant)
+    registry = query_engine.index_registry
+    try:
+        if tenant != DEFAULT_TENANT:
+            registry = await asyncio.to_thread(query_engine.tenant_indexes.get, tenant)
+        swapped = await asyncio.to_thread(registry.reload, force)
+    except Exception as e:
+        return JSONResponse({"reloaded": False, "error": str(e), **registry.stats()}, status_code=500)
+    return {"reloaded": swapped, **registry.stats()}
+
+@app.get("/admin/traces")
+async def admin_traces(x_admin_token: str = Header(default="")):
+    # Stage timings of the last sampled requests (TRACE_SAMPLE_RATE)
+    _check_admin(x_admin_token)
+    return {"sample_rate": query_engine.tracer.sample_rate, "traces": query_engine.tracer.recent()}
+
+@app.get("/admin/index")
+async def admin_index(x_admin_token: str = Header(default="")):
+    _check_admin(x_admin_token)
+    return query_engine.index_registry.stats()
+
+@app.get("/admin/tenants")
+async def admin_tenants(x_admin_token: str = Header(default="")):
+    # Which tenant indexes are in memory, their sizes, and loads / evictions under TENANT_INDEX_MEMORY_MB
+    _check_admin(x_admin_token)
+    return query_engine.tenant_indexes.stats()
+
 @app.get("/")
 async def root():
     return {"message": "AssortTech Chatbot backend is running."}
\ No newline at end of file
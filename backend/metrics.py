@@ -0,0 +1,186 @@
+# backend/metrics.py
+#
+# Minimal Prometheus-style metrics (counters, gauges, histograms) rendered in
+# the text exposition format for GET /metrics, plus sampled per-request
+# traces. An observation is a lock and a few additions, so the request path
+# can afford one per stage.
+
+import bisect
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Seconds; covers FAISS searches (sub-ms) up to full generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class _Value(_Metric):
+    """A number per label set, changed by the code or read from `fn` (returning {labels: value}) at scrape time."""
+
+    def __init__(self, name, help, labels=(), fn=None):
+        super().__init__(name, help, labels)
+        self._fn = fn
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        if self._fn is not None:
+            items = sorted(self._fn().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, key)} {value}" for key, value in items]
+
+class Counter(_Value):
+    kind = "counter"
+
+class Gauge(_Value):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels):
+        series = self._values.get(labels)
+        return series[2] if series else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, ([*series[0]], series[1], series[2])) for key, series in self._values.items())
+        lines = self.header()
+        names = self.label_names + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_labels(names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class Trace:
+    """Per-request stage timings; every stage feeds the stage histogram, sampled traces also keep spans.
+
+    An exception leaving stage() is counted against that stage in the errors counter.
+    """
+
+    def __init__(self, histogram, errors, sampled, traces):
+        self._histogram = histogram
+        self._errors = errors
+        self._traces = traces
+        self.started = time.perf_counter()
+        self.spans = [] if sampled else None
+        self.attributes = {}
+
+    def record(self, stage, seconds):
+        self._histogram.observe(seconds, stage)
+        if self.spans is not None:
+            self.spans.append((stage, round(time.perf_counter() - self.started - seconds, 6), round(seconds, 6)))
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self._errors.inc(name)
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def finish(self, **attributes):
+        if self.spans is not None:
+            self.attributes.update(attributes)
+            self._traces.append({
+                "started_at": time.time() - (time.perf_counter() - self.started),
+                "total_seconds": round(time.perf_counter() - self.started, 6),
+                "spans": [{"stage": stage, "start": start, "seconds": seconds} for stage, start, seconds in self.spans],
+                **self.attributes,
+            })
+
+class Tracer:
+    """Starts traces, keeping the last `keep` of the sampled ones (a `sample_rate` share of requests)."""
+
+    def __init__(self, histogram, errors, sample_rate=0.0, keep=100):
+        self.histogram = histogram
+        self.errors = errors
+        self.sample_rate = sample_rate
+        self.traces = deque(maxlen=keep)
+
+    def start(self):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        return Trace(self.histogram, self.errors, sampled, self.traces)
+
+    def recent(self):
+        return list(self.traces)
+
+# The request path's metrics, rendered by GET /metrics
+registry = Registry()
+stage_seconds = registry.register(Histogram(
+    "rag_stage_seconds", "Time spent in each stage of answering a question", labels=("stage",)))
+tokens_streamed = registry.register(Counter(
+    "rag_tokens_streamed_total", "Completion tokens received from the LLM"))
+answers = registry.register(Counter(
+    "rag_answers_total", "Answers generated, by source (llm or cache) and outcome", labels=("source", "outcome")))
+errors = registry.register(Counter(
+    "rag_errors_total", "Failures on the request path, by the stage they happened in", labels=("stage",)))
+active_streams = registry.register(Gauge(
+    "rag_active_streams", "Chat responses currently being sent", labels=("endpoint",)))
+rejected = registry.register(Counter(
+    "rag_rejected_total", "Chat requests refused by admission control, by reason", labels=("reason",)))
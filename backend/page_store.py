@@ -0,0 +1,99 @@
+# backend/page_store.py
+
+import hashlib
+import json
+import sqlite3
+import time
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class PageStore:
+    """Per-URL record of the last crawl: HTTP validators, hashes, cleaned text and outbound links.
+
+    Lets a re-crawl send conditional requests and tell which pages actually
+    changed since the previous run. Every added, changed or removed URL is
+    also queued in `pending_changes`, in the same transaction as the page
+    row, so a crawl that dies before writing changes.json loses nothing: the
+    next run still reports it.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body_hash TEXT, "
+            "content_hash TEXT, content TEXT, links TEXT, fetched_at REAL)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS pending_changes (url TEXT PRIMARY KEY, kind TEXT)")
+        self.db.commit()
+
+    def get(self, url):
+        row = self.db.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        page = dict(row)
+        page["links"] = json.loads(page["links"] or "[]")
+        return page
+
+    def conditional_headers(self, url):
+        row = self.db.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row is not None:
+            if row["etag"]:
+                headers["If-None-Match"] = row["etag"]
+            if row["last_modified"]:
+                headers["If-Modified-Since"] = row["last_modified"]
+        return headers
+
+    def touch(self, url, etag=None, last_modified=None):
+        """Refresh validators for a page whose content did not change."""
+        self.db.execute(
+            "UPDATE pages SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+            "fetched_at = ? WHERE url = ?",
+            (etag, last_modified, time.time(), url),
+        )
+        self.db.commit()
+
+    def record(self, url, content, links, body_hash, etag=None, last_modified=None):
+        """Store a freshly parsed page and return "added", "changed" or "unchanged"."""
+        new_hash = content_hash(content)
+        row = self.db.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            status = "added"
+        elif row["content_hash"] == new_hash:
+            status = "unchanged"
+        else:
+            status = "changed"
+        self.db.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, body_hash, new_hash, content, json.dumps(links), time.time()),
+        )
+        if status != "unchanged":
+            self.db.execute("INSERT OR REPLACE INTO pending_changes VALUES (?, ?)", (url, status))
+        self.db.commit()
+        return status
+
+    def urls(self):
+        return {row[0] for row in self.db.execute("SELECT url FROM pages")}
+
+    def delete(self, urls):
+        self.db.executemany("DELETE FROM pages WHERE url = ?", [(url,) for url in urls])
+        self.db.executemany("INSERT OR REPLACE INTO pending_changes VALUES (?, 'removed')", [(url,) for url in urls])
+        self.db.commit()
+
+    def pending_changes(self):
+        """URLs changed since the last clear_changes(), as {"added": [...], "changed": [...], "removed": [...]}."""
+        changes = {"added": [], "changed": [], "removed": []}
+        for url, kind in self.db.execute("SELECT url, kind FROM pending_changes ORDER BY url"):
+            changes[kind].append(url)
+        return changes
+
+    def clear_changes(self):
+        """Call once the pending changes have been handed on (written to changes.json)."""
+        self.db.execute("DELETE FROM pending_changes")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
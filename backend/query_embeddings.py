@@ -0,0 +1,163 @@
+# backend/query_embeddings.py
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+def normalize_query(query: str) -> str:
+    """Canonical form used as the cache key; the original text is what gets embedded."""
+    return " ".join(query.split()).casefold()
+
+class _MicroBatcher:
+    """Merges queries submitted within `window` seconds into one embeddings request."""
+
+    def __init__(self, embed_many, window=0.005, max_batch=64, workers=4):
+        self._embed_many = embed_many
+        self._window = window
+        self._max_batch = max_batch
+        self._queue = queue.Queue()
+        self._dispatch = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed-batch")
+        self.batches = 0
+        self.batched_queries = 0
+        threading.Thread(target=self._collect, name="embed-batcher", daemon=True).start()
+
+    def submit(self, key: str, text: str) -> Future:
+        future = Future()
+        self._queue.put((key, text, future))
+        return future
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._window
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch.submit(self._run, batch)
+
+    def _run(self, batch):
+        # Queries with the same key inside one window share a single input slot
+        texts = {}
+        for key, text, _ in batch:
+            texts.setdefault(key, text)
+        self.batches += 1
+        self.batched_queries += len(batch)
+        try:
+            vectors = dict(zip(texts, self._embed_many(list(texts.values()))))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for key, _, future in batch:
+            future.set_result(vectors[key])
+
+class QueryEmbedder(Embeddings):
+    """Query-side embedding layer wrapped around a document embedding model.
+
+    embed_query() serves repeated queries from an LRU cache keyed on the
+    normalized query, which can be persisted to SQLite (pruned to
+    `max_entries`) so it survives restarts; misses go through a micro-batcher
+    so concurrent queries share a request. embed_documents()
+    passes straight through, so this can be handed to FAISS as its embedding
+    function.
+    """
+
+    def __init__(self, embeddings, max_entries=10000, persist_path=None,
+                 batch_window_ms=5, max_batch=64, batch_workers=4, timeout=30.0, model=None):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._writes = 0
+        # Persisted vectors are keyed by model, so switching backends never serves stale ones
+        self._model = model or getattr(embeddings, "model", type(embeddings).__name__)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self._batcher = _MicroBatcher(
+            embeddings.embed_documents,
+            window=batch_window_ms / 1000,
+            max_batch=max_batch,
+            workers=batch_workers,
+        )
+        if persist_path:
+            self._open_store(persist_path)
+
+    def _open_store(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "model TEXT, query TEXT, vector BLOB, used_at REAL, PRIMARY KEY (model, query))"
+        )
+        rows = self._db.execute(
+            "SELECT query, vector FROM query_embeddings WHERE model = ? ORDER BY used_at DESC LIMIT ?",
+            (self._model, self.max_entries),
+        ).fetchall()
+        for query, blob in reversed(rows):
+            self._cache[query] = np.frombuffer(blob, dtype=np.float32).tolist()
+        self._prune_store()
+        self._db.commit()
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?)",
+                    (self._model, key, np.asarray(vector, dtype=np.float32).tobytes(), time.time()),
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._prune_store()
+                self._db.commit()
+
+    def _prune_store(self):
+        # Keep the persisted table to the same size as the in-memory LRU
+        self._db.execute(
+            "DELETE FROM query_embeddings WHERE model = ? AND query NOT IN ("
+            "SELECT query FROM query_embeddings WHERE model = ? ORDER BY used_at DESC LIMIT ?)",
+            (self._model, self._model, self.max_entries),
+        )
+
+    def embed_query(self, text: str) -> list[float]:
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+        vector = self._batcher.submit(key, text).result(timeout=self.timeout)
+        self._remember(key, vector)
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "batches": self._batcher.batches,
+                "batched_queries": self._batcher.batched_queries,
+            }
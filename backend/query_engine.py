@@ -1,38 +1,77 @@
 
 
-from langchain_openai import ChatOpenAI
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-from rag_pipeline import load_vector_store
-import openai
-import html
-
-# Load vector store and set up retriever
-vector_store = load_vector_store()
-if vector_store is None:
-    raise ValueError("Failed to load vector store. Please check rag_pipeline.py")
-retriever = vector_store.as_retriever(search_type="similarity", k=3)
-
-# Detailed prompt template
-detailed_prompt_template_str = """
-You are "MA Digital Bot", the official AI assistant for MA Digital. Your primary purpose is to assist users by accurately answering their questions about MA Digital's products, services, company information, pricing, technical specifications, solutions, case studies, career opportunities, contact information, and any other information found on the MA Digital website.
+from rag_pipeline import get_embedding_model, get_query_embedder
+from query_embeddings import normalize_query
+from index_registry import IndexRegistry, TenantIndexes
+from retrieval import hybrid_search, load_reranker
+from context_packing import PackingStats, pack_context
+from semantic_cache import SemanticCache
+from coalescing import StreamCoalescer
+from stream_formatter import StreamFormatter, token_frame
+from metrics import Tracer
+from backends import make_llm_client
+from tenants import DEFAULT_TENANT, list_tenants, tenant_config, tenant_dirs
+import metrics
+from config import (
+    FAISS_INDEX_DIR, INDEX_DRAIN_TIMEOUT, RETRIEVAL_K,
+    HYBRID_SEARCH, HYBRID_CANDIDATES, RRF_K, HYBRID_LEXICAL_MIN_RATIO, RERANKER_MODEL, CONTEXT_TOKEN_BUDGET,
+    STREAM_FLUSH_CHARS, STREAM_FLUSH_INTERVAL, TRACE_SAMPLE_RATE, TRACE_KEEP,
+    LLM_MODEL, RETRIEVAL_WORKERS, TENANT_INDEX_MEMORY_MB,
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL, SEMANTIC_CACHE_MAX_ENTRIES,
+)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import re
+import threading
+import time
+
+# The index and the LLM client are built by initialize() on first use (or by
+# the app's background warm-up), so importing this module is cheap and never
+# fails just because the index is missing
+async_client = None
+reranker = None
+_init_lock = threading.Lock()
+
+# The active index; run_embedd.py output is swapped in by reload() without a restart
+index_registry = IndexRegistry(FAISS_INDEX_DIR, drain_timeout=INDEX_DRAIN_TIMEOUT)
+
+# Every other tenant's index, loaded when first asked and unloaded again under memory pressure.
+# Tenants share everything else: the embedding model and its cache, the LLM client's
+# connection pool, the retrieval threads and the reranker
+tenant_indexes = TenantIndexes(lambda tenant: tenant_dirs(tenant)[1],
+                               memory_budget=int(TENANT_INDEX_MEMORY_MB * 2**20), drain_timeout=INDEX_DRAIN_TIMEOUT)
+
+# Seconds spent in each startup step, reported by /readyz
+startup_timings = {}
+
+@contextmanager
+def _timed(step):
+    started = time.perf_counter()
+    yield
+    startup_timings[step] = round(time.perf_counter() - started, 4)
+
+# Static instructions, sent as the system message. They are byte-identical on
+# every request, so the provider's prompt cache can reuse them; keep anything
+# per-request (question, context) out of this string.
+system_prompt_template_str = """You are "{company} Bot", the official AI assistant for {company}. Your primary purpose is to assist users by accurately answering their questions about {company}'s products, services, company information, pricing, technical specifications, solutions, case studies, career opportunities, contact information, and any other information found on the {company} website.
 
 You will be provided with:
 1.  The user's question.
-2.  Relevant excerpts (context) scraped from the MA Digital website.
+2.  Relevant excerpts (context) scraped from the {company} website.
 
 **Your Instructions:**
 
 1.  **Base Your Answer STRICTLY on the Provided Context:** Your answers MUST be derived SOLELY from the information within the provided context. Do not use any prior knowledge or information outside of this context.
 2.  **Acknowledge if Information is Missing:** If the provided context does not contain the information needed to answer the question, you MUST explicitly state that the information is not available in the provided documents or that you cannot find the specific detail based on the website data. Do NOT invent, infer, or hallucinate answers.
 3.  **Be Specific and Cite (Implicitly):** When answering, directly address the user's query using the information from the context. You don't need to say "According to the context...", but your answer should clearly reflect that it's based on the provided information.
-4.  **Maintain a Professional and Helpful Tone:** Your responses should be polite, clear, concise, and professional, reflecting MA Digital's brand. **Structure your responses for easy readability, using paragraphs for distinct points and well-formatted lists as detailed below.**
+4.  **Maintain a Professional and Helpful Tone:** Your responses should be polite, clear, concise, and professional, reflecting {company}'s brand. **Structure your responses for easy readability, using paragraphs for distinct points and well-formatted lists as detailed below.**
 5.  **Handle Ambiguity:** If the user's question is ambiguous or lacks detail, you can ask a polite clarifying question. However, first attempt to answer based on the most likely interpretation given the context.
 6.  **Keep it Focused:** Only answer the question asked. Do not provide unsolicited information unless it's directly and highly relevant to clarifying the answer from the context.
-7.  **No External Links or Recommendations (unless in context):** Do not suggest external websites or resources unless they are explicitly mentioned in the provided context from the MA Digital website.
+7.  **No External Links or Recommendations (unless in context):** Do not suggest external websites or resources unless they are explicitly mentioned in the provided context from the {company} website.
 8.  **Summarize if Necessary:** If the context contains a lot of relevant information, summarize it concisely to answer the user's question.
 9.  **Direct Quotes (Sparingly):** You can use short, direct quotes from the context if they perfectly answer the question, but prefer to synthesize the information into your own words.
-10. **Safety:** Do not answer questions that are off-topic, offensive, unethical, or request an opinion rather than factual information from the website. If asked for an opinion, state that you can only provide information found on the MA Digital website.
+10. **Safety:** Do not answer questions that are off-topic, offensive, unethical, or request an opinion rather than factual information from the website. If asked for an opinion, state that you can only provide information found on the {company} website.
 11. **To-the-Point Answers for Specific Data:** When asked for a specific piece of information like a phone number, email, or WhatsApp number, provide it directly and concisely.
 12. **Enhanced List Formatting for Readability (CRITICAL):**
     When presenting information as a list (e.g., services, features), follow these rules precisely:
@@ -43,138 +82,312 @@ You will be provided with:
         *   The **title/heading** of the item (e.g., "Development Services") MUST be **bolded using markdown** (e.g., `**Development Services**`).
         *   **CRITICAL:** There MUST be a **newline character (`\\n`)** immediately AFTER the closing `**` of the bolded title.
         *   The **description** for that item MUST start on the line immediately following the bolded title (i.e., after the newline character).
+"""
 
-**User's Question:**
+# Per-request part, sent as the user message
+user_prompt_template_str = """**User's Question:**
 {question}
 
-**Retrieved Context from MA Digital Website:**
+**Retrieved Context from {company} Website:**
 {context}
 
-**MA Digital Bot's Answer:**
+**{company} Bot's Answer:**
 """
 
-prompt_template = PromptTemplate(
-    input_variables=["context", "question"],
-    template=detailed_prompt_template_str
-)
+_prompts = {}
 
-# Load LLM
-llm = ChatOpenAI(model="gpt-4o-mini")
+def _prompts_for(tenant):
+    # (system message, user message template) with the tenant's name filled in; built once per
+    # tenant so its system message stays byte-identical across requests
+    prompts = _prompts.get(tenant)
+    if prompts is None:
+        company = tenant_config(tenant)["name"]
+        prompts = _prompts[tenant] = (
+            system_prompt_template_str.format(company=company),
+            user_prompt_template_str.replace("{company}", company),
+        )
+    return prompts
 
-# Create the RetrievalQA chain
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever,
-    chain_type="stuff",
-    chain_type_kwargs={"prompt": prompt_template},
-    return_source_documents=True,
-)
+system_prompt_str = system_prompt_template_str.format(company=tenant_config(DEFAULT_TENANT)["name"])
 
-# Initialize OpenAI client
-client = openai.OpenAI()
-
-# Non-streaming version (fallback)
-def get_bot_response(query: str) -> str:
-    result_dict = qa_chain.invoke({"query": query})
-    response_text = result_dict.get("result", "Sorry, I couldn't process your request.")
-    
-    # Unescape HTML characters
-    unescaped_response = html.unescape(response_text)
-    
-    # Ensure proper markdown formatting for lists
-    formatted_response = unescaped_response.replace('**\n', '**\n\n')
-    
-    return formatted_response.strip()
-
-# Corrected streaming version
-def get_bot_response_stream(query: str):
-    try:
-        # Retrieve documents using the correct method
-        docs = retriever.get_relevant_documents(query)
-        context = "\n\n".join([doc.page_content for doc in docs])
-        
-        # Format the prompt
-        prompt = prompt_template.format(context=context, question=query)
-        
-        # Create the messages
-        messages = [{"role": "user", "content": prompt}]
-        
-        # Create streaming response
-        stream = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            stream=True,
-            temperature=0,
+# Context tokens before and after packing, reported by /context/stats
+packing_stats = PackingStats()
+
+def initialize():
+    """Load the index and build the LLM client, once; safe to call from any thread."""
+    global async_client, reranker
+    if async_client is not None:
+        return
+    with _init_lock:
+        if async_client is not None:
+            return
+
+        with _timed("import_llm_libraries"):
+            import openai
+
+        # Load vector store
+        with _timed("load_index"):
+            try:
+                index_registry.load()
+            except FileNotFoundError as e:
+                if not list_tenants():
+                    raise ValueError(f"Failed to load vector store ({e}). Run run_embedd.py to build it") from e
+                # A host for other tenants' sites need not have a site of its own
+                print(f"No default index ({e}); serving tenants only")
+
+        if RERANKER_MODEL:
+            with _timed("load_reranker"):
+                reranker = load_reranker(RERANKER_MODEL)
+
+        with _timed("build_clients"):
+            # The one LLM client: both endpoints share its pooled connections
+            client = make_llm_client()
+
+        async_client = client  # Set last: it is what marks initialization as done
+
+def warm_up():
+    """initialize() plus one embeddings round-trip, so the first user query pays no setup cost."""
+    initialize()
+    with _timed("embedding_round_trip"):
+        get_embedding_model().embed_query("warm-up")
+
+def is_ready():
+    return async_client is not None
+
+async def shutdown():
+    if async_client is not None:
+        await async_client.close()
+
+# Bounded pool for the blocking retrieval call (query embedding + FAISS search)
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+# Answers for near-duplicate questions; dropped whenever a new index version is swapped in
+answer_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl=SEMANTIC_CACHE_TTL,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+    version_fn=lambda: index_registry.version,
+) if SEMANTIC_CACHE_ENABLED else None
+
+# The same per tenant, so one site's answers are never served to another's visitors
+tenant_answer_caches = {}
+_tenant_caches_lock = threading.Lock()
+
+def _registry(tenant):
+    return index_registry if tenant == DEFAULT_TENANT else tenant_indexes.get(tenant)
+
+def _answer_cache(tenant):
+    if tenant == DEFAULT_TENANT or not SEMANTIC_CACHE_ENABLED:
+        return answer_cache
+    with _tenant_caches_lock:
+        cache = tenant_answer_caches.get(tenant)
+        if cache is None:
+            cache = tenant_answer_caches[tenant] = SemanticCache(
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                ttl=SEMANTIC_CACHE_TTL,
+                max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                version_fn=lambda: tenant_indexes.version(tenant),  # Also cleared when the index is unloaded
+            )
+        return cache
+
+# Stage timings of every request feed /metrics; a TRACE_SAMPLE_RATE share is also kept whole
+tracer = Tracer(metrics.stage_seconds, metrics.errors, sample_rate=TRACE_SAMPLE_RATE, keep=TRACE_KEEP)
+
+def _retrieve(query: str, trace, tenant=DEFAULT_TENANT):
+    """Embed the query once, then use that vector for both the cache lookup and the FAISS search.
+
+    Returns (embedding, cached_answer, docs); docs is None on a cache hit.
+    """
+    initialize()
+    with trace.stage("embed"):
+        embedding = get_query_embedder().embed_query(query)
+    answer_cache = _answer_cache(tenant)
+    if answer_cache is not None:
+        try:
+            with trace.stage("cache_lookup"):
+                cached = answer_cache.lookup(embedding)
+        except Exception as e:
+            # A failing cache costs its hits, not the answer
+            print(f"Answer cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            return embedding, cached, None
+    timings = {}
+    with trace.stage("load_index"):
+        registry = _registry(tenant)
+    with registry.acquire() as handle, trace.stage("search"):
+        docs = hybrid_search(
+            handle.vector_store,
+            handle.lexical_index if HYBRID_SEARCH else None,
+            query, embedding, RETRIEVAL_K,
+            candidates=HYBRID_CANDIDATES, rrf_k=RRF_K, lexical_min_ratio=HYBRID_LEXICAL_MIN_RATIO,
+            reranker=reranker, timings=timings,
         )
-        
-        buffer = ""
-        
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                token = chunk.choices[0].delta.content
-                buffer += token
-                
-                # Send tokens when we have complete words or formatting
-                if token.endswith((' ', '\n', '.', ',', '!', '?', ':', ';', ')', ']', '}', '*')):
-                    # Process the buffer
-                    processed_content = html.unescape(buffer)
-                    formatted_content = processed_content.replace('**\n', '**\n\n')
-                    yield formatted_content
-                    buffer = ""
-                elif len(buffer) > 50:  # Send long buffers to avoid delays
-                    processed_content = html.unescape(buffer)
-                    formatted_content = processed_content.replace('**\n', '**\n\n')
-                    yield formatted_content
-                    buffer = ""
-        
-        # Send any remaining content
-        if buffer:
-            processed_content = html.unescape(buffer)
-            formatted_content = processed_content.replace('**\n', '**\n\n')
-            yield formatted_content
-                
+    for stage, seconds in timings.items():
+        trace.record(f"search_{stage}", seconds)
+    return embedding, None, docs
+
+def _cache_answer(embedding, answer: str, trace, tenant=DEFAULT_TENANT):
+    answer_cache = _answer_cache(tenant)
+    if answer_cache is not None and answer:
+        try:
+            with trace.stage("cache_store"):
+                answer_cache.store(embedding, answer, time.perf_counter() - trace.started)
+        except Exception as e:
+            print(f"Answer cache store failed: {e}")
+
+def _replay(answer: str):
+    # Re-chunk a cached answer into word-sized pieces so /chat frames it like a live stream
+    return re.findall(r"\s*\S+\s*|\s+", answer)
+
+def _build_messages(query: str, docs, tenant=DEFAULT_TENANT):
+    context, stats = pack_context(docs, CONTEXT_TOKEN_BUDGET)
+    packing_stats.record(stats)
+    system_prompt, user_prompt_template = _prompts_for(tenant)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt_template.format(context=context, question=query)},
+    ]
+
+# Identical questions asked while one is being answered share its retrieval and completion
+coalescer = StreamCoalescer()
+
+async def _generate(query: str, tenant=DEFAULT_TENANT):
+    # Yields (text, SSE frame) pieces; each is serialized once, however many
+    # subscribers share it. Retrieval runs on the bounded executor and the
+    # completion is read with the pooled async client, so a slow completion
+    # never blocks the event loop
+    trace = tracer.start()
+    source, outcome, tokens = "llm", "error", 0
+    try:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        embedding, cached, docs = await loop.run_in_executor(retrieval_executor, _retrieve, query, trace, tenant)
+        trace.record("retrieval", time.perf_counter() - started)
+        if cached is not None:
+            # Replay through the same piece framing as a live completion
+            source = "cache"
+            trace.record("time_to_first_token", time.perf_counter() - trace.started)
+            for piece in _replay(cached):
+                yield piece, token_frame(piece)
+            outcome = "ok"
+            return
+
+        with trace.stage("pack_prompt"):
+            messages = _build_messages(query, docs, tenant)
+
+        formatter = StreamFormatter(STREAM_FLUSH_CHARS, STREAM_FLUSH_INTERVAL)
+        pieces = []
+
+        with trace.stage("llm"):
+            started = time.perf_counter()
+            stream = await async_client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages,
+                stream=True,
+                temperature=0,
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        tokens += 1
+                        if tokens == 1:
+                            trace.record("llm_first_token", time.perf_counter() - started)
+                        piece = formatter.push(chunk.choices[0].delta.content)
+                        if piece is not None:
+                            if not pieces:
+                                trace.record("time_to_first_token", time.perf_counter() - trace.started)
+                            pieces.append(piece)
+                            yield piece, token_frame(piece)
+            finally:
+                # Release the pooled connection if generation is cancelled mid-stream
+                await stream.close()
+
+        piece = formatter.finish()
+        if piece is not None:
+            if not pieces:
+                trace.record("time_to_first_token", time.perf_counter() - trace.started)
+            pieces.append(piece)
+            yield piece, token_frame(piece)
+
+        _cache_answer(embedding, "".join(pieces), trace, tenant)
+        outcome = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        trace.record("total", time.perf_counter() - trace.started)
+        metrics.tokens_streamed.inc(amount=tokens)
+        metrics.answers.inc(source, outcome)
+        trace.finish(query=query, tenant=tenant, source=source, outcome=outcome, tokens=tokens)
+
+def generation_in_flight(query: str, tenant=DEFAULT_TENANT):
+    """Whether an identical question is being answered right now (asking it joins that answer)."""
+    return coalescer.in_flight((tenant, normalize_query(query)))
+
+def _subscribe(query: str, tenant=DEFAULT_TENANT):
+    return coalescer.subscribe((tenant, normalize_query(query)), lambda: _generate(query, tenant))
+
+# Streaming answer for /chat. The generation runs as its own task and fans out
+# to every identical in-flight question; once the last listener disconnects it
+# is cancelled, which closes the upstream stream.
+async def aget_bot_response_stream(query: str, tenant=DEFAULT_TENANT):
+    try:
+        async for piece, _ in _subscribe(query, tenant):
+            yield piece
     except Exception as e:
         yield f"Error: {str(e)}"
 
+# The same stream as ready-to-send SSE token frames, for /chat
+async def aget_bot_response_frames(query: str, tenant=DEFAULT_TENANT):
+    try:
+        async for _, frame in _subscribe(query, tenant):
+            yield frame
+    except Exception as e:
+        yield token_frame(f"Error: {str(e)}")
+
+# Whole answer for /chat-sync: the same shared stream, collected
+async def aget_bot_response(query: str, tenant=DEFAULT_TENANT) -> str:
+    return "".join([piece async for piece, _ in _subscribe(query, tenant)]).strip()
+
 # CLI testing code
 if __name__ == "__main__":
     print("MA Digital Bot is ready. Type 'exit' to quit.")
-    
+
     from langchain_community.vectorstores import FAISS
-    from langchain_openai import OpenAIEmbeddings
-    from langchain.docstore.document import Document
+    from langchain_core.documents import Document
 
-    if vector_store is None:
-        print("Using dummy vector store for testing list formatting.")
+    try:
+        initialize()
+    except ValueError as e:
+        print(f"{e}. Using dummy vector store for testing list formatting.")
         dummy_texts = [
             "MA Digital offers several key services. Web Development involves skilled developers creating custom websites and applications. Social Media Marketing focuses on growing audience engagement and brand presence. SEO Services help websites rank higher on search engines. Graphics & Multimedia provides engaging videos, graphics, and interactive content.",
             "Regarding our service portfolio: For Development, we have experts in coding and team assembly. For Design, our designers enhance project look and feel. Operations include cloud setup and quality control. DevOps ensures efficient code integration."
         ]
         dummy_documents = [Document(page_content=text) for text in dummy_texts]
-        dummy_embeddings = OpenAIEmbeddings()
+        dummy_embeddings = get_embedding_model()
         try:
-            vector_store = FAISS.from_documents(dummy_documents, dummy_embeddings)
-            retriever = vector_store.as_retriever(search_type="similarity", k=1)
-            qa_chain = RetrievalQA.from_chain_type(
-                llm=llm,
-                retriever=retriever,
-                chain_type="stuff",
-                chain_type_kwargs={"prompt": prompt_template},
-                return_source_documents=True,
-            )
+            index_registry.install(FAISS.from_documents(dummy_documents, dummy_embeddings), "dummy")
+            initialize()
         except Exception as e:
             print(f"Could not create dummy vector store: {e}. Ensure OPENAI_API_KEY is set.")
             exit()
 
-    while True:
-        user_input = input("Ask MA Digital Assistant: ")
-        if user_input.lower() == 'exit':
-            break
-        if user_input:
-            print("MA Digital Assistant:")
-            # Test streaming
-            for token in get_bot_response_stream(user_input):
-                print(token, end='', flush=True)
-            print("\n")
-        else:
-            print("Please ask a question.")
\ No newline at end of file
+    async def chat_loop():
+        # One event loop for the whole session: the pooled client's connections belong to it
+        while True:
+            user_input = await asyncio.to_thread(input, "Ask MA Digital Assistant: ")
+            if user_input.lower() == 'exit':
+                break
+            if user_input:
+                print("MA Digital Assistant:")
+                # Test streaming
+                async for token in aget_bot_response_stream(user_input):
+                    print(token, end='', flush=True)
+                print("\n")
+            else:
+                print("Please ask a question.")
+        await shutdown()
+
+    asyncio.run(chat_loop())
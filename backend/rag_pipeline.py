@@ -1,31 +1,330 @@
  
+import itertools
+import multiprocessing
+import os
+import pickle
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import faiss
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.documents import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from utils import load_env
+from utils import load_env, load_json, save_json
+from query_embeddings import QueryEmbedder
+from chunking import split_item
+from tokenizer import count_tokens
+from lexical_index import LEXICAL_INDEX_FILE, LexicalIndex
+from backends import embedding_fingerprint, make_embeddings
+from index_variants import build_serving_index, factory_string, min_training_points, read_index, tune
+from config import (
+    FAISS_INDEX_DIR, QUERY_EMBED_CACHE_SIZE, QUERY_EMBED_CACHE_PATH,
+    QUERY_EMBED_BATCH_WINDOW_MS, QUERY_EMBED_MAX_BATCH, QUERY_EMBED_BATCH_WORKERS, QUERY_EMBED_TIMEOUT,
+    SPLIT_WORKERS, EMBED_BATCH_SIZE, EMBED_CONCURRENCY, EMBED_MAX_RETRIES, EMBED_RETRY_BASE_DELAY,
+    INDEX_TYPE, INDEX_HNSW_M, INDEX_PQ_M, INDEX_NLIST, INDEX_NPROBE, INDEX_EF_SEARCH, INDEX_MMAP,
+)
 
 load_env()
 
 
-embedding_model = OpenAIEmbeddings()
+# Clients are created on first use, not at import: split workers re-import this
+# module (and the indexing run never needs the query-side batcher thread)
+_embedding_model = None
+_query_embedder = None
+_clients_lock = threading.Lock()
 
-def create_vector_store(data):
-    documents = []
-    for item in data:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ".", "!", "?", " ", ""]
-        )
-        chunks = text_splitter.create_documents([item["content"]])
-        for chunk in chunks:
-            chunk.metadata = {"url": item["url"]}
-            documents.append(chunk)
+def _retryable_errors():
+    # Transient failures worth retrying; auth and bad-request errors fail straight away
+    import openai
+    return (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
 
-    vectorstore = FAISS.from_documents(documents, embedding_model)
-    vectorstore.save_local("backend/data/faiss_index")
-    return vectorstore
+def get_embedding_model():
+    global _embedding_model
+    with _clients_lock:
+        if _embedding_model is None:
+            _embedding_model = make_embeddings()
+        return _embedding_model
 
-def load_vector_store():
-    return FAISS.load_local("backend/data/faiss_index", embedding_model, allow_dangerous_deserialization=True)
+def get_query_embedder():
+    """Query-time embeddings go through the cache + micro-batcher; documents pass straight through."""
+    global _query_embedder
+    embedding_model = get_embedding_model()
+    with _clients_lock:
+        if _query_embedder is None:
+            _query_embedder = QueryEmbedder(
+                embedding_model,
+                max_entries=QUERY_EMBED_CACHE_SIZE,
+                persist_path=QUERY_EMBED_CACHE_PATH or None,
+                batch_window_ms=QUERY_EMBED_BATCH_WINDOW_MS,
+                max_batch=QUERY_EMBED_MAX_BATCH,
+                batch_workers=QUERY_EMBED_BATCH_WORKERS,
+                timeout=QUERY_EMBED_TIMEOUT,
+                model=embedding_fingerprint(),
+            )
+        return _query_embedder
+
+MANIFEST_FILE = "manifest.json"
+SERVING_INDEX_FILE = "serving.faiss"
+LEGACY_EMBEDDINGS = "openai:default:default@default"
+
+def iter_chunks(data, workers=SPLIT_WORKERS):
+    """Yield (chunk_id, text, url) for every chunk, splitting pages across a process pool.
+
+    Pages are submitted in bounded windows so a large corpus is never queued
+    (or held as Documents) all at once. Workers are spawned rather than
+    forked, since the embedding threads may already be running.
+    """
+    if workers <= 1:
+        for item in data:
+            yield from split_item(item)
+        return
+
+    window = workers * 32
+    items = iter(data)
+    batch = list(itertools.islice(items, window))
+    if len(batch) < window:
+        # Small inputs (e.g. an incremental change set) are not worth spawning workers for
+        for item in batch:
+            yield from split_item(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while batch:
+            for chunks in pool.map(split_item, batch, chunksize=8):
+                yield from chunks
+            batch = list(itertools.islice(items, window))
+
+def embed_with_retry(texts):
+    embedding_model = get_embedding_model()
+    retryable = _retryable_errors()
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            return embedding_model.embed_documents(texts)
+        except retryable as e:
+            if attempt == EMBED_MAX_RETRIES:
+                raise
+            delay = EMBED_RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+            print(f"Embedding batch of {len(texts)} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def load_manifest(index_dir=FAISS_INDEX_DIR):
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    return load_json(path)
+
+def build_serving_variant(flat_index):
+    """Build the configured INDEX_TYPE from the flat index; None when serving flat."""
+    if INDEX_TYPE == "flat":
+        return None
+    needed = min_training_points(INDEX_TYPE, flat_index.ntotal, nlist=INDEX_NLIST)
+    if flat_index.ntotal < max(needed, 1):
+        print(f"Only {flat_index.ntotal} vectors, {INDEX_TYPE} needs {needed} to train; serving the flat index")
+        return None
+    factory = factory_string(INDEX_TYPE, flat_index.ntotal, flat_index.d,
+                             hnsw_m=INDEX_HNSW_M, pq_m=INDEX_PQ_M, nlist=INDEX_NLIST)
+    return build_serving_index(flat_index, factory), factory
+
+def _index_versions(index_dir):
+    """Sibling directories holding index versions: faiss_index.v<ns> (and a pre-symlink faiss_index.legacy)."""
+    parent, name = os.path.split(index_dir.rstrip(os.sep))
+    if not os.path.isdir(parent):
+        return []
+    return [os.path.join(parent, entry) for entry in os.listdir(parent)
+            if entry.startswith(name + ".v") or entry == name + ".legacy"]
+
+def build_lexical_index(vectorstore):
+    """BM25 over the store's chunks, in FAISS position order."""
+    texts = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[position]).page_content
+             for position in range(vectorstore.index.ntotal)]
+    return LexicalIndex.build(texts)
+
+def save_index_atomically(vectorstore, manifest, index_dir=FAISS_INDEX_DIR):
+    """Write the index into a new version directory, then repoint the index_dir symlink at it.
+
+    The symlink is swapped with os.replace, so a reader always finds a
+    complete index.faiss/index.pkl pair and there is no moment without an
+    index. A crash at any point leaves the previous version in place; stale
+    version directories are removed on the next save.
+    """
+    index_dir = index_dir.rstrip(os.sep)
+    version_dir = f"{index_dir}.v{time.time_ns()}"
+
+    vectorstore.save_local(version_dir)
+    manifest = dict(manifest)
+    serving = build_serving_variant(vectorstore.index)
+    if serving is not None:
+        index, factory = serving
+        faiss.write_index(index, os.path.join(version_dir, SERVING_INDEX_FILE))
+        manifest["serving_index"] = {"type": INDEX_TYPE, "factory": factory}
+    build_lexical_index(vectorstore).save(os.path.join(version_dir, LEXICAL_INDEX_FILE))
+    save_json(manifest, os.path.join(version_dir, MANIFEST_FILE))
+
+    if os.path.isdir(index_dir) and not os.path.islink(index_dir):
+        # First save since indexes became versioned: move the plain directory aside once
+        os.rename(index_dir, index_dir + ".legacy")
+
+    link_tmp = index_dir + ".link.tmp"
+    if os.path.lexists(link_tmp):
+        os.remove(link_tmp)
+    os.symlink(os.path.basename(version_dir), link_tmp)
+    os.replace(link_tmp, index_dir)
+
+    for path in _index_versions(index_dir):
+        if path != version_dir:
+            shutil.rmtree(path, ignore_errors=True)
+
+def create_vector_store(data, incremental=False, changes=None, index_dir=FAISS_INDEX_DIR):
+    """Build (or incrementally update) the FAISS index from scraped pages.
+
+    Chunks stream from the splitter pool into embedding batches of
+    EMBED_BATCH_SIZE, with at most EMBED_CONCURRENCY requests in flight, and
+    each finished batch is added to the index straight away.
+
+    In incremental mode only chunks whose content hash is not in the manifest
+    are embedded, and vectors for chunks that disappeared are deleted. Falls
+    back to a full build when there is no manifest yet.
+
+    `changes` is the change set written by the scraper (added/changed/removed
+    URLs). When given, only those pages are re-split and compared; chunks of
+    every other page carry over from the manifest untouched.
+
+    `index_dir` is where the index lives (a tenant's, see tenants.py).
+
+    Returns (vectorstore, stats) with reused/added/removed chunk counts and
+    embedding throughput.
+    """
+    started = time.perf_counter()
+
+    manifest = load_manifest(index_dir) if incremental else None
+    # Manifests from before backends were configurable were all built with OpenAI's default model
+    if manifest is not None and manifest.get("embeddings", LEGACY_EMBEDDINGS) != embedding_fingerprint():
+        print(f"Index was embedded with {manifest.get('embeddings', LEGACY_EMBEDDINGS)}, "
+              f"now {embedding_fingerprint()}: rebuilding it")
+        manifest = None
+    previous = manifest["chunks"] if manifest is not None else {}
+    touched = None
+    if manifest is not None and changes is not None:
+        touched = set(changes["added"]) | set(changes["changed"]) | set(changes["removed"])
+        data = (item for item in data if item["url"] in touched)
+
+    embedding_model = get_embedding_model()
+    vectorstore = None
+    if manifest is not None:
+        vectorstore = FAISS.load_local(index_dir, embedding_model, allow_dangerous_deserialization=True)
+
+    current = {}
+    added = 0
+    tokens = 0
+    in_flight = deque()
+    pending = []
+
+    def add_batch(batch, vectors):
+        nonlocal vectorstore
+        pairs = [(text, vector) for (_, text, _), vector in zip(batch, vectors)]
+        metadatas = [{"url": url} for _, _, url in batch]
+        ids = [cid for cid, _, _ in batch]
+        if vectorstore is None:
+            vectorstore = FAISS.from_embeddings(pairs, embedding_model, metadatas=metadatas, ids=ids)
+        else:
+            vectorstore.add_embeddings(pairs, metadatas=metadatas, ids=ids)
+
+    def drain(limit):
+        while len(in_flight) > limit:
+            batch, future = in_flight.popleft()
+            add_batch(batch, future.result())
+
+    # Throughput is measured over the split + embed loop only, not the index load or save
+    embed_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY, thread_name_prefix="embed") as pool:
+        for cid, text, url in iter_chunks(data):
+            if cid in current:
+                continue  # The same text twice on one page is indexed once
+            current[cid] = {"url": url}
+            if cid in previous:
+                continue
+            pending.append((cid, text, url))
+            added += 1
+            tokens += count_tokens(text)
+            if len(pending) >= EMBED_BATCH_SIZE:
+                in_flight.append((pending, pool.submit(embed_with_retry, [t for _, t, _ in pending])))
+                pending = []
+                drain(EMBED_CONCURRENCY)
+        if pending:
+            in_flight.append((pending, pool.submit(embed_with_retry, [t for _, t, _ in pending])))
+        drain(0)
+    embed_seconds = time.perf_counter() - embed_started
+
+    if touched is not None:
+        current.update({cid: meta for cid, meta in previous.items() if meta["url"] not in touched})
+    removed = [cid for cid in previous if cid not in current]
+    if removed:
+        vectorstore.delete(removed)
+
+    if vectorstore is None:
+        raise ValueError("No content to index: every page was empty")
+
+    # Skip the write when nothing changed so the on-disk version (and the caches keyed on it) stay put,
+    # unless the serving variant has to be (re)built for a new INDEX_TYPE or the BM25 index is missing
+    serving_type = (manifest or {}).get("serving_index", {}).get("type", "flat")
+    lexical_missing = not os.path.exists(os.path.join(index_dir, LEXICAL_INDEX_FILE))
+    if manifest is None or added or removed or serving_type != INDEX_TYPE or lexical_missing:
+        save_index_atomically(vectorstore, {"chunks": current, "embeddings": embedding_fingerprint()}, index_dir)
+
+    stats = {
+        "chunks": len(current),
+        "reused": len(current) - added,
+        "added": added,
+        "removed": len(removed),
+        "tokens": tokens,
+        "chunks_per_sec": added / embed_seconds if embed_seconds else 0.0,
+        "tokens_per_sec": tokens / embed_seconds if embed_seconds else 0.0,
+        "seconds": time.perf_counter() - started,
+    }
+    return vectorstore, stats
+
+def _load_vector_store(index_dir):
+    manifest = load_manifest(index_dir) or {}
+    serving = manifest.get("serving_index")
+    index_file = "index.faiss"
+    if INDEX_TYPE != "flat":
+        if serving and serving["type"] == INDEX_TYPE:
+            index_file = SERVING_INDEX_FILE
+        else:
+            print(f"No {INDEX_TYPE} index in {index_dir}; serving the flat index (run run_embedd.py to build it)")
+
+    index = tune(read_index(os.path.join(index_dir, index_file), mmap=INDEX_MMAP),
+                 nprobe=INDEX_NPROBE, ef_search=INDEX_EF_SEARCH)
+    with open(os.path.join(index_dir, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(get_query_embedder(), index, docstore, index_to_docstore_id)
+
+def load_lexical_index(index_dir=FAISS_INDEX_DIR):
+    """The BM25 index saved next to the FAISS index, or None for indexes built before it existed."""
+    path = os.path.join(index_dir, LEXICAL_INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    return LexicalIndex.load(path)
+
+def load_vector_store(index_dir=FAISS_INDEX_DIR):
+    # The index symlink can be repointed (and the old version removed) while we
+    # read its files: retry until one version was read consistently
+    for attempt in range(5):
+        version = index_version(index_dir)
+        try:
+            vectorstore = _load_vector_store(index_dir)
+            if index_version(index_dir) == version:
+                return vectorstore
+        except FileNotFoundError:
+            if attempt == 4:
+                raise
+        time.sleep(0.1)
+    return _load_vector_store(index_dir)
+
+def index_version(index_dir=FAISS_INDEX_DIR):
+    """Identifies the index on disk; changes every time create_vector_store rewrites it."""
+    try:
+        return os.stat(os.path.join(index_dir, "index.faiss")).st_mtime_ns
+    except FileNotFoundError:
+        return None
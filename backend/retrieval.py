@@ -0,0 +1,80 @@
+# backend/retrieval.py
+#
+# Hybrid retrieval: FAISS and BM25 candidate lists merged with reciprocal-rank
+# fusion, then optionally re-ordered by a local cross-encoder before the top k
+# go into the prompt.
+
+import time
+
+import numpy as np
+
+def dense_search(vector_store, embedding, n):
+    """FAISS positions of the n nearest chunks, best first."""
+    _, positions = vector_store.index.search(np.asarray([embedding], dtype=np.float32), n)
+    return [int(position) for position in positions[0] if position != -1]
+
+def rrf_fuse(ranked_lists, k=60):
+    """Reciprocal-rank fusion: sum of 1 / (k + rank) over every list an item appears in."""
+    scores = {}
+    for ranked in ranked_lists:
+        for rank, item in enumerate(ranked):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda item: -scores[item])
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs with a sentence-transformers cross-encoder on the CPU."""
+
+    def __init__(self, model_name):
+        from sentence_transformers import CrossEncoder  # Optional dependency
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def rerank(self, query, docs, k):
+        scores = self.model.predict([(query, doc.page_content) for doc in docs])
+        order = np.argsort(-np.asarray(scores), kind="stable")
+        return [docs[i] for i in order[:k]]
+
+def load_reranker(model_name):
+    """The configured reranker, or None when RERANKER_MODEL is empty or sentence-transformers is missing."""
+    if not model_name:
+        return None
+    try:
+        return CrossEncoderReranker(model_name)
+    except ImportError:
+        print(f"RERANKER_MODEL={model_name} needs sentence-transformers; reranking disabled")
+        return None
+
+def hybrid_search(vector_store, lexical_index, query, embedding, k, candidates=20, rrf_k=60,
+                  lexical_min_ratio=0.5, reranker=None, timings=None):
+    """Top-k Documents for a query from FAISS and (when built) BM25 results fused by rank.
+
+    BM25 hits scoring under `lexical_min_ratio` of the best one only matched
+    common words ("phone", "number") and are dropped before fusion, so they
+    cannot outvote a page that matched the exact number. `timings`, when
+    given, collects seconds per stage: dense, lexical, fuse, rerank.
+    """
+    timings = {} if timings is None else timings
+    n = max(candidates, k)
+
+    started = time.perf_counter()
+    ranked = [dense_search(vector_store, embedding, n)]
+    timings["dense"] = time.perf_counter() - started
+
+    if lexical_index is not None:
+        started = time.perf_counter()
+        hits = lexical_index.search(query, n)
+        floor = hits[0][1] * lexical_min_ratio if hits else 0.0
+        # Lexical list first: on a fused tie the exact-token match wins
+        ranked.insert(0, [position for position, score in hits if score >= floor])
+        timings["lexical"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fused = rrf_fuse(ranked, k=rrf_k) if len(ranked) > 1 else ranked[0]
+    keep = n if reranker is not None else k
+    docs = [vector_store.docstore.search(vector_store.index_to_docstore_id[position]) for position in fused[:keep]]
+    timings["fuse"] = time.perf_counter() - started
+
+    if reranker is not None and docs:
+        started = time.perf_counter()
+        docs = reranker.rerank(query, docs, k)
+        timings["rerank"] = time.perf_counter() - started
+    return docs
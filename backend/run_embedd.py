@@ -1,10 +1,30 @@
+import argparse
+import os
 from rag_pipeline import create_vector_store
-from utils import load_json, ensure_dir
+from utils import ensure_dir, find_pages, iter_pages, load_json
+from tenants import DEFAULT_TENANT, tenant_dirs
 
 if __name__ == "__main__":
-    ensure_dir("backend/data/faiss_index")
-    data = load_json("backend/data/scraped_data.json")
-    create_vector_store(data)
-    print("✅ Embeddings and FAISS index created.")
+    parser = argparse.ArgumentParser(description="Build the FAISS index from the scraped pages")
+    parser.add_argument("--full", action="store_true", help="Re-embed everything instead of only new or changed chunks")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help="Index this tenant's scraped pages")
+    args = parser.parse_args()
+
+    data_dir, index_dir = tenant_dirs(args.tenant)
+    ensure_dir(os.path.dirname(index_dir))
+    # Streamed page by page: the crawl is never loaded whole (except a legacy scraped_data.json)
+    data = iter_pages(find_pages(data_dir))
 
+    # Change set left by run_scraper.py: only those pages need to be looked at again
+    changes_path = os.path.join(data_dir, "changes.json")
+    changes = load_json(changes_path) if os.path.exists(changes_path) and not args.full else None
 
+    _, stats = create_vector_store(data, incremental=not args.full, changes=changes, index_dir=index_dir)
+    if os.path.exists(changes_path):
+        os.remove(changes_path)  # Consumed: the index now reflects every pending change
+
+    print(f"♻️  Reused {stats['reused']} chunks, added {stats['added']}, removed {stats['removed']} "
+          f"({stats['chunks']} total) in {stats['seconds']:.1f}s")
+    print(f"⚡ Embedded {stats['chunks_per_sec']:.1f} chunks/s, {stats['tokens_per_sec']:.0f} tokens/s "
+          f"({stats['tokens']} tokens)")
+    print("✅ Embeddings and FAISS index created.")
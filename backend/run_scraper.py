@@ -1,77 +1,116 @@
 
-import requests
+import asyncio
+import httpx
 from bs4 import BeautifulSoup, NavigableString # Ensure NavigableString is imported
 from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+import argparse
+import hashlib
 import json
 import os
+import time
+from config import DATA_DIR, SCRAPED_DATA_FORMAT, SCRAPER_HTML_PARSER
+from tenants import DEFAULT_TENANT, save_tenant_config, tenant_config, tenant_dirs
+from page_store import PageStore
+from utils import PAGE_FORMATS, PageWriter, convert_pages, iter_pages, load_json, pages_path, save_json, truncate_pages
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# html.parser reproduces the original output exactly, malformed markup included.
+# SCRAPER_HTML_PARSER=lxml is faster but repairs broken markup differently.
+HTML_PARSER = SCRAPER_HTML_PARSER or "html.parser"
+
+# Script, style, and common non-content tags
+TAGS_TO_REMOVE = ["script", "style", "nav", "footer", "header", "aside", 
+                  "form", "button", "input", "textarea", "select", "option",
+                  "noscript", "iframe", "canvas", "svg", "video", "audio"]
+
+def _augment_contact_link(a_tag):
+    href = a_tag.get("href", "")
+    link_type_label = None
+    is_contact_link = False
+
+    if not href: # Skip if href is empty or None
+        return
+
+    if "wa.me/" in href or "api.whatsapp.com/send" in href:
+        link_type_label = "WhatsApp"
+        is_contact_link = True
+    elif href.startswith("skype:"):
+        link_type_label = "Skype"
+        is_contact_link = True
+    elif href.startswith("mailto:"):
+        link_type_label = "Email"
+        is_contact_link = True
+    elif href.startswith("tel:"):
+        link_type_label = "Phone"
+        is_contact_link = True
+    # Add other types if needed (e.g., Telegram, LinkedIn)
+
+    if is_contact_link:
+        link_info_str = f" ({link_type_label} Link: {href})"
+
+        # Avoid adding if link info is already part of the text (basic check)
+        if href in a_tag.get_text(separator=" ", strip=True): 
+            return
+
+        # Attempt to modify specific known structures (e.g., Elementor's text span)
+        text_span = a_tag.find("span", class_="elementor-icon-list-text")
+        if text_span and text_span.string: 
+            current_text = text_span.string.strip()
+            text_span.string.replace_with(f"{current_text}{link_info_str}")
+        elif a_tag.string and a_tag.string.strip() and not a_tag.find_all(True, recursive=False):
+            # Case: <a>Direct text here</a> (no child tags)
+            current_text = a_tag.string.strip()
+            a_tag.string.replace_with(f"{current_text}{link_info_str}")
+        else:
+            # Case: <a><span>Text</span><i class="icon"></i></a> or image links etc.
+            # Append the link information as a new NavigableString child.
+            a_tag.append(NavigableString(link_info_str))
+
+# ✨ Single parse per page: cleaned visible text with contact-link augmentation, plus outbound links
+def extract_page(html_content, page_url=None, parser=None):
+    soup = BeautifulSoup(html_content, parser or HTML_PARSER)
+
+    # 1. Collect outbound links first: they come from the whole page, including nav/footer
+    anchors = soup.find_all("a", href=True)
+    links = []
+    if page_url is not None:
+        for link_tag in anchors:
+            raw_href = link_tag.get("href")
+            if raw_href:
+                try:
+                    links.append(urljoin(page_url, raw_href))
+                except ValueError: # Unparseable href (e.g. a broken IPv6 host); not a link we can follow
+                    pass
+
+    # 2. Remove non-content tags in a single tree walk
+    for tag in soup.find_all(TAGS_TO_REMOVE):
+        if not tag.decomposed:
+            tag.decompose()
+
+    # 3. Augment the surviving contact <a> tags to include their hrefs in the textual content
+    for a_tag in anchors:
+        if not a_tag.decomposed:
+            _augment_contact_link(a_tag)
 
-# Global set to keep track of visited URLs during a crawl session
-visited_urls = set()
+    # 4. Extract all text content from the (potentially modified) soup
+    cleaned_text = " ".join(soup.stripped_strings)
+    return cleaned_text, links
 
-# ✨ Clean and extract visible text, now with link augmentation
 def clean_text_with_links(html_content):
-    soup = BeautifulSoup(html_content, "html.parser")
-
-    # 1. Remove script, style, and common non-content tags
-    tags_to_remove = ["script", "style", "nav", "footer", "header", "aside", 
-                      "form", "button", "input", "textarea", "select", "option",
-                      "noscript", "iframe", "canvas", "svg", "video", "audio"]
-    for tag_name in tags_to_remove:
-        for tag in soup.find_all(tag_name):
-            tag.decompose()
-    
-    # 2. Augment specific <a> tags to include their hrefs in the textual content
-    for a_tag in soup.find_all("a", href=True):
-        href = a_tag.get("href", "")
-        link_type_label = None
-        is_contact_link = False
-
-        if not href: # Skip if href is empty or None
-            continue
-
-        if "wa.me/" in href or "api.whatsapp.com/send" in href:
-            link_type_label = "WhatsApp"
-            is_contact_link = True
-        elif href.startswith("skype:"):
-            link_type_label = "Skype"
-            is_contact_link = True
-        elif href.startswith("mailto:"):
-            link_type_label = "Email"
-            is_contact_link = True
-        elif href.startswith("tel:"):
-            link_type_label = "Phone"
-            is_contact_link = True
-        # Add other types if needed (e.g., Telegram, LinkedIn)
-
-        if is_contact_link:
-            link_info_str = f" ({link_type_label} Link: {href})"
-
-            # Avoid adding if link info is already part of the text (basic check)
-            if href in a_tag.get_text(separator=" ", strip=True): 
-                continue
-
-            # Attempt to modify specific known structures (e.g., Elementor's text span)
-            text_span = a_tag.find("span", class_="elementor-icon-list-text")
-            if text_span and text_span.string: 
-                current_text = text_span.string.strip()
-                text_span.string.replace_with(f"{current_text}{link_info_str}")
-            elif a_tag.string and a_tag.string.strip() and not a_tag.find_all(True, recursive=False):
-                # Case: <a>Direct text here</a> (no child tags)
-                current_text = a_tag.string.strip()
-                a_tag.string.replace_with(f"{current_text}{link_info_str}")
-            else:
-                # Case: <a><span>Text</span><i class="icon"></i></a> or image links etc.
-                # Append the link information as a new NavigableString child.
-                a_tag.append(NavigableString(link_info_str))
-
-    # 3. Extract all text content from the (potentially modified) soup
-    text_parts = [text for text in soup.stripped_strings]
-    cleaned_text = " ".join(text_parts)
-    
-    return cleaned_text
+    return extract_page(html_content)[0]
 
-def is_valid_url(url, base_domain):
+def normalize_url(url):
+    """Drop the fragment so /page and /page#section count as one URL."""
     parsed_url = urlparse(url)
+    return urljoin(url, parsed_url.path + (';' + parsed_url.params if parsed_url.params else '') + ('?' + parsed_url.query if parsed_url.query else ''))
+
+def is_valid_url(url, base_domain, visited):
+    try:
+        parsed_url = urlparse(url)
+    except ValueError: # e.g. a malformed IPv6 host in a scraped href
+        return False
     
     if parsed_url.scheme not in ['http', 'https']:
         return False
@@ -89,94 +128,424 @@ def is_valid_url(url, base_domain):
     if base_domain not in parsed_url.netloc: # Allows subdomains of base_domain
         return False
         
-    url_without_fragment = urljoin(url, parsed_url.path + (';' + parsed_url.params if parsed_url.params else '') + ('?' + parsed_url.query if parsed_url.query else ''))
-    if url_without_fragment in visited_urls:
+    if normalize_url(url) in visited:
         return False
         
     return True
 
 
-def scrape_website(start_url, max_depth=2):
-    global visited_urls
-    visited_urls.clear() 
-
+class HostRateLimiter:
+    """Spaces out request starts per host by at least `min_interval` seconds."""
+
+    def __init__(self, min_interval=0.0):
+        self.min_interval = min_interval
+        self._intervals = {}
+        self._next_slot = {}
+        self._locks = {}
+
+    def set_interval(self, host, seconds):
+        self._intervals[host] = max(self.min_interval, seconds)
+
+    async def wait(self, host):
+        interval = self._intervals.get(host, self.min_interval)
+        if interval <= 0:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class CrawlState:
+    """Frontier, seen set and results of a crawl, checkpointed so an interrupted run can resume.
+
+    Pages are appended to a JSON Lines file as they are crawled: `pages_path`
+    if given, else `<path>.pages.jsonl`. The JSON checkpoint itself only holds
+    the frontier, the seen set, the outcomes and how far into the pages file
+    it is valid, so each checkpoint costs the same however many pages came
+    before it. With an explicit `pages_path` the pages are not kept in memory
+    as well, and the file outlives the checkpoint.
+    """
+
+    def __init__(self, start_url, max_depth, path=None, pages_path=None):
+        self.start_url = start_url
+        self.max_depth = max_depth
+        self.path = path
+        self.depth = 0
+        self.frontier = [start_url]   # URLs at `depth` still to fetch
+        self.next_frontier = []       # URLs discovered for depth + 1
+        self.seen = {normalize_url(start_url)}
+        self.fetched = set()          # URLs of the current level already handled
+        self.pages = [] if pages_path is None else None
+        self.page_count = 0
+        self.changes = {"added": [], "changed": [], "unchanged": [], "gone": [], "failed": []}
+        self.pages_path = pages_path or self.checkpoint_pages_path(path)
+        self._owns_pages = pages_path is None
+        self._pages_file = PageWriter(self.pages_path, "jsonl", mode="a") if self.pages_path else None
+
+    @staticmethod
+    def checkpoint_pages_path(path):
+        return path + ".pages.jsonl" if path else None
+
+    def add_page(self, page):
+        if self.pages is not None:
+            self.pages.append(page)
+        if self._pages_file is not None:
+            self._pages_file.write(page)
+        self.page_count += 1
+
+    def snapshot(self):
+        """Checkpoint contents; cheap enough to take on the event loop."""
+        self._pages_file.flush()
+        return {
+            "start_url": self.start_url,
+            "max_depth": self.max_depth,
+            "depth": self.depth,
+            "frontier": [url for url in self.frontier if url not in self.fetched],
+            "next_frontier": list(self.next_frontier),
+            "seen": list(self.seen),
+            "pages_offset": self._pages_file.tell(),
+            "changes": {key: list(urls) for key, urls in self.changes.items()},
+        }
+
+    @staticmethod
+    def write(path, snapshot):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def save(self):
+        self.write(self.path, self.snapshot())
+
+    def finish(self):
+        """The crawl completed: drop the checkpoint so the next run starts fresh."""
+        if self._pages_file is None:
+            return
+        self._pages_file.close()
+        for path in (self.path, self.pages_path if self._owns_pages else None):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    @classmethod
+    def load(cls, path, start_url, max_depth, pages_path=None):
+        target = pages_path or cls.checkpoint_pages_path(path)
+        if not path or not os.path.exists(path):
+            cls._discard_pages(target)
+            return cls(start_url, max_depth, path, pages_path)
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved["start_url"] != start_url or saved["max_depth"] != max_depth:
+            print(f"Ignoring crawl state in {path}: it belongs to a different crawl")
+            cls._discard_pages(target)
+            return cls(start_url, max_depth, path, pages_path)
+
+        if "pages_offset" in saved:
+            # Checkpoints taken before pages went straight to the output directory
+            if target != cls.checkpoint_pages_path(path) and os.path.exists(cls.checkpoint_pages_path(path)):
+                os.replace(cls.checkpoint_pages_path(path), target)
+            # Pages written after the last checkpoint are crawled again, so cut them off
+            count = truncate_pages(target, saved["pages_offset"]) if os.path.exists(target) else 0
+            state = cls(start_url, max_depth, path, pages_path)
+            state.page_count = count
+            if state.pages is not None:
+                state.pages = list(iter_pages(target))
+        else:
+            # Older checkpoints kept the pages inline: move them to the pages file
+            cls._discard_pages(target)
+            state = cls(start_url, max_depth, path, pages_path)
+            for page in saved["pages"]:
+                state.add_page(page)
+        state.depth = saved["depth"]
+        state.frontier = saved["frontier"]
+        state.next_frontier = saved["next_frontier"]
+        state.seen = set(saved["seen"])
+        state.changes = saved.get("changes", state.changes)
+        print(f"Resuming crawl at depth {state.depth} with {len(state.frontier)} URLs queued and {state.page_count} pages done")
+        return state
+
+    @staticmethod
+    def _discard_pages(pages_path):
+        if pages_path and os.path.exists(pages_path):
+            os.remove(pages_path)
+
+
+async def load_robots(client, url):
+    origin = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    robots = RobotFileParser()
+    try:
+        response = await client.get(origin + "/robots.txt", timeout=10)
+        if response.status_code >= 400:
+            robots.parse([])  # No robots.txt (or not readable): everything is allowed
+        else:
+            robots.parse(response.text.splitlines())
+    except httpx.HTTPError:
+        robots.parse([])
+    return robots
+
+
+async def crawl_website(start_url, max_depth=2, concurrency=8, min_interval=0.0, state_path=None,
+                        checkpoint_every=50, page_store=None, pages_path=None):
+    """Breadth-first crawl of start_url's domain with `concurrency` workers.
+
+    Pages are fetched level by level, so a page's depth is always its shortest
+    link distance from start_url. Requests to a host are spaced by at least
+    `min_interval` seconds, or by robots.txt Crawl-delay if that is larger.
+    robots.txt is read (and its Crawl-delay applied) per host, the first time
+    the crawl reaches that host. With `state_path` the crawl is checkpointed
+    and picks up where it left off.
+
+    With a `page_store`, requests carry If-None-Match/If-Modified-Since and
+    pages that come back 304 or with an unchanged body are served from the
+    store without re-parsing.
+
+    With `pages_path`, page records are appended to that JSON Lines file as
+    they come in instead of being collected in memory.
+
+    Returns (pages, changes) where pages is the list of page records, or
+    their number when they went to `pages_path`, and changes lists URLs by
+    outcome: added, changed, unchanged, gone (404/410) and failed.
+    """
     base_domain = urlparse(start_url).netloc
-    to_visit_queue = [(start_url, 0)] 
-    scraped_data_list = []
-    
-    # Keep track of URLs added to queue to avoid redundant processing, normalized without fragment
-    processed_urls_in_queue = set()
-    start_url_parsed = urlparse(start_url)
-    start_url_normalized = urljoin(start_url, start_url_parsed.path + (';' + start_url_parsed.params if start_url_parsed.params else '') + ('?' + start_url_parsed.query if start_url_parsed.query else ''))
-    processed_urls_in_queue.add(start_url_normalized)
-
-
-    while to_visit_queue:
-        current_url, current_depth = to_visit_queue.pop() # DFS
-
-        parsed_current_url = urlparse(current_url)
-        current_url_normalized_for_visited = urljoin(current_url, parsed_current_url.path + (';' + parsed_current_url.params if parsed_current_url.params else '') + ('?' + parsed_current_url.query if parsed_current_url.query else ''))
-
-        if current_url_normalized_for_visited in visited_urls:
-             continue
-        
-        if current_depth > max_depth:
-            continue
-
-        print(f"Scraping: {current_url} (Depth: {current_depth})")
-        visited_urls.add(current_url_normalized_for_visited)
-
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(current_url, timeout=15, headers=headers)
-            response.raise_for_status()
+    state = CrawlState.load(state_path, start_url, max_depth, pages_path)
+    rate_limiter = HostRateLimiter(min_interval)
+    loop = asyncio.get_running_loop()
+    done_since_checkpoint = 0
+    robots_by_host = {}  # host -> task loading its robots.txt, shared by every worker
+    checkpoint_lock = asyncio.Lock()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(headers={"User-Agent": USER_AGENT}, limits=limits, follow_redirects=True) as client:
+
+        async def robots_for(host_url):
+            host = urlparse(host_url).netloc
+            if host not in robots_by_host:
+                robots_by_host[host] = asyncio.ensure_future(load_robots(client, host_url))
+            robots = await robots_by_host[host]
+            crawl_delay = robots.crawl_delay(USER_AGENT)
+            if crawl_delay:
+                rate_limiter.set_interval(host, float(crawl_delay))
+            return robots
+
+        async def checkpoint():
+            # Snapshot on the loop, write off it so the other workers keep fetching
+            async with checkpoint_lock:
+                await loop.run_in_executor(None, CrawlState.write, state_path, state.snapshot())
+
+        def failed(current_url):
+            # Keep the last good copy (and its links, so the pages behind it are still
+            # reached and not mistaken for removed ones); retried on the next run
+            stored = page_store.get(current_url) if page_store else None
+            if stored is None:
+                return "", [], "failed"
+            return stored["content"], stored["links"], "failed"
+
+        async def fetch(current_url, current_depth):
+            """Returns (cleaned text, links, outcome) or None when the page is skipped."""
+            robots = await robots_for(current_url)
+            if not robots.can_fetch(USER_AGENT, current_url):
+                print(f"Skipping {current_url}: disallowed by robots.txt")
+                return None
+
+            await rate_limiter.wait(urlparse(current_url).netloc)
+            print(f"Scraping: {current_url} (Depth: {current_depth})")
+            headers = page_store.conditional_headers(current_url) if page_store else {}
+            try:
+                response = await client.get(current_url, timeout=15, headers=headers)
+                stored = page_store.get(current_url) if page_store else None
+                if response.status_code == 304 and stored is not None:
+                    page_store.touch(current_url)
+                    return stored["content"], stored["links"], "unchanged"
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                print(f"Failed to fetch or access {current_url}: {e}")
+                if e.response.status_code in (404, 410):
+                    return "", [], "gone"
+                return failed(current_url)
+            except httpx.HTTPError as e:
+                print(f"Failed to fetch or access {current_url}: {e}")
+                return failed(current_url)
 
             content_type = response.headers.get('Content-Type', '').lower()
             if 'text/html' not in content_type:
                 print(f"Skipping non-HTML content at {current_url} (Content-Type: {content_type})")
-                continue
-            
-            html_to_parse = response.text
-
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to fetch or access {current_url}: {e}")
-            continue
-        
-        cleaned_page_content = clean_text_with_links(html_to_parse)
-
-        if cleaned_page_content:
-            scraped_data_list.append({
-                "url": current_url,
-                "content": cleaned_page_content
-            })
-
-        if current_depth < max_depth:
-            soup_for_links = BeautifulSoup(html_to_parse, "html.parser")
-            for link_tag in soup_for_links.find_all("a", href=True):
-                raw_href = link_tag.get("href")
-                if not raw_href: continue
-
-                absolute_href = urljoin(current_url, raw_href)
-                
-                # Check validity (includes domain, scheme, not file, not visited)
-                # is_valid_url itself checks visited_urls, so redundant check for `current_url_normalized_for_visited in visited_urls` above might be removed if strictly relying on is_valid_url
-                if is_valid_url(absolute_href, base_domain):
-                    parsed_abs_href = urlparse(absolute_href)
-                    normalized_abs_href_for_queue = urljoin(absolute_href, parsed_abs_href.path + (';' + parsed_abs_href.params if parsed_abs_href.params else '') + ('?' + parsed_abs_href.query if parsed_abs_href.query else ''))
-
-                    if normalized_abs_href_for_queue not in processed_urls_in_queue:
-                        to_visit_queue.append((absolute_href, current_depth + 1))
-                        processed_urls_in_queue.add(normalized_abs_href_for_queue)
-    
-    output_dir = "backend/data"
+                return None
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            body_hash = hashlib.sha256(response.content).hexdigest()
+            if stored is not None and stored["body_hash"] == body_hash:
+                page_store.touch(current_url, etag, last_modified)
+                return stored["content"], stored["links"], "unchanged"
+
+            # Parsing is CPU-bound; keep it off the loop so other fetches keep flowing
+            try:
+                cleaned_page_content, links = await loop.run_in_executor(None, extract_page, response.text, current_url)
+            except Exception as e:
+                print(f"Failed to parse {current_url}: {e}")
+                return failed(current_url)
+
+            if page_store is None:
+                return cleaned_page_content, links, "added"
+            outcome = page_store.record(current_url, cleaned_page_content, links, body_hash, etag, last_modified)
+            return cleaned_page_content, links, outcome
+
+        async def worker(queue):
+            nonlocal done_since_checkpoint
+            while True:
+                current_url = await queue.get()
+                try:
+                    try:
+                        result = await fetch(current_url, state.depth)
+                    except Exception as e:
+                        # Anything unexpected (e.g. httpx.InvalidURL) fails this URL, not the worker
+                        print(f"Failed to fetch or access {current_url}: {e}")
+                        result = failed(current_url)
+                    if result is not None:
+                        cleaned_page_content, links, outcome = result
+                        state.changes[outcome].append(current_url)
+                        if cleaned_page_content:
+                            state.add_page({"url": current_url, "content": cleaned_page_content})
+                        if state.depth < max_depth:
+                            for absolute_href in links:
+                                if is_valid_url(absolute_href, base_domain, state.seen):
+                                    state.seen.add(normalize_url(absolute_href))
+                                    state.next_frontier.append(absolute_href)
+                    state.fetched.add(current_url)
+                    done_since_checkpoint += 1
+                    if state_path and done_since_checkpoint >= checkpoint_every:
+                        done_since_checkpoint = 0
+                        await checkpoint()
+                except Exception as e:
+                    # Keep the worker alive: a dead worker would leave queue.join() waiting forever
+                    print(f"Error while processing {current_url}: {e}")
+                finally:
+                    queue.task_done()
+
+        while True:
+            queue = asyncio.Queue()
+            for url in state.frontier:
+                if url not in state.fetched:
+                    queue.put_nowait(url)
+            workers = [asyncio.create_task(worker(queue)) for _ in range(concurrency)]
+            try:
+                await queue.join()
+            finally:
+                # Also runs when the crawl itself is cancelled, so no worker outlives the client
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+            if state.depth >= max_depth or not state.next_frontier:
+                break
+            state.depth += 1
+            state.frontier, state.next_frontier = state.next_frontier, []
+            state.fetched = set()
+            if state_path:
+                await checkpoint()
+
+    state.finish()
+    return (state.pages if state.pages is not None else state.page_count), state.changes
+
+
+def publish_pages(partial_path, output_dir, fmt):
+    """Move a finished crawl's pages into place as scraped_data.<fmt>, replacing other formats' copies."""
+    output_path = pages_path(output_dir, fmt)
+    if fmt == "jsonl":
+        os.replace(partial_path, output_path)
+    else:
+        tmp_path = output_path + ".tmp"
+        convert_pages(partial_path, tmp_path, fmt)
+        os.replace(tmp_path, output_path)
+        os.remove(partial_path)
+    for other in PAGE_FORMATS:
+        if other != fmt and os.path.exists(pages_path(output_dir, other)):
+            os.remove(pages_path(output_dir, other))
+    return output_path
+
+
+def scrape_website(start_url, max_depth=2, concurrency=8, min_interval=0.0, state_path=None, page_store_path=None,
+                   output_dir=DATA_DIR, fmt=SCRAPED_DATA_FORMAT):
+    """Crawl start_url into scraped_data.<fmt>, plus a change set for incremental indexing.
+
+    Pages are streamed to scraped_data.partial.jsonl as they are crawled and
+    moved (or converted, for another `fmt`) into place once the crawl is
+    done, so memory use does not grow with the size of the site. See
+    utils.iter_pages for reading them back.
+
+    With `page_store_path` the crawl is conditional (see crawl_website), and
+    the pages file is only replaced when some page was added, changed or
+    removed. The change set goes to changes.json next to it. It is built from
+    the store's pending changes, so changes from a crawl that died part way
+    are still reported.
+
+    Without a page store there is nothing to diff against: the pages file
+    is replaced and any pending changes.json is dropped, so the next
+    run_embedd.py compares the whole corpus against its manifest.
+
+    Both files go to `output_dir` (a tenant's data directory, see tenants.py).
+    Returns the path of the pages file.
+    """
     os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, "scraped_data.json")
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(scraped_data_list, f, indent=2, ensure_ascii=False)
-
-    print(f"\n✅ Scraped {len(scraped_data_list)} pages. Data saved to {output_path}")
-    return scraped_data_list
+    output_path = pages_path(output_dir, fmt)
+    partial_path = os.path.join(output_dir, "scraped_data.partial.jsonl")
+    changes_path = os.path.join(output_dir, "changes.json")
+
+    page_store = PageStore(page_store_path) if page_store_path else None
+    try:
+        page_count, outcomes = asyncio.run(
+            crawl_website(start_url, max_depth, concurrency=concurrency, min_interval=min_interval,
+                          state_path=state_path, page_store=page_store, pages_path=partial_path)
+        )
+
+        if page_store is None:
+            if os.path.exists(changes_path):
+                os.remove(changes_path)
+            publish_pages(partial_path, output_dir, fmt)
+            print(f"\n✅ Scraped {page_count} pages. Data saved to {output_path}")
+            return output_path
+
+        # Pages that now 404 are gone. So are stored pages this crawl did not reach, but only when every
+        # fetch succeeded: a failure can hide part of the site, and those pages are kept for next time.
+        removed = list(outcomes["gone"])
+        if outcomes["failed"]:
+            print(f"{len(outcomes['failed'])} pages failed; only pages answering 404/410 are treated as removed")
+        else:
+            reached = set().union(*(outcomes[key] for key in ("added", "changed", "unchanged")))
+            removed += [url for url in page_store.urls() - reached if url not in removed]
+        page_store.delete(removed)
+
+        # Merge into any change set run_embedd.py has not consumed yet, so two scrapes in a row lose nothing
+        pending = page_store.pending_changes()
+        unchanged = len(outcomes["unchanged"])
+        if pending["added"] or pending["changed"] or pending["removed"]:
+            publish_pages(partial_path, output_dir, fmt)
+            previous = load_json(changes_path) if os.path.exists(changes_path) else {}
+            save_json({
+                **{key: sorted(set(previous.get(key, [])) | set(pending[key])) for key in ("added", "changed", "removed")},
+                "unchanged": unchanged,
+            }, changes_path)
+        # Only now are the changes safely on disk
+        page_store.clear_changes()
+    finally:
+        if page_store is not None:
+            page_store.close()
+
+    if not (pending["added"] or pending["changed"] or pending["removed"]):
+        if os.path.exists(output_path):
+            os.remove(partial_path)
+        else:
+            publish_pages(partial_path, output_dir, fmt)  # Same pages, stored in another format until now
+        print(f"\n✅ No changes across {unchanged} pages; {output_path} is up to date")
+        return output_path
+
+    print(f"\n✅ Scraped {page_count} pages "
+          f"({len(pending['added'])} added, {len(pending['changed'])} changed, {len(pending['removed'])} removed, "
+          f"{unchanged} unchanged). Data saved to {output_path}")
+    return output_path
 
 
 if __name__ == "__main__":
@@ -187,10 +556,30 @@ if __name__ == "__main__":
 
     # To scrape the entire site (or up to a certain depth):
     # main_site_url = "https://assorttech.com/"
-    main_site_url = "https://madigitalhub.com/"
-    print(f"Starting scrape for: {main_site_url}")
-    scrape_website(main_site_url, max_depth=1) # Adjust max_depth as needed, e.g., 1 or 
-    
-
-
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Crawl a site into scraped_data.<format>")
+    parser.add_argument("url", nargs="?", help="Start URL (default: the tenant's, saved in its tenant.json)")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help="Whose site this is; files go to its data directory")
+    parser.add_argument("--name", help="The tenant's company name, used in its bot's prompt")
+    parser.add_argument("--max-depth", type=int, default=1) # Adjust max_depth as needed, e.g., 1 or 2
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--min-interval", type=float, default=0.1, help="Minimum seconds between requests to one host")
+    parser.add_argument("--state", help="Checkpoint file for resuming (default: crawl_state.json in the data directory)")
+    parser.add_argument("--format", choices=PAGE_FORMATS, default=SCRAPED_DATA_FORMAT,
+                        help="How to store the pages (json is the original single document)")
+    parser.add_argument("--page-store", help="Per-URL store used for conditional re-crawls "
+                                             "(default: pages.sqlite in the data directory; '' to disable)")
+    args = parser.parse_args()
+
+    data_dir = tenant_dirs(args.tenant)[0]
+    if args.tenant != DEFAULT_TENANT or args.name:
+        save_tenant_config(args.tenant, url=args.url, name=args.name)
+    url = args.url or tenant_config(args.tenant)["url"]
+    if not url:
+        parser.error(f"No URL given and none saved for tenant {args.tenant!r}")
+    state_path = args.state if args.state is not None else os.path.join(data_dir, "crawl_state.json")
+    page_store = args.page_store if args.page_store is not None else os.path.join(data_dir, "pages.sqlite")
+
+    print(f"Starting scrape for: {url}")
+    scrape_website(url, max_depth=args.max_depth, concurrency=args.concurrency,
+                   min_interval=args.min_interval, state_path=state_path,
+                   page_store_path=page_store or None, output_dir=data_dir, fmt=args.format)
@@ -0,0 +1,109 @@
+# backend/semantic_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+class SemanticCache:
+    """Answer cache keyed on query embeddings.
+
+    A lookup hits when a cached query's embedding has cosine similarity of at
+    least `threshold` with the new one. Entries expire after `ttl` seconds and
+    the least recently used entry is evicted once `max_entries` is reached.
+    Everything is dropped when `version_fn()` reports a new index version.
+    """
+
+    def __init__(self, threshold=0.97, ttl=3600, max_entries=1000, version_fn=None):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self._version = version_fn() if version_fn else None
+        self._entries = OrderedDict()  # key -> (unit vector, answer, created_at, generation_seconds)
+        self._matrix = None  # stacked vectors, rebuilt lazily after any change
+        self._keys = []
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.seconds_saved = 0.0
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self):
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+            self._matrix = None
+            self.invalidations += 1
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items() if now - entry[2] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, embedding):
+        """Return the cached answer for the closest query above the threshold, or None."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_version()
+            now = time.time()
+            self._expire(now)
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._keys = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[key][0] for key in self._keys])
+
+            scores = self._matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.seconds_saved += self._entries[key][3]
+            return self._entries[key][1]
+
+    def store(self, embedding, answer, generation_seconds):
+        """Cache an answer together with how long it took to generate."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_version()
+            self._entries[self._next_key] = (vector, answer, time.time(), generation_seconds)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "seconds_saved": round(self.seconds_saved, 3),
+            }
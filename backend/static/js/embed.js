@@ -5,7 +5,8 @@
                 apiUrl: config.apiUrl || 'http://localhost:8000',
                 position: config.position || 'bottom-right',
                 primaryColor: config.primaryColor || '#db152f',
-                title: config.title || 'AssortTech Chat'
+                title: config.title || 'AssortTech Chat',
+                tenant: config.tenant || 'default'
             };
             this.isOpen = false;
             this.init();
@@ -105,7 +106,7 @@
             closeBtn.onclick = () => this.closeWidget();
             
             const iframe = d.createElement('iframe');
-            iframe.src = `${this.config.apiUrl}/widget`;
+            iframe.src = `${this.config.apiUrl}/widget?tenant=${encodeURIComponent(this.config.tenant)}`;
             iframe.style.width = '350px';
             iframe.style.height = '500px';
             iframe.style.border = 'none';
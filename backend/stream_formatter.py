@@ -0,0 +1,87 @@
+# backend/stream_formatter.py
+#
+# Incremental post-processing of streamed completion tokens: HTML entities are
+# unescaped and "**\n" (end of a bold list title) becomes "**\n\n", exactly as
+# if the whole answer had been formatted at once. Text that might continue
+# across the next token boundary (a partial "&amp;" or a trailing "*") is held
+# back until it is complete.
+
+import html
+import json
+import string
+import time
+
+# Characters that end a named character reference (see html.unescape's pattern); a
+# named reference is at most 32 characters, plus an optional ";"
+_NAMED_STOP = frozenset("\t\n\f <&#;")
+_NAMED_MAX = 32
+# Numeric references longer than this are not held back (they do not occur in answers)
+_HOLD_MAX = 40
+
+def _reference_start(text):
+    """Index of a trailing "&" whose character reference may continue in the next token, else len(text)."""
+    amp = text.rfind("&", max(0, len(text) - _HOLD_MAX))
+    if amp == -1:
+        return len(text)
+    after = text[amp + 1:]
+    if after[:1] == "#":
+        hexadecimal = after[1:2] in ("x", "X")
+        digits = after[2:] if hexadecimal else after[1:]
+        allowed = string.hexdigits if hexadecimal else string.digits
+        complete = any(c not in allowed for c in digits)
+    else:
+        complete = len(after) > _NAMED_MAX or any(c in _NAMED_STOP for c in after)
+    return len(text) if complete else amp
+
+class StreamFormatter:
+    """Turns completion tokens into formatted pieces, flushed by size or time.
+
+    push() returns a piece when at least `flush_chars` characters are pending
+    or `flush_interval` seconds have passed since the last piece (the first
+    token is sent at once), else None; finish() returns whatever is left.
+    Tokens are kept in a list and joined once per piece.
+    """
+
+    def __init__(self, flush_chars=32, flush_interval=0.05, clock=time.monotonic):
+        self.flush_chars = flush_chars
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._tokens = []
+        self._pending = 0
+        self._held = ""  # Unescaped trailing "*"s that may start "**\n"
+        self._last_flush = None
+
+    def push(self, token):
+        self._tokens.append(token)
+        self._pending += len(token)
+        if (self._pending >= self.flush_chars or self._last_flush is None
+                or self._clock() - self._last_flush >= self.flush_interval):
+            return self._flush(final=False)
+        return None
+
+    def finish(self):
+        return self._flush(final=True)
+
+    def _flush(self, final):
+        raw = "".join(self._tokens)
+        cut = len(raw) if final else _reference_start(raw)
+        self._tokens = [raw[cut:]] if cut < len(raw) else []
+        self._pending = len(raw) - cut
+
+        text = self._held + html.unescape(raw[:cut])
+        self._held = ""
+        if not final:
+            stars = min(2, len(text) - len(text.rstrip("*")))
+            if stars:
+                text, self._held = text[:-stars], text[-stars:]
+        if not text:
+            return None
+        self._last_flush = self._clock()
+        return text.replace("**\n", "**\n\n")
+
+def sse_frame(payload):
+    """One server-sent event carrying `payload` as JSON, encoded once for every subscriber."""
+    return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+def token_frame(text):
+    return sse_frame({"type": "token", "content": text})
@@ -0,0 +1,59 @@
+# backend/tenants.py
+#
+# The sites this process answers for. Each tenant has its own scraped pages,
+# index and bot name in TENANTS_DIR/<tenant id>/ (tenant.json holds the name
+# and start URL); the default tenant is the original single site and keeps
+# DATA_DIR and FAISS_INDEX_DIR, so existing deployments need no changes.
+
+import os
+import re
+
+from config import DATA_DIR, FAISS_INDEX_DIR, TENANTS_DIR
+from utils import load_json, save_json
+
+DEFAULT_TENANT = "default"
+DEFAULT_CONFIG = {"name": "MA Digital", "url": "https://madigitalhub.com/"}
+TENANT_FILE = "tenant.json"
+
+# Tenant ids become directory names, so nothing that could leave TENANTS_DIR
+_TENANT_ID = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+
+def check_tenant_id(tenant):
+    if not isinstance(tenant, str) or not _TENANT_ID.fullmatch(tenant):
+        raise ValueError(f"Invalid tenant id {tenant!r}: use 1-64 lowercase letters, digits, '-' or '_'")
+    return tenant
+
+def tenant_dirs(tenant):
+    """(data directory, index directory) of a tenant."""
+    if tenant == DEFAULT_TENANT:
+        return DATA_DIR, FAISS_INDEX_DIR
+    data_dir = os.path.join(TENANTS_DIR, check_tenant_id(tenant))
+    return data_dir, os.path.join(data_dir, "faiss_index")
+
+def tenant_exists(tenant):
+    return tenant == DEFAULT_TENANT or os.path.isdir(tenant_dirs(tenant)[0])
+
+def list_tenants():
+    """Ids of the tenants in TENANTS_DIR (the default tenant is not listed)."""
+    if not os.path.isdir(TENANTS_DIR):
+        return []
+    return sorted(name for name in os.listdir(TENANTS_DIR)
+                  if _TENANT_ID.fullmatch(name) and os.path.isdir(os.path.join(TENANTS_DIR, name)))
+
+def tenant_config(tenant):
+    """{"name": shown as "<name> Bot" in the prompt, "url": where run_scraper.py starts}."""
+    path = os.path.join(tenant_dirs(tenant)[0], TENANT_FILE)
+    config = dict(DEFAULT_CONFIG) if tenant == DEFAULT_TENANT else {"name": tenant, "url": None}
+    if os.path.exists(path):
+        config.update(load_json(path))
+    return config
+
+def save_tenant_config(tenant, **fields):
+    """Create the tenant if needed and update its tenant.json with the given (non-empty) fields."""
+    data_dir = tenant_dirs(tenant)[0]
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, TENANT_FILE)
+    config = load_json(path) if os.path.exists(path) else {}
+    config.update({key: value for key, value in fields.items() if value})
+    save_json(config, path)
+    return tenant_config(tenant)
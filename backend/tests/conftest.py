@@ -0,0 +1,12 @@
+# backend/tests/conftest.py
+#
+# The backend modules import each other flatly (from config import ...), so
+# tests run with backend/ and backend/benchmarks/ on the path, like the scripts.
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,36 @@
+# backend/tests/fake_llm.py
+#
+# A stand-in for openai.AsyncOpenAI's streaming chat completions.
+
+import asyncio
+from types import SimpleNamespace
+
+class FakeStream:
+    def __init__(self, tokens, delay):
+        self.tokens = tokens
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for token in self.tokens:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+    async def close(self):
+        self.closed = True
+
+class FakeClient:
+    """Stands in for openai.AsyncOpenAI: counts completions and streams fixed tokens."""
+
+    def __init__(self, tokens, delay=0.005):
+        self.tokens = tokens
+        self.delay = delay
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return FakeStream(self.tokens, self.delay)
@@ -0,0 +1,108 @@
+# backend/tests/test_admission.py
+
+import asyncio
+
+import pytest
+
+import main
+from admission import AdmissionController, ConcurrencyLimiter, RateLimiter, Rejected
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_allows_bursts_then_refills():
+    clock = Clock()
+    limiter = RateLimiter(rate=1.0, burst=2, clock=clock)
+    limiter.check("a")
+    limiter.check("a")
+    with pytest.raises(Rejected) as rejected:
+        limiter.check("a")
+    assert rejected.value.reason == "rate_limited"
+    assert rejected.value.retry_after == 1
+    limiter.check("b")  # Buckets are per client
+    clock.now = 1.0
+    limiter.check("a")
+
+def test_least_recent_clients_are_forgotten():
+    limiter = RateLimiter(rate=1.0, burst=1, max_clients=2, clock=Clock())
+    for client in ("a", "b", "c"):
+        limiter.check(client)
+    assert limiter.stats()["clients"] == 2
+    limiter.check("a")  # Dropped, so it starts with a full bucket again
+
+def test_waiters_are_served_in_order_and_overflow_is_shed():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=2, queue_timeout=5)
+        await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        waiters = [asyncio.create_task(wait(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as rejected:
+            await limiter.acquire()
+        assert rejected.value.reason == "queue_full"
+        assert limiter.stats() == {"active": 1, "queued": 2, "limit": 1, "max_queue": 2, "queue_timeout": 5}
+
+        limiter.release(0.5)
+        await asyncio.sleep(0)
+        limiter.release(0.5)
+        await asyncio.gather(*waiters)
+        limiter.release(0.5)
+        assert order == ["first", "second"]
+        assert limiter.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+def test_queue_timeout_and_cancelled_waiters_free_their_place():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(Rejected) as rejected:
+            await limiter.acquire()
+        assert rejected.value.reason == "queue_timeout"
+
+        limiter.queue_timeout = 5
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.stats()["queued"] == 0
+        limiter.release(0.1)
+        assert limiter.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+def test_joining_an_in_flight_answer_needs_no_slot():
+    async def scenario():
+        controller = AdmissionController(RateLimiter(0, 1), ConcurrencyLimiter(1, 0, 1))
+        held = await controller.admit("a")
+        with pytest.raises(Rejected):
+            await controller.admit("b")
+        joined = await controller.admit("b", joins_existing=True)
+        joined.release()
+        held.release()
+        held.release()  # Idempotent
+        assert controller.concurrency.active == 0
+
+    asyncio.run(scenario())
+
+def test_chat_is_refused_with_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    controller = AdmissionController(RateLimiter(1 / 60, 1), ConcurrencyLimiter(0, 0, 1))
+    monkeypatch.setattr(main, "admission", controller)
+    controller.rate_limiter.check("testclient")  # Spend the only token
+
+    response = TestClient(main.app).post("/chat", json={"query": "Do you build websites?"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 59
+    assert main.metrics.rejected.value("rate_limited") >= 1
@@ -0,0 +1,35 @@
+# backend/tests/test_backends.py
+
+import numpy as np
+import pytest
+
+import backends
+from backends import LocalEmbeddings, embedding_fingerprint, make_embeddings
+
+def test_local_embeddings_are_deterministic_and_word_based():
+    embeddings = LocalEmbeddings(size=64)
+    first, again = embeddings.embed_documents(["web development services", "web development services"])
+    assert first == again
+    assert len(first) == 64
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+    related = np.dot(first, embeddings.embed_query("custom web development"))
+    unrelated = np.dot(first, embeddings.embed_query("call our phone number"))
+    assert related > unrelated
+
+def test_make_embeddings_picks_the_configured_backend(monkeypatch):
+    monkeypatch.setattr(backends, "EMBEDDING_BACKEND", "local")
+    monkeypatch.setattr(backends, "EMBEDDING_DIMENSIONS", 32)
+    assert make_embeddings().model == "local-hash-32"
+    monkeypatch.setattr(backends, "EMBEDDING_BACKEND", "sentence-transformers")
+    with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND"):
+        make_embeddings()
+
+def test_fingerprint_changes_with_model_and_server(monkeypatch):
+    monkeypatch.setattr(backends, "EMBEDDING_BACKEND", "openai")
+    monkeypatch.setattr(backends, "EMBEDDING_MODEL", "")
+    monkeypatch.setattr(backends, "EMBEDDING_DIMENSIONS", 0)
+    monkeypatch.setattr(backends, "EMBEDDING_BASE_URL", "")
+    default = embedding_fingerprint()
+    assert default == "openai:default:default@default"  # What manifests written before this setting mean
+    monkeypatch.setattr(backends, "EMBEDDING_BASE_URL", "http://127.0.0.1:9100/v1")
+    assert embedding_fingerprint() != default
@@ -0,0 +1,82 @@
+# backend/tests/test_coalescing.py
+
+import asyncio
+
+from coalescing import StreamCoalescer
+
+def producer(pieces, calls, delay=0.01, fail=False):
+    async def produce():
+        calls.append(1)
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield piece
+        if fail:
+            raise ValueError("upstream failed")
+    return produce
+
+async def collect(stream):
+    return [piece async for piece in stream]
+
+def test_identical_requests_share_one_producer():
+    async def run():
+        coalescer, calls = StreamCoalescer(), []
+        produce = producer(["a", "b", "c"], calls)
+        results = await asyncio.gather(*(collect(coalescer.subscribe("q", produce)) for _ in range(5)))
+        return coalescer, calls, results
+    coalescer, calls, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [["a", "b", "c"]] * 5
+    assert coalescer.stats() == {"in_flight": 0, "started": 1, "joined": 4}
+
+def test_late_subscriber_replays_from_the_start():
+    async def run():
+        coalescer, calls = StreamCoalescer(), []
+        produce = producer(["a", "b", "c", "d"], calls, delay=0.02)
+        first = asyncio.create_task(collect(coalescer.subscribe("q", produce)))
+        await asyncio.sleep(0.05)
+        late = await collect(coalescer.subscribe("q", produce))
+        return calls, await first, late
+    calls, first, late = asyncio.run(run())
+    assert len(calls) == 1
+    assert first == late == ["a", "b", "c", "d"]
+
+def test_different_keys_and_finished_flights_start_new_producers():
+    async def run():
+        coalescer, calls = StreamCoalescer(), []
+        produce = producer(["a"], calls)
+        await asyncio.gather(collect(coalescer.subscribe("q1", produce)), collect(coalescer.subscribe("q2", produce)))
+        await collect(coalescer.subscribe("q1", produce))
+        return calls
+    assert len(asyncio.run(run())) == 3
+
+def test_error_reaches_every_subscriber():
+    async def run():
+        coalescer = StreamCoalescer()
+        produce = producer(["a"], [], fail=True)
+        return await asyncio.gather(*(collect(coalescer.subscribe("q", produce)) for _ in range(2)),
+                                    return_exceptions=True)
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_producer_is_cancelled_when_every_subscriber_leaves():
+    closed = []
+
+    async def produce():
+        try:
+            for i in range(100):
+                await asyncio.sleep(0.01)
+                yield str(i)
+        finally:
+            closed.append(1)
+
+    async def run():
+        coalescer = StreamCoalescer()
+        stream = coalescer.subscribe("q", produce)
+        assert await stream.__anext__() == "0"
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return coalescer.stats()
+
+    stats = asyncio.run(run())
+    assert closed == [1]
+    assert stats["in_flight"] == 0
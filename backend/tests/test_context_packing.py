@@ -0,0 +1,52 @@
+# backend/tests/test_context_packing.py
+
+from langchain_core.documents import Document
+
+from chunking import text_splitter
+from context_packing import PackingStats, pack_context
+from tokenizer import count_tokens
+
+PAGE = " ".join(f"Sentence {i} about NovaDesk pricing and support." for i in range(80))
+
+def docs_for(chunks, url="https://example.com/a"):
+    return [Document(page_content=chunk, metadata={"url": url}) for chunk in chunks]
+
+def test_overlapping_chunks_of_a_page_are_merged_back():
+    chunks = text_splitter.split_text(PAGE)
+    assert len(chunks) >= 3
+    context, stats = pack_context(docs_for([chunks[1], chunks[0], chunks[2]]), budget=10_000)
+    assert stats["passages"] == 1
+    assert context == PAGE[:len(context)]
+    assert stats["packed_tokens"] < stats["raw_tokens"]
+
+def test_chunks_of_different_pages_are_not_merged():
+    chunks = text_splitter.split_text(PAGE)
+    docs = docs_for(chunks[:1], "https://example.com/a") + docs_for(chunks[1:2], "https://example.com/b")
+    _, stats = pack_context(docs, budget=10_000)
+    assert stats["passages"] == 2
+
+def test_duplicates_are_dropped_and_order_follows_relevance():
+    docs = [Document(page_content="second page text", metadata={"url": "/b"}),
+            Document(page_content="first page text", metadata={"url": "/a"}),
+            Document(page_content="second page text", metadata={"url": "/b"})]
+    context, _ = pack_context(docs, budget=10_000)
+    assert context == "second page text\n\nfirst page text"
+
+def test_budget_leaves_out_least_relevant_passages():
+    docs = [Document(page_content=f"passage {i} " + "word " * 100, metadata={"url": f"/{i}"}) for i in range(5)]
+    per_passage = count_tokens(docs[0].page_content)
+    context, stats = pack_context(docs, budget=per_passage * 2 + 5)
+    assert stats["passages"] == 2
+    assert context.startswith("passage 0") and "passage 1" in context and "passage 2" not in context
+    assert stats["packed_tokens"] <= per_passage * 2 + 5
+
+def test_first_passage_is_truncated_when_nothing_fits():
+    docs = docs_for(["word " * 1000])
+    context, stats = pack_context(docs, budget=50)
+    assert context and stats["packed_tokens"] <= 50
+
+def test_packing_stats_report_savings_per_request():
+    stats = PackingStats()
+    stats.record({"raw_tokens": 100, "packed_tokens": 60})
+    stats.record({"raw_tokens": 50, "packed_tokens": 50})
+    assert stats.stats()["saved_tokens_per_request"] == 20.0
@@ -0,0 +1,44 @@
+# backend/tests/test_extract.py
+#
+# extract_page must give exactly what the original scraper produced: the same
+# cleaned text as clean_text_with_links and the same outbound links.
+
+import os
+
+import pytest
+
+from fixture_site import SiteGraph
+from golden_extract import EDGE_CASES, MALFORMED_CASES, legacy_clean_text_with_links, legacy_links
+import run_scraper
+from run_scraper import clean_text_with_links, extract_page
+
+PAGE_URL = "https://example.com/dir/page.html"
+
+GRAPH = SiteGraph(50)
+FIXTURE_PAGES = [GRAPH.render(i) for i in range(GRAPH.pages)]
+
+def expected(html):
+    return legacy_clean_text_with_links(html), legacy_links(html, PAGE_URL)
+
+@pytest.mark.skipif(bool(os.getenv("SCRAPER_HTML_PARSER")), reason="parser pinned by SCRAPER_HTML_PARSER")
+def test_default_parser_is_html_parser():
+    # lxml is opt-in: it changes the output on malformed markup
+    assert run_scraper.HTML_PARSER == "html.parser"
+
+@pytest.mark.parametrize("html", FIXTURE_PAGES + EDGE_CASES + MALFORMED_CASES)
+def test_extract_page_matches_legacy(html):
+    assert extract_page(html, PAGE_URL) == expected(html)
+
+@pytest.mark.parametrize("html", EDGE_CASES + MALFORMED_CASES)
+def test_clean_text_with_links_matches_legacy(html):
+    assert clean_text_with_links(html) == legacy_clean_text_with_links(html)
+
+@pytest.mark.parametrize("html", FIXTURE_PAGES[:10] + EDGE_CASES)
+def test_lxml_matches_legacy_on_well_formed_pages(html):
+    pytest.importorskip("lxml")
+    assert extract_page(html, PAGE_URL, parser="lxml") == expected(html)
+
+def test_unparseable_href_is_skipped():
+    text, links = extract_page('<a href="http://[::1">v6</a><a href="/ok">ok</a>', PAGE_URL)
+    assert text == "v6 ok"
+    assert links == ["https://example.com/ok"]
@@ -0,0 +1,73 @@
+# backend/tests/test_generation.py
+#
+# /chat and /chat-sync share one generation per in-flight question, read
+# through the single pooled async client (faked here).
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+import query_engine
+from fake_llm import FakeClient
+
+@pytest.fixture
+def engine(monkeypatch):
+    retrievals = []
+
+    def fake_retrieve(query, trace, tenant):
+        retrievals.append(query)
+        return None, None, [Document(page_content="MA Digital does SEO.", metadata={"url": "/seo"})]
+
+    # "**" + "\n" and "&am" + "p;" straddle token boundaries
+    client = FakeClient(["We ", "offer ", "**SEO**", "\n", "and &am", "p; more."])
+    monkeypatch.setattr(query_engine, "_retrieve", fake_retrieve)
+    monkeypatch.setattr(query_engine, "async_client", client)
+    monkeypatch.setattr(query_engine, "coalescer", query_engine.StreamCoalescer())
+    return SimpleNamespace(client=client, retrievals=retrievals)
+
+async def collect_stream(query):
+    return "".join([piece async for piece in query_engine.aget_bot_response_stream(query)])
+
+def test_identical_questions_share_one_retrieval_and_completion(engine):
+    async def run():
+        return await asyncio.gather(
+            *(collect_stream("Do you do SEO?") for _ in range(3)),
+            *(query_engine.aget_bot_response("do you  do seo?") for _ in range(3)),
+        )
+    results = asyncio.run(run())
+    assert len(engine.client.requests) == 1
+    assert len(engine.retrievals) == 1
+    assert results == ["We offer **SEO**\n\nand & more."] * 3 + ["We offer **SEO**\n\nand & more."] * 3
+
+def test_frames_are_serialized_once_and_shared(engine):
+    async def run():
+        async def frames():
+            return [frame async for frame in query_engine.aget_bot_response_frames("Do you do SEO?")]
+        return await asyncio.gather(frames(), frames())
+    first, second = asyncio.run(run())
+    assert all(a is b for a, b in zip(first, second))
+    contents = [json.loads(frame.decode()[len("data: "):])["content"] for frame in first]
+    assert "".join(contents) == "We offer **SEO**\n\nand & more."
+
+def test_different_questions_generate_separately(engine):
+    async def run():
+        return await asyncio.gather(collect_stream("Do you do SEO?"), query_engine.aget_bot_response("Pricing?"))
+    asyncio.run(run())
+    assert len(engine.client.requests) == 2
+
+def test_prompt_has_static_system_message(engine):
+    asyncio.run(query_engine.aget_bot_response("Do you do SEO?"))
+    messages = engine.client.requests[0]["messages"]
+    assert messages[0] == {"role": "system", "content": query_engine.system_prompt_str}
+    assert "MA Digital does SEO." in messages[1]["content"]
+
+def test_stream_reports_errors_and_sync_raises(engine, monkeypatch):
+    async def failing_create(**kwargs):
+        raise RuntimeError("upstream down")
+    monkeypatch.setattr(engine.client.chat.completions, "create", failing_create)
+    assert asyncio.run(collect_stream("Do you do SEO?")) == "Error: upstream down"
+    with pytest.raises(RuntimeError):
+        asyncio.run(query_engine.aget_bot_response("Do you do SEO?"))
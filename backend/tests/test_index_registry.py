@@ -0,0 +1,99 @@
+# backend/tests/test_index_registry.py
+
+import threading
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pytest
+
+from index_registry import IndexRegistry
+
+def fake_store(vectors=10, dimensions=4):
+    index = faiss.IndexFlatL2(dimensions)
+    index.add(np.random.default_rng(0).random((vectors, dimensions), dtype=np.float32))
+    return SimpleNamespace(index=index)
+
+class FakeDisk:
+    """Stands in for the index directory: a version number and what loading it returns."""
+
+    def __init__(self):
+        self.version = 1
+        self.loads = 0
+
+    def load(self, index_dir):
+        self.loads += 1
+        return fake_store(vectors=self.version)
+
+    def version_fn(self, index_dir):
+        return self.version
+
+@pytest.fixture
+def disk():
+    return FakeDisk()
+
+@pytest.fixture
+def registry(disk):
+    return IndexRegistry("index", drain_timeout=0.2, loader=disk.load, version_fn=disk.version_fn,
+                         lexical_loader=None)
+
+def test_reload_only_when_version_changes(registry, disk):
+    registry.load()
+    assert registry.version == 1
+    assert registry.reload() is False
+    disk.version = 2
+    assert registry.reload() is True
+    assert registry.version == 2
+    assert disk.loads == 2
+    assert registry.stats()["vectors"] == 2
+
+def test_in_flight_request_keeps_its_version(registry, disk):
+    registry.load()
+    with registry.acquire() as handle:
+        disk.version = 2
+        registry.reload()
+        # The running request still searches the index it started with
+        assert handle.vector_store.index.ntotal == 1
+        assert registry.stats()["retired_in_flight"] == 1
+        with registry.acquire() as new_handle:
+            assert new_handle.version == 2
+    # Drained: the old index is released
+    assert handle.vector_store is None
+    assert registry.stats()["retired_in_flight"] == 0
+
+def test_reload_waits_for_previous_index_to_drain(registry, disk):
+    registry.load()
+    release = threading.Event()
+    acquired = threading.Event()
+
+    def slow_request():
+        with registry.acquire():
+            acquired.set()
+            release.wait()
+
+    thread = threading.Thread(target=slow_request)
+    thread.start()
+    acquired.wait()
+    disk.version = 2
+    registry.reload()
+
+    # A third version is not loaded while version 1 is still in use: never more than one extra index
+    disk.version = 3
+    assert registry.reload() is False
+    assert disk.loads == 2
+    assert registry.reload_failures == 1
+
+    release.set()
+    thread.join()
+    assert registry.reload() is True
+    assert registry.version == 3
+
+def test_failed_load_keeps_current_index(registry, disk):
+    registry.load()
+    disk.version = 2
+    disk.load = lambda index_dir: (_ for _ in ()).throw(FileNotFoundError("gone"))
+    registry._loader = disk.load
+    with pytest.raises(FileNotFoundError):
+        registry.reload()
+    assert registry.version == 1
+    assert registry.stats()["last_error"] == "gone"
@@ -0,0 +1,108 @@
+# backend/tests/test_metrics.py
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+
+import main
+import metrics
+import query_engine
+import rag_pipeline
+from fake_llm import FakeClient
+from index_registry import IndexRegistry
+from lexical_index import LexicalIndex
+from metrics import Counter, Gauge, Histogram, Registry, Tracer
+
+TEXTS = ["MA Digital builds websites.", "Call us on +92 310 8481550.", "We offer SEO and marketing."]
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("stage_seconds", "Stage time", labels=("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "llm")
+    lines = histogram.render()
+    assert 'stage_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="llm",le="1.0"} 3' in lines
+    assert 'stage_seconds_bucket{stage="llm",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="llm"} 4' in lines
+    assert 'stage_seconds_sum{stage="llm"} 4.05' in lines
+
+def test_registry_renders_counters_and_scrape_time_gauges():
+    registry = Registry()
+    counter = registry.register(Counter("errors_total", "Errors", labels=("stage",)))
+    registry.register(Gauge("cache", "Cache", labels=("stat",), fn=lambda: {("hits",): 3}))
+    counter.inc("llm")
+    counter.inc("llm", amount=2)
+    text = registry.render()
+    assert "# TYPE errors_total counter" in text
+    assert 'errors_total{stage="llm"} 3' in text
+    assert 'cache{stat="hits"} 3' in text
+
+def test_failing_stage_is_counted_and_traced():
+    histogram = Histogram("h", "h", labels=("stage",))
+    errors = Counter("e", "e", labels=("stage",))
+    tracer = Tracer(histogram, errors, sample_rate=1.0)
+    trace = tracer.start()
+    with pytest.raises(ValueError):
+        with trace.stage("embed"):
+            raise ValueError("down")
+    trace.finish(outcome="error")
+    assert errors.value("embed") == 1
+    assert histogram.count("embed") == 1
+    assert tracer.recent()[0]["spans"][0]["stage"] == "embed"
+    assert Tracer(histogram, errors, sample_rate=0.0).start().spans is None
+
+@pytest.fixture
+def app(monkeypatch):
+    embeddings = FakeEmbeddings(size=16)
+    registry = IndexRegistry("index", lexical_loader=None)
+    registry.install(FAISS.from_texts(TEXTS, embeddings, metadatas=[{"url": f"/{i}"} for i in range(3)]), "v1",
+                     LexicalIndex.build(TEXTS))
+    client = FakeClient(["We ", "build ", "**websites**", "\n", "fast."])
+    monkeypatch.setattr(query_engine, "initialize", lambda: None)
+    monkeypatch.setattr(query_engine, "get_query_embedder", lambda: embeddings)
+    monkeypatch.setattr(query_engine, "index_registry", registry)
+    monkeypatch.setattr(query_engine, "async_client", client)
+    monkeypatch.setattr(query_engine, "answer_cache", None)
+    monkeypatch.setattr(query_engine, "coalescer", query_engine.StreamCoalescer())
+    monkeypatch.setattr(query_engine, "tracer", Tracer(metrics.stage_seconds, metrics.errors, sample_rate=1.0))
+    monkeypatch.setattr(rag_pipeline, "get_query_embedder", lambda: SimpleNamespace(stats=lambda: {"hits": 0}))
+    return SimpleNamespace(http=TestClient(main.app), llm=client)
+
+def test_chat_request_fills_stage_histograms_and_counters(app):
+    before = {stage: metrics.stage_seconds.count(stage)
+              for stage in ("embed", "search", "search_lexical", "pack_prompt", "llm", "llm_first_token",
+                            "time_to_first_token", "total", "sse_write")}
+    tokens = metrics.tokens_streamed.value()
+    answers = metrics.answers.value("llm", "ok")
+
+    response = app.http.post("/chat", json={"query": "Do you build websites?"})
+    assert response.status_code == 200
+    assert '"type": "end"' in response.text
+
+    assert all(metrics.stage_seconds.count(stage) == count + 1 for stage, count in before.items())
+    assert metrics.tokens_streamed.value() == tokens + 5
+    assert metrics.answers.value("llm", "ok") == answers + 1
+    assert metrics.active_streams.value("chat") == 0
+
+    text = app.http.get("/metrics").text
+    assert 'rag_stage_seconds_count{stage="llm"}' in text
+    assert "rag_tokens_streamed_total" in text
+    assert 'rag_index{stat="vectors"} 3' in text
+
+    traces = app.http.get("/admin/traces").json()["traces"]
+    assert traces[-1]["outcome"] == "ok"
+    assert {span["stage"] for span in traces[-1]["spans"]} >= {"embed", "search", "llm", "time_to_first_token"}
+
+def test_llm_failure_is_counted(app, monkeypatch):
+    async def failing_create(**kwargs):
+        raise RuntimeError("rate limited")
+    monkeypatch.setattr(app.llm.chat.completions, "create", failing_create)
+    errors = metrics.errors.value("llm")
+
+    response = app.http.post("/chat", json={"query": "Do you build websites?"})
+    assert "Error: rate limited" in response.text
+    assert metrics.errors.value("llm") == errors + 1
+    assert metrics.answers.value("llm", "error") >= 1
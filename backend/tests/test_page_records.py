@@ -0,0 +1,66 @@
+# backend/tests/test_page_records.py
+
+import os
+
+import pytest
+
+from run_scraper import CrawlState, publish_pages
+from utils import PAGE_FORMATS, PageWriter, find_pages, iter_pages, pages_path, save_json
+
+PAGES = [{"url": f"https://example.test/{i}", "content": f"Page {i}: ünïcode, \"quotes\"\nand newlines"}
+         for i in range(1200)]
+
+@pytest.mark.parametrize("fmt", PAGE_FORMATS)
+def test_pages_round_trip_in_every_format(tmp_path, fmt):
+    path = pages_path(str(tmp_path), fmt)
+    with PageWriter(path) as writer:
+        for page in PAGES:
+            writer.write(page)
+    assert writer.count == len(PAGES)
+    assert list(iter_pages(path)) == PAGES
+    assert find_pages(str(tmp_path)) == path
+
+def test_legacy_scraped_data_json_is_still_read(tmp_path):
+    save_json(PAGES[:3], str(tmp_path / "scraped_data.json"))
+    assert list(iter_pages(find_pages(str(tmp_path)))) == PAGES[:3]
+
+def test_newest_pages_file_wins(tmp_path):
+    save_json(PAGES[:1], str(tmp_path / "scraped_data.json"))
+    os.utime(tmp_path / "scraped_data.json", (0, 0))
+    with PageWriter(str(tmp_path / "scraped_data.jsonl")) as writer:
+        writer.write(PAGES[1])
+    assert list(iter_pages(find_pages(str(tmp_path)))) == [PAGES[1]]
+    with pytest.raises(FileNotFoundError):
+        find_pages(str(tmp_path / "empty"))
+
+def test_a_torn_last_record_is_skipped(tmp_path):
+    path = str(tmp_path / "scraped_data.jsonl")
+    with PageWriter(path) as writer:
+        writer.write(PAGES[0])
+    with open(path, "ab") as f:
+        f.write(b'{"url": "https://example.test/cut", "cont')
+    assert list(iter_pages(path)) == [PAGES[0]]
+
+def test_resumed_crawl_streams_pages_without_holding_them(tmp_path):
+    state_path, partial = str(tmp_path / "crawl_state.json"), str(tmp_path / "scraped_data.partial.jsonl")
+    state = CrawlState.load(state_path, "https://example.test/", 2, partial)
+    assert state.pages is None
+    for page in PAGES[:10]:
+        state.add_page(page)
+    state.save()
+    for page in PAGES[10:15]:  # Written after the checkpoint: crawled again on resume
+        state.add_page(page)
+    state._pages_file.close()
+
+    state = CrawlState.load(state_path, "https://example.test/", 2, partial)
+    assert state.page_count == 10
+    for page in PAGES[10:20]:
+        state.add_page(page)
+    state.finish()
+    assert not os.path.exists(state_path)
+    assert list(iter_pages(partial)) == PAGES[:20]
+
+    save_json(PAGES[:1], str(tmp_path / "scraped_data.json"))
+    output = publish_pages(partial, str(tmp_path), "jsonl.gz")
+    assert list(iter_pages(output)) == PAGES[:20]
+    assert sorted(os.listdir(tmp_path)) == ["scraped_data.jsonl.gz"]
@@ -0,0 +1,68 @@
+# backend/tests/test_retrieval.py
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from types import SimpleNamespace
+
+from lexical_index import LexicalIndex, tokenize
+from retrieval import hybrid_search, rrf_fuse
+
+TEXTS = [
+    "Web development and hosting for small businesses. Call us on our phone number.",
+    "Call +92 310 848-1550 (Phone Link: tel:+923108481550) or mail hello@example.com",
+    "NovaDesk is our helpdesk product. Phone number and email on the contact page.",
+    "Social media marketing and brand strategy for growing teams.",
+]
+
+def fake_store(texts, dimensions=8):
+    index = faiss.IndexFlatL2(dimensions)
+    index.add(np.random.default_rng(0).random((len(texts), dimensions), dtype=np.float32))
+    ids = {i: str(i) for i in range(len(texts))}
+    docstore = InMemoryDocstore({str(i): Document(page_content=text, metadata={"url": f"/{i}"})
+                                 for i, text in enumerate(texts)})
+    return SimpleNamespace(index=index, docstore=docstore, index_to_docstore_id=ids)
+
+def test_tokenize_keeps_emails_and_phone_numbers_whole():
+    tokens = tokenize("Call +92 310 848-1550 or mail Hello@Example.com")
+    assert "923108481550" in tokens
+    assert "hello@example.com" in tokens
+    assert "call" in tokens
+
+def test_phone_number_matches_regardless_of_formatting():
+    index = LexicalIndex.build(TEXTS)
+    assert index.search("+923108481550", 1)[0][0] == 1
+    assert index.search("+92-310-848-1550?", 1)[0][0] == 1
+
+def test_search_ranks_by_bm25_and_respects_k():
+    index = LexicalIndex.build(TEXTS)
+    hits = index.search("NovaDesk helpdesk", 3)
+    assert hits[0][0] == 2
+    assert len(index.search("phone number", 2)) == 2
+    assert index.search("unknownterm", 3) == []
+
+def test_save_and_load_round_trip(tmp_path):
+    index = LexicalIndex.build(TEXTS)
+    index.save(tmp_path / "lexical.pkl")
+    loaded = LexicalIndex.load(tmp_path / "lexical.pkl")
+    assert loaded.search("hello@example.com", 4) == index.search("hello@example.com", 4)
+
+def test_rrf_rewards_items_found_by_both_lists():
+    assert rrf_fuse([["a", "b", "c"], ["c", "d"]])[0] == "c"
+    assert rrf_fuse([["a"], ["b"]]) == ["a", "b"]  # Ties keep the first list's order
+
+def test_hybrid_search_finds_exact_token_the_dense_list_misses():
+    store = fake_store(TEXTS)
+    lexical = LexicalIndex.build(TEXTS)
+    embedding = store.index.reconstruct(0)  # Dense search ranks document 0 first
+    timings = {}
+    docs = hybrid_search(store, lexical, "phone number +92 310 8481550", embedding, 1, candidates=4, timings=timings)
+    assert docs[0].metadata["url"] == "/1"
+    assert set(timings) == {"dense", "lexical", "fuse"}
+
+def test_hybrid_search_without_lexical_index_is_dense_only():
+    store = fake_store(TEXTS)
+    docs = hybrid_search(store, None, "anything", store.index.reconstruct(3), 2)
+    assert [doc.metadata["url"] for doc in docs][0] == "/3"
+    assert len(docs) == 2
@@ -0,0 +1,51 @@
+# backend/tests/test_startup.py
+#
+# The app starts without an index; /healthz answers at once and /readyz only
+# once the background warm-up has succeeded.
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import query_engine
+
+def wait_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/readyz")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.01)
+    return response
+
+@pytest.fixture(autouse=True)
+def fresh_readiness(monkeypatch):
+    monkeypatch.setattr(main, "readiness", {"ready": False, "error": None, "attempts": 0})
+    monkeypatch.setattr(main, "WARMUP_RETRY_INTERVAL", 0.01)
+
+def test_not_ready_while_warm_up_fails(monkeypatch):
+    def failing_warm_up():
+        raise ValueError("no index")
+    monkeypatch.setattr(query_engine, "warm_up", failing_warm_up)
+
+    with TestClient(main.app) as client:
+        assert client.get("/healthz").status_code == 200
+        response = wait_ready(client, timeout=0.2)
+        assert response.status_code == 503
+        assert response.json()["error"] == "no index"
+
+def test_ready_after_warm_up_recovers(monkeypatch):
+    attempts = []
+    def flaky_warm_up():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ValueError("no index yet")
+    monkeypatch.setattr(query_engine, "warm_up", flaky_warm_up)
+
+    with TestClient(main.app) as client:
+        response = wait_ready(client)
+        assert response.status_code == 200
+        assert response.json()["attempts"] == 3
+        assert "warm_up_total" in response.json()["timings"]
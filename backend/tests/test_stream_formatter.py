@@ -0,0 +1,85 @@
+# backend/tests/test_stream_formatter.py
+#
+# Property tests: however an answer is split into tokens, and whenever the
+# formatter flushes, the pieces join to exactly what formatting the whole
+# answer at once gives (what the non-streaming get_bot_response returned).
+
+import html
+import json
+import random
+
+from stream_formatter import StreamFormatter, sse_frame, token_frame
+
+def format_whole(text):
+    return html.unescape(text).replace("**\n", "**\n\n")
+
+# Fragments that stress boundaries: entities (named, numeric, unterminated,
+# bogus), markdown markers and plain words
+FRAGMENTS = ["&amp;", "&lt;", "&gt;", "&quot;", "&#39;", "&#x27;", "&#42;", "&amp", "&copy", "&ampx", "&nbsp;",
+             "&#", "&#x", "&;", "&", "#", ";", "**", "*", "**\n", "\n", "***\n", " ", "word", "Title", "1.", "x", "12"]
+
+def random_answer(rng, length):
+    return "".join(rng.choice(FRAGMENTS) for _ in range(length))
+
+def random_split(rng, text):
+    tokens, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 6)
+        tokens.append(text[i:i + n])
+        i += n
+    return tokens
+
+class FakeClock:
+    def __init__(self, rng):
+        self.rng = rng
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += self.rng.choice([0.0, 0.001, 0.02, 0.1])
+        return self.now
+
+def stream(tokens, **options):
+    formatter = StreamFormatter(**options)
+    pieces = [formatter.push(token) for token in tokens] + [formatter.finish()]
+    return [piece for piece in pieces if piece is not None]
+
+def test_pieces_join_to_whole_answer_formatting():
+    rng = random.Random(1234)
+    for _ in range(3000):
+        text = random_answer(rng, rng.randint(0, 40))
+        options = {"flush_chars": rng.choice([1, 2, 8, 32]), "flush_interval": rng.choice([0.0, 0.05, 10.0]),
+                   "clock": FakeClock(rng)}
+        assert "".join(stream(random_split(rng, text), **options)) == format_whole(text), text
+
+def test_split_bold_marker_and_entity_are_formatted():
+    assert "".join(stream(["**Title**", "\n", "Text"])) == "**Title**\n\nText"
+    assert "".join(stream(["**Title*", "*\n"])) == "**Title**\n\n"
+    assert "".join(stream(["Tom &am", "p; Jerry"])) == "Tom & Jerry"
+    assert "".join(stream(["&#4", "2;&#42;", "\n"])) == "**\n\n"
+
+def test_first_token_is_sent_at_once_then_size_budget_applies():
+    formatter = StreamFormatter(flush_chars=10, flush_interval=60.0)
+    assert formatter.push("Hi ") == "Hi "
+    assert formatter.push("there ") is None
+    assert formatter.push("friend") == "there friend"
+    assert formatter.finish() is None
+
+def test_time_budget_flushes_short_pieces():
+    now = [0.0]
+    formatter = StreamFormatter(flush_chars=100, flush_interval=0.05, clock=lambda: now[0])
+    formatter.push("a")
+    assert formatter.push("b") is None
+    now[0] = 0.06
+    assert formatter.push("c") == "bc"
+
+def test_unfinished_entity_is_held_until_finish():
+    formatter = StreamFormatter(flush_chars=1)
+    assert formatter.push("AT&") == "AT"
+    assert formatter.push("T") is None
+    assert formatter.finish() == "&T"
+
+def test_frames_are_sse_encoded_json():
+    assert sse_frame({"type": "end"}) == b'data: {"type": "end"}\n\n'
+    frame = token_frame('say "hi"\n')
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    assert json.loads(frame[6:]) == {"type": "token", "content": 'say "hi"\n'}
@@ -0,0 +1,105 @@
+# backend/tests/test_tenants.py
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+
+import main
+import query_engine
+import tenants
+from admission import AdmissionController, ConcurrencyLimiter, RateLimiter
+from fake_llm import FakeClient
+from index_registry import IndexRegistry, TenantIndexes
+from lexical_index import LexicalIndex
+from tenants import check_tenant_id, save_tenant_config, tenant_config, tenant_dirs
+
+@pytest.mark.parametrize("tenant", ["../etc", "Acme", "", "a/b", "x" * 65])
+def test_tenant_ids_cannot_escape_the_tenants_dir(tenant):
+    with pytest.raises(ValueError):
+        check_tenant_id(tenant)
+
+def test_tenant_config_and_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenants, "TENANTS_DIR", str(tmp_path))
+    assert tenant_config("default")["name"] == "MA Digital"
+    save_tenant_config("acme", url="https://acme.test/", name="Acme")
+    assert tenant_config("acme") == {"name": "Acme", "url": "https://acme.test/"}
+    assert tenant_dirs("acme") == (str(tmp_path / "acme"), str(tmp_path / "acme" / "faiss_index"))
+    assert tenants.list_tenants() == ["acme"]
+
+class FakeRegistry:
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.version = 1
+        self.busy = 0
+
+    def load(self):
+        pass
+
+    def in_flight(self):
+        return self.busy
+
+def test_least_recently_used_indexes_are_unloaded_over_budget():
+    indexes = TenantIndexes(lambda tenant: tenant, memory_budget=250, registry_factory=FakeRegistry,
+                            size_fn=lambda index_dir: 100)
+    a = indexes.get("a")
+    indexes.get("b")
+    assert indexes.get("a") is a  # Cached, and now the most recently used
+    indexes.get("c")
+    assert set(indexes.stats()["tenants"]) == {"a", "c"}
+
+    indexes.get("a").busy = 1  # In use: skipped even though it is the oldest
+    indexes.get("c")
+    indexes.get("d")
+    assert set(indexes.stats()["tenants"]) == {"a", "d"}
+    assert indexes.version("c") is None
+    assert indexes.stats()["evictions"] == 2
+    assert indexes.stats()["loads"] == 4
+
+def _registry(texts):
+    embeddings = FakeEmbeddings(size=16)
+    registry = IndexRegistry("index", lexical_loader=None)
+    registry.install(FAISS.from_texts(texts, embeddings, metadatas=[{"url": f"/{i}"} for i in range(len(texts))]),
+                     "v1", LexicalIndex.build(texts))
+    return registry
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenants, "TENANTS_DIR", str(tmp_path))
+    save_tenant_config("acme", name="Acme Plumbing")
+    tenant_registries = {"acme": _registry(["Acme Plumbing fixes leaking pipes.", "Call Acme on 555 0100."])}
+    client = FakeClient(["We ", "fix ", "pipes."])
+    monkeypatch.setattr(query_engine, "initialize", lambda: None)
+    monkeypatch.setattr(query_engine, "get_query_embedder", lambda: FakeEmbeddings(size=16))
+    monkeypatch.setattr(query_engine, "index_registry", _registry(["MA Digital builds websites."]))
+    monkeypatch.setattr(query_engine, "tenant_indexes", TenantIndexes(
+        lambda tenant: tenant, registry_factory=tenant_registries.__getitem__, size_fn=lambda index_dir: 0))
+    monkeypatch.setattr(query_engine, "tenant_answer_caches", {})
+    monkeypatch.setattr(query_engine, "async_client", client)
+    monkeypatch.setattr(query_engine, "answer_cache", None)
+    monkeypatch.setattr(query_engine, "_prompts", {})
+    monkeypatch.setattr(query_engine, "coalescer", query_engine.StreamCoalescer())
+    monkeypatch.setattr(main, "admission", AdmissionController(RateLimiter(0, 1), ConcurrencyLimiter(0, 0, 1)))
+    return SimpleNamespace(http=TestClient(main.app), llm=client)
+
+def test_chat_uses_the_tenants_index_and_prompt(app):
+    response = app.http.post("/chat-sync", json={"query": "Do you fix leaking pipes?", "tenant": "acme"})
+    assert response.json() == {"response": "We fix pipes."}
+    system, user = app.llm.requests[-1]["messages"]
+    assert system["content"].startswith('You are "Acme Plumbing Bot"')
+    assert "Acme Plumbing fixes leaking pipes." in user["content"]
+    assert "MA Digital builds websites." not in user["content"]
+
+    app.http.post("/chat-sync", json={"query": "Do you fix leaking pipes?"})
+    system, user = app.llm.requests[-1]["messages"]
+    assert system["content"] == query_engine.system_prompt_str
+    assert "MA Digital builds websites." in user["content"]
+
+def test_unknown_and_invalid_tenants_are_refused(app):
+    assert app.http.post("/chat", json={"query": "Hi", "tenant": "nobody"}).status_code == 404
+    assert app.http.post("/chat", json={"query": "Hi", "tenant": "../etc"}).status_code == 400
+    assert app.http.get("/widget", params={"tenant": "nobody"}).status_code == 404
+    assert app.http.get("/widget", params={"tenant": "acme"}).status_code == 200
+    assert not app.llm.requests
@@ -0,0 +1,26 @@
+# backend/tokenizer.py
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_encoding = None
+_encoding_failed = False
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # tiktoken fetches its BPE file on first use; offline we fall back to an estimate
+            _encoding_failed = True
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Token count with the local tiktoken encoding, or a ~4 chars/token estimate without it."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
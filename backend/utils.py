@@ -1,7 +1,9 @@
 # backend/utils.py
 
+import gzip
 import os
 import json
+import sqlite3
 from dotenv import load_dotenv
 
 def load_env():
@@ -23,3 +25,136 @@ def load_json(filename: str):
     """Load data from a JSON file."""
     with open(filename, "r", encoding="utf-8") as f:
         return json.load(f)
+
+# Scraped pages ({"url", "content"} records), one file per data directory. The
+# format follows the extension: JSON Lines (optionally gzipped), SQLite, or the
+# original scraped_data.json array, which is still read but no longer streamed.
+PAGE_FORMATS = ("jsonl", "jsonl.gz", "sqlite", "json")
+
+def pages_path(data_dir: str, fmt: str = "jsonl"):
+    """Where a data directory's scraped pages live in the given format."""
+    if fmt not in PAGE_FORMATS:
+        raise ValueError(f"Unknown scraped data format {fmt!r}: use one of {', '.join(PAGE_FORMATS)}")
+    return os.path.join(data_dir, f"scraped_data.{fmt}")
+
+def find_pages(data_dir: str):
+    """The newest scraped pages file in data_dir, whatever its format."""
+    candidates = [pages_path(data_dir, fmt) for fmt in PAGE_FORMATS]
+    existing = [path for path in candidates if os.path.exists(path)]
+    if not existing:
+        raise FileNotFoundError(f"No scraped pages in {data_dir}: run run_scraper.py first")
+    return max(existing, key=os.path.getmtime)
+
+def _page_format(path: str):
+    for fmt in PAGE_FORMATS:
+        if path.endswith("." + fmt):
+            return fmt
+    raise ValueError(f"Cannot tell the scraped data format of {path}")
+
+class PageWriter:
+    """Appends page records to a file as they arrive, so no crawl is ever held in memory.
+
+    Opened with mode "w" the file starts empty; "a" keeps what is there.
+    """
+
+    SQLITE_COMMIT_EVERY = 500
+
+    def __init__(self, path: str, fmt: str = None, mode: str = "w"):
+        self.path = path
+        self.format = fmt or _page_format(path)
+        self.count = 0
+        self._first = True
+        if self.format == "sqlite":
+            if mode == "w" and os.path.exists(path):
+                os.remove(path)
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS pages (url TEXT NOT NULL, content TEXT NOT NULL)")
+        elif self.format == "jsonl.gz":
+            self._file = gzip.open(path, mode + "b", compresslevel=6)
+        elif self.format == "jsonl":
+            self._file = open(path, mode + "b")
+        elif mode == "w":
+            self._file = open(path, "wb")
+            self._file.write(b"[")
+        else:
+            raise ValueError("A JSON array cannot be appended to; use JSON Lines")
+
+    def write(self, page):
+        if self.format == "sqlite":
+            self._db.execute("INSERT INTO pages (url, content) VALUES (?, ?)", (page["url"], page["content"]))
+            if (self.count + 1) % self.SQLITE_COMMIT_EVERY == 0:
+                self._db.commit()
+        elif self.format == "json":
+            self._file.write((b"\n  " if self._first else b",\n  ") + json.dumps(page, ensure_ascii=False).encode("utf-8"))
+            self._first = False
+        else:
+            self._file.write(json.dumps(page, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.count += 1
+
+    def flush(self):
+        """Make everything written so far durable enough to resume from."""
+        if self.format == "sqlite":
+            self._db.commit()
+        else:
+            self._file.flush()
+
+    def tell(self):
+        """Bytes written so far (JSON Lines only): a resume point for truncate_pages()."""
+        return self._file.tell()
+
+    def close(self):
+        if self.format == "sqlite":
+            self._db.commit()
+            self._db.close()
+            return
+        if self.format == "json":
+            self._file.write(b"\n]\n" if not self._first else b"]\n")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def truncate_pages(path: str, offset: int):
+    """Cut a JSON Lines pages file back to `offset` bytes; returns how many pages remain."""
+    with open(path, "r+b") as f:
+        f.truncate(offset)
+        f.seek(0)
+        return sum(1 for line in f if line.strip())
+
+def iter_pages(path: str):
+    """Yield the page records in a scraped pages file one at a time, in crawl order.
+
+    A torn last line (a crawl killed mid-write) is skipped rather than failing
+    the whole read. Legacy scraped_data.json files are loaded in one go.
+    """
+    fmt = _page_format(path)
+    if fmt == "json":
+        yield from load_json(path)
+    elif fmt == "sqlite":
+        db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            for url, content in db.execute("SELECT url, content FROM pages ORDER BY rowid"):
+                yield {"url": url, "content": content}
+        finally:
+            db.close()
+    else:
+        opener = gzip.open if fmt == "jsonl.gz" else open
+        with opener(path, "rb") as f:
+            try:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        yield json.loads(line)
+            except EOFError:  # gzip stream cut off before its trailer
+                return
+
+def convert_pages(source: str, target: str, fmt: str = None):
+    """Copy a pages file into another format, record by record; returns the page count."""
+    with PageWriter(target, fmt) as writer:
+        for page in iter_pages(source):
+            writer.write(page)
+    return writer.count